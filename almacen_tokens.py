@@ -0,0 +1,276 @@
+import codecs
+import mmap
+import os
+from array import array
+from collections import Counter
+from itertools import compress
+
+import serializacion
+from analizador import TAM_BLOQUE, TOKENS_IGNORADOS, Token, codigo_tipo, obtener_lexer
+
+MAGIA = b"CLXT"
+VERSION_FORMATO = 1
+
+# Marcas de orden de bytes: (BOM, codificación a usar después de ella)
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+
+# Codificaciones que dependen de la BOM, cuando el archivo no la tiene
+SIN_BOM = {"utf-8-sig": "utf-8", "utf-16": "utf-16-le", "utf-32": "utf-32-le"}
+
+# Columnas numéricas del almacén: (nombre, typecode de array)
+COLUMNAS = (
+    ("tipo", "H"),       # Índice en self.tipos
+    ("patron", "H"),     # Índice en self.patrones
+    ("reservada", "B"),
+    ("inicio", "q"),     # Desplazamiento del lexema en el código (en bytes si hay codificación)
+    ("fin", "q"),
+    ("linea", "I"),
+    ("columna", "I"),
+)
+
+
+class AlmacenTokens:
+    """
+    Flujo de tokens en arreglos paralelos (struct-of-arrays).
+    Cada token ocupa unos pocos bytes: no se guardan los lexemas, que se
+    recuperan cortando el código fuente con (inicio, fin). Los ID y patrones
+    se guardan como índices en diccionarios de cadenas propios del almacén.
+    Si `codificacion` no es None, `codigo` son los bytes del archivo (p. ej.
+    un mmap, ver desde_archivo), (inicio, fin) son desplazamientos en bytes y
+    los lexemas se decodifican al pedirlos.
+    """
+
+    def __init__(self, codigo, tipos=None, patrones=None, columnas=None, codificacion=None):
+        self.codigo = codigo
+        self.codificacion = codificacion
+        self.tipos = list(tipos or [])
+        self.patrones = list(patrones or [])
+        self._indice_tipos = {nombre: i for i, nombre in enumerate(self.tipos)}
+        self._indice_patrones = {nombre: i for i, nombre in enumerate(self.patrones)}
+        columnas = columnas or {}
+        for nombre, typecode in COLUMNAS:
+            setattr(self, nombre, columnas.get(nombre, array(typecode)))
+
+    @classmethod
+    def desde_codigo(cls, codigo, lexer=None, incluir_ignorados=False):
+        lexer = lexer or obtener_lexer()
+        almacen = cls(codigo)
+        almacen.extender(lexer.iter_tokens(codigo, incluir_ignorados=incluir_ignorados))
+        return almacen
+
+    @classmethod
+    def desde_archivo(cls, ruta, codificacion="utf-8", lexer=None, incluir_ignorados=False):
+        """
+        Analiza un archivo mapeándolo en memoria, sin leerlo entero como texto.
+        Los lexemas no se copian: el almacén guarda desplazamientos en bytes
+        sobre el mapeo, que queda abierto mientras se use el almacén.
+        """
+        almacen = cls.mapear(ruta, codificacion)
+        for _ in almacen.iter_extender_mapeado(lexer, incluir_ignorados):
+            pass
+        return almacen
+
+    @classmethod
+    def mapear(cls, ruta, codificacion="utf-8"):
+        """
+        Devuelve un almacén vacío sobre el archivo mapeado en memoria, para
+        llenarlo con iter_extender_mapeado(). Una BOM al inicio decide la
+        codificación ("utf-16" y "utf-32" sin BOM se leen como little endian).
+        """
+        with open(ruta, "rb") as archivo:
+            # mmap no admite archivos vacíos
+            mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(archivo.fileno()).st_size else b""
+        nombre = codecs.lookup(codificacion).name
+        desplazamiento = 0
+        if nombre.startswith(("utf-8", "utf-16", "utf-32")):
+            for bom, codificacion_bom in BOMS:
+                if mapa[:len(bom)] == bom:
+                    codificacion, desplazamiento = codificacion_bom, len(bom)
+                    break
+            else:
+                codificacion = SIN_BOM.get(nombre, codificacion)
+        almacen = cls(mapa, codificacion=codificacion)
+        almacen._desplazamiento = desplazamiento
+        if isinstance(mapa, mmap.mmap):
+            almacen._mapa = mapa
+        return almacen
+
+    def iter_extender_mapeado(self, lexer=None, incluir_ignorados=False, tam_bloque=TAM_BLOQUE):
+        """
+        Analiza el archivo mapeado por mapear() en bloques, agrega cada token al
+        almacén y lo genera; así el sintáctico puede consumirlo a la vez sin
+        que se acumulen objetos Token.
+        Los bytes inválidos se decodifican con 'surrogateescape' (el lexer los
+        marca como error) para que los desplazamientos en bytes sigan siendo exactos.
+        """
+        lexer = lexer or obtener_lexer()
+        mapa, codificacion = self.codigo, self.codificacion
+        inicio_datos = self._desplazamiento
+
+        def bloques():
+            decodificador = codecs.getincrementaldecoder(codificacion)("surrogateescape")
+            for inicio in range(inicio_datos, len(mapa), tam_bloque):
+                yield decodificador.decode(mapa[inicio:inicio + tam_bloque])
+            yield decodificador.decode(b"", final=True)
+
+        # Con todos los tokens (también espacios y comentarios) el texto queda
+        # cubierto sin huecos, así que la posición en bytes se obtiene sumando
+        # el largo codificado de cada lexema
+        compatible_ascii = "a".encode(codificacion) == b"a"
+        posicion = inicio_datos
+        tipos, patrones = self._indice_tipos, self._indice_patrones
+        for token in lexer.iter_tokens(bloques(), tam_bloque=tam_bloque, incluir_ignorados=True):
+            lexema = token.lexema
+            inicio = posicion
+            posicion += (len(lexema) if compatible_ascii and lexema.isascii()
+                         else len(lexema.encode(codificacion, "surrogateescape")))
+            id_token = token.id
+            if id_token in TOKENS_IGNORADOS and not incluir_ignorados:
+                continue
+            tipo = tipos.get(id_token)
+            if tipo is None:
+                tipo = tipos[id_token] = len(self.tipos)
+                self.tipos.append(id_token)
+            patron = patrones.get(token.patron)
+            if patron is None:
+                patron = patrones[token.patron] = len(self.patrones)
+                self.patrones.append(token.patron)
+            self.tipo.append(tipo)
+            self.patron.append(patron)
+            self.reservada.append(token.reservada)
+            self.inicio.append(inicio)
+            self.fin.append(posicion)
+            self.linea.append(token.linea)
+            self.columna.append(token.columna)
+            yield token
+
+    def extender(self, tokens):
+        tipos, patrones = self._indice_tipos, self._indice_patrones
+        agregar_tipo, agregar_patron = self.tipo.append, self.patron.append
+        agregar_reservada, agregar_inicio, agregar_fin = self.reservada.append, self.inicio.append, self.fin.append
+        agregar_linea, agregar_columna = self.linea.append, self.columna.append
+        for token in tokens:
+            id_token = token.id
+            tipo = tipos.get(id_token)
+            if tipo is None:
+                tipo = tipos[id_token] = len(self.tipos)
+                self.tipos.append(id_token)
+            patron = patrones.get(token.patron)
+            if patron is None:
+                patron = patrones[token.patron] = len(self.patrones)
+                self.patrones.append(token.patron)
+            agregar_tipo(tipo)
+            agregar_patron(patron)
+            agregar_reservada(token.reservada)
+            agregar_inicio(token.inicio)
+            agregar_fin(token.inicio + len(token.lexema))
+            agregar_linea(token.linea)
+            agregar_columna(token.columna)
+
+    # --- Acceso por token ---
+    def __len__(self):
+        return len(self.tipo)
+
+    def lexema(self, i):
+        if self.codificacion is not None:
+            return str(self.codigo[self.inicio[i]:self.fin[i]], self.codificacion, "surrogateescape")
+        return self.codigo[self.inicio[i]:self.fin[i]]
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return Token(codigo_tipo(self.tipos[self.tipo[i]]), self.lexema(i), self.linea[i], self.columna[i],
+                     self.patrones[self.patron[i]], bool(self.reservada[i]), self.inicio[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # --- Operaciones sobre columnas completas ---
+    def contar_por_tipo(self):
+        """Devuelve {ID: cantidad} contando sobre la columna de tipos."""
+        return {self.tipos[tipo]: cantidad for tipo, cantidad in Counter(self.tipo).items()}
+
+    def contar_por_patron(self):
+        return {self.patrones[patron]: cantidad for patron, cantidad in Counter(self.patron).items()}
+
+    def histograma_lineas(self):
+        """Devuelve {línea: cantidad de tokens}."""
+        return dict(Counter(self.linea))
+
+    def filtrar(self, excluir=TOKENS_IGNORADOS):
+        """
+        Devuelve un nuevo almacén sin los tokens cuyos ID están en `excluir`
+        (por defecto espacios y comentarios, como procesar_codigo2).
+        El código fuente y los diccionarios se comparten.
+        """
+        conservar = [nombre not in excluir for nombre in self.tipos]
+        mascara = bytes(conservar[tipo] for tipo in self.tipo) if not all(conservar) else None
+        columnas = {}
+        for nombre, typecode in COLUMNAS:
+            origen = getattr(self, nombre)
+            columnas[nombre] = array(typecode, compress(origen, mascara) if mascara is not None else origen)
+        return AlmacenTokens(self.codigo, self.tipos, self.patrones, columnas, self.codificacion)
+
+    def como_numpy(self):
+        """Vistas NumPy sin copia de cada columna (requiere numpy instalado)."""
+        import numpy
+        return {nombre: numpy.frombuffer(getattr(self, nombre), dtype=numpy.dtype(typecode))
+                for nombre, typecode in COLUMNAS}
+
+    # --- Persistencia ---
+    def a_bytes(self, incluir_codigo=True):
+        """
+        Serializa el almacén en binario: cabecera JSON, columnas alineadas a
+        8 bytes y, si `incluir_codigo`, el código fuente en UTF-8 al final.
+        Sin el código, desde_bytes() necesita recibirlo aparte.
+        """
+        return b"".join(self._partes(incluir_codigo))
+
+    def _partes(self, incluir_codigo=True):
+        extras = ()
+        if incluir_codigo:
+            codigo_bytes = self.codigo.encode("utf-8") if self.codificacion is None else self.codigo
+            extras = (("codigo", len(codigo_bytes), codigo_bytes),)
+        cabecera = {"tipos": self.tipos, "patrones": self.patrones, "codigo": None,
+                    "codificacion": self.codificacion}
+        columnas = [(nombre, typecode, len(getattr(self, nombre)), getattr(self, nombre))
+                    for nombre, typecode in COLUMNAS]
+        return serializacion.partes(MAGIA, VERSION_FORMATO, cabecera, columnas, extras)
+
+    @classmethod
+    def desde_bytes(cls, datos, codigo=None):
+        """
+        Reconstruye un almacén serializado con a_bytes(). Si `datos` es un
+        buffer (bytes, mmap), las columnas son vistas sobre él y no se copian.
+        `codigo` es obligatorio si se serializó sin el código fuente; si el
+        almacén tenía codificación, son los bytes del archivo.
+        """
+        cabecera, columnas, extras = serializacion.leer(datos, MAGIA, VERSION_FORMATO,
+                                                        "un almacén de tokens", ("codigo",))
+        if codigo is None:
+            codigo = extras["codigo"]
+            if codigo is None:
+                raise ValueError("El almacén se guardó sin el código fuente")
+            if cabecera.get("codificacion") is None:
+                codigo = str(codigo, "utf-8")
+        return cls(codigo, cabecera["tipos"], cabecera["patrones"], columnas, cabecera.get("codificacion"))
+
+    def guardar(self, ruta):
+        with open(ruta, "wb") as archivo:
+            for parte in self._partes():
+                archivo.write(parte)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """
+        Abre un almacén guardado con guardar(). Las columnas son vistas sobre el
+        archivo mapeado en memoria (no se copian); solo se decodifica el código.
+        """
+        return serializacion.cargar(ruta, cls.desde_bytes)
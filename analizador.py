@@ -1,3 +1,6 @@
+import bisect
+import codecs
+import os
 import re
 
 def cargar_diccionario(filepath):
@@ -22,6 +25,160 @@ def cargar_diccionario(filepath):
         print(f"Error al cargar el diccionario: {e}")
         return []
 
+class TablaSimbolos:
+    """
+    Tabla de símbolos indexada por lexema.
+    Conserva las entradas en el orden del archivo y, si un lexema aparece
+    más de una vez, la búsqueda devuelve siempre la primera aparición.
+    """
+
+    def __init__(self, entradas=()):
+        self.entradas = []
+        self._por_lexema = {}
+        for entrada in entradas:
+            self.agregar(entrada)
+
+    @classmethod
+    def desde_archivo(cls, filepath):
+        return cls(cargar_diccionario(filepath))
+
+    def agregar(self, entrada):
+        self.entradas.append(entrada)
+        # La primera aparición gana (igual que el recorrido lineal anterior)
+        self._por_lexema.setdefault(entrada["lexema"], entrada)
+
+    def buscar(self, lexema, defecto=None):
+        return self._por_lexema.get(lexema, defecto)
+
+    def por_id(self, id_token):
+        """Devuelve todas las entradas con el ID indicado (p. ej. 'tipoPrimitivo')."""
+        return [entrada for entrada in self.entradas if entrada["id"] == id_token]
+
+    def __getitem__(self, lexema):
+        return self._por_lexema[lexema]
+
+    def __contains__(self, lexema):
+        return lexema in self._por_lexema
+
+    def __len__(self):
+        return len(self.entradas)
+
+    def __iter__(self):
+        return iter(self.entradas)
+
+# Registro de tipos de token: cada ID distinto recibe un código entero estable
+# dentro del proceso, de modo que comparar tipos es comparar enteros.
+_CODIGOS_TIPO = {}
+NOMBRES_TIPO = []
+
+def codigo_tipo(id_token):
+    codigo = _CODIGOS_TIPO.get(id_token)
+    if codigo is None:
+        codigo = _CODIGOS_TIPO[id_token] = len(NOMBRES_TIPO)
+        NOMBRES_TIPO.append(id_token)
+    return codigo
+
+TIPO_ERROR = codigo_tipo("ERROR")
+
+# Claves de la vista tipo dict, en el orden de las columnas de la tabla
+CLAVES_TOKEN = ("ID", "Lexema", "Línea", "Columna", "Patrón", "Reservada")
+
+
+class Token:
+    """
+    Token compacto. Se accede por atributos (token.lexema, token.linea, ...)
+    y también como dict con las claves de siempre (token["Lexema"], token["Línea"], ...).
+    `tipo` es el código entero del ID (ver codigo_tipo) e `inicio` el
+    desplazamiento del lexema en el código fuente.
+    """
+    __slots__ = ('tipo', 'lexema', 'linea', 'columna', 'patron', 'reservada', 'inicio')
+
+    def __init__(self, tipo, lexema, linea, columna, patron, reservada, inicio=-1):
+        self.tipo = tipo
+        self.lexema = lexema
+        self.linea = linea
+        self.columna = columna
+        self.patron = patron
+        self.reservada = reservada
+        self.inicio = inicio
+
+    @classmethod
+    def crear(cls, id_token, lexema, linea, columna, patron, reservada, inicio=-1):
+        return cls(codigo_tipo(id_token), lexema, linea, columna, patron, reservada, inicio)
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls.crear(*(datos[clave] for clave in CLAVES_TOKEN), datos.get("Inicio", -1))
+
+    @property
+    def id(self):
+        return NOMBRES_TIPO[self.tipo]
+
+    # --- Vista compatible con dict ---
+    def __getitem__(self, clave):
+        try:
+            return _LECTORES_CLAVE[clave](self)
+        except KeyError:
+            raise KeyError(clave) from None
+
+    def get(self, clave, defecto=None):
+        lector = _LECTORES_CLAVE.get(clave)
+        return lector(self) if lector else defecto
+
+    def __contains__(self, clave):
+        return clave in _LECTORES_CLAVE
+
+    def keys(self):
+        return CLAVES_TOKEN
+
+    def values(self):
+        return [self[clave] for clave in CLAVES_TOKEN]
+
+    def items(self):
+        return [(clave, self[clave]) for clave in CLAVES_TOKEN]
+
+    def __iter__(self):
+        return iter(CLAVES_TOKEN)
+
+    def __len__(self):
+        return len(CLAVES_TOKEN)
+
+    def a_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, otro):
+        if isinstance(otro, Token):
+            return (self.tipo, self.lexema, self.linea, self.columna, self.patron, self.reservada) == \
+                   (otro.tipo, otro.lexema, otro.linea, otro.columna, otro.patron, otro.reservada)
+        if isinstance(otro, dict):
+            return self.a_dict() == {clave: otro.get(clave) for clave in CLAVES_TOKEN}
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # Los códigos de tipo son locales al proceso: se serializa el ID
+        return (Token.crear, (self.id, self.lexema, self.linea, self.columna,
+                              self.patron, self.reservada, self.inicio))
+
+    def __repr__(self):
+        return (f"Token({self.id!r}, {self.lexema!r}, linea={self.linea}, "
+                f"columna={self.columna}, patron={self.patron!r})")
+
+_LECTORES_CLAVE = {
+    "ID": lambda token: NOMBRES_TIPO[token.tipo],
+    "Lexema": lambda token: token.lexema,
+    "Línea": lambda token: token.linea,
+    "Columna": lambda token: token.columna,
+    "Patrón": lambda token: token.patron,
+    "Reservada": lambda token: token.reservada,
+    "Inicio": lambda token: token.inicio,
+}
+
+def como_token(token):
+    """Convierte un token en formato dict a Token (los Token se devuelven tal cual)."""
+    return token if isinstance(token, Token) else Token.desde_dict(token)
+
 def calcular_linea(codigo, posicion):
     return codigo.count('\n', 0, posicion) + 1
 
@@ -35,157 +192,358 @@ def calcular_columna(codigo, posicion):
         # La columna es la diferencia entre posicion y la última nueva línea
         return posicion - ultima_nueva_linea
 
-def analizar_codigo(codigo):
-    diccionario = cargar_diccionario('tabla_signos_java.txt')
-    resultados = []
-    
-    # Definir palabras reservadas de Java
-    palabras_reservadas = {
-        "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char",
-        "class", "const", "continue", "default", "do", "double", "else", "enum",
-        "extends", "final", "finally", "float", "for", "goto", "if", "implements",
-        "import", "instanceof", "int", "interface", "long", "native", "new", "package",
-        "private", "protected", "public", "return", "short", "static", "strictfp", 
-        "super", "switch", "synchronized", "this", "throw", "throws", "transient", 
-        "try", "void", "volatile", "while", "true", "false", "null"
-    }
-
-    # Definir patrones en orden de prioridad (los más específicos primero)
-    patrones = [
-        ("comentario_linea", r'//[^\n]*'),
-        ("comentario_bloque", r'/\*[\s\S]*?\*/'),
-        ("whitespace", r'\s+'),
-        ("literal_caracter", r"'([^'\\\n]|\\[tnrfb\"'\\]|\\u[0-9a-fA-F]{4})'"),
-        ("cadenaLiteral", r'"([^"\\\n]|\\[tnrfb\"\'\\]|\\u[0-9a-fA-F]{4})*"'),
-        ("literal_booleano", r'true|false'),
-        ("literal_nulo", r'null'),
-        ("operador_lambda", r'->'),
-        ("operador_referencia", r'::'),
-        ("operador_incremento", r'\+\+|--'),
-        ("operador_asignacion", r'=|\+=|-=|\*=|/=|%='),
-        ("operador_relacional", r'==|!=|>|<|>=|<='),
-        ("operador_logico", r'&&|\|\||!'),
-        ("operador_bit", r'&|\^|\||~|>>|<<|>>>'),
-        ("operador_ternario", r'\?|:'),
-        ("operador_aritmetico", r'\+|-|\*|/|%'),
-        ("numero_decimal", r'\d+\.\d+([eE][+-]?\d+)?[fFdD]?'),
-        ("numero_entero", r'\d+[lL]?'),
-        ("delimitador", r'\.|,|;|\[|\]|\(|\)|\{|\}'),
-        ("tipo_primitivo", r'byte|short|int|long|float|double|char|boolean'),
-        ("control_flujo", r'if|else|switch|case|default|for|while|do|break|continue'),
-        ("modificador_acceso", r'class|interface|enum|extends|implements|public|private|protected|static|final|abstract'),
-        ("identificador", r'[a-zA-Z_][a-zA-Z0-9_]*'),
-        # Patrones para símbolos no válidos
-        ("operador_no_valido", r'\*\*|:=|=>|<=>|<>'),
-        ("caracter_especial_no_valido", r'¿|¡|¬|‰|§'),
-        ("delimitador_no_valido", r'«|»|„|›|‹'),
-        ("operador_matematico_no_valido", r'÷|×|∑|∏'),
-        ("caracter_no_reconocido", r'ñ|Ñ|æ|ø|ß|ð'),
-    ]
-
-    # Construir el regex combinado
-    patron_combinado = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in patrones)
-
-    # Escanear el código original
-    posicion_actual = 0
-    for match in re.finditer(patron_combinado, codigo):
-        tipo_token = match.lastgroup
-        lexema = match.group(tipo_token)
-        start = match.start()
-
-        # Verificar si hay caracteres no reconocidos entre el último match y este
-        if start > posicion_actual:
-            fragmento_no_reconocido = codigo[posicion_actual:start]
-            if fragmento_no_reconocido.strip():  # Si hay algo que no sean espacios
-                linea = calcular_linea(codigo, posicion_actual)
-                columna = calcular_columna(codigo, posicion_actual)
-                resultados.append({
-                    "ID": "ERROR",
-                    "Lexema": fragmento_no_reconocido,
-                    "Línea": linea,
-                    "Columna": columna,
-                    "Patrón": "Carácter no reconocido",
-                    "Reservada": False
-                })
-        
-        posicion_actual = match.end()
-
-        # Saltar comentarios y espacios
-        if tipo_token in ["whitespace", "comentario_linea", "comentario_bloque"]:
-            continue
-
-        # Manejar símbolos no válidos
-        if tipo_token in ["operador_no_valido", "caracter_especial_no_valido", 
-                          "delimitador_no_valido", "operador_matematico_no_valido", 
-                          "caracter_no_reconocido"]:
-            linea = calcular_linea(codigo, start)
-            columna = calcular_columna(codigo, start)
-            tipo_error = {
-                "operador_no_valido": "Operador no válido en Java",
-                "caracter_especial_no_valido": "Carácter especial no válido en Java",
-                "delimitador_no_valido": "Delimitador no válido en Java",
-                "operador_matematico_no_valido": "Operador matemático no válido en Java",
-                "caracter_no_reconocido": "Carácter no reconocido en identificadores de Java",
-            }[tipo_token]
-            
-            resultados.append({
-                "ID": "ERROR",
-                "Lexema": lexema,
-                "Línea": linea,
-                "Columna": columna,
-                "Patrón": tipo_error,
-                "Reservada": False,
-            })
-            continue  # Saltar al siguiente token
-
-        # Buscar en el diccionario
-        entrada_diccionario = next((entrada for entrada in diccionario if entrada["lexema"] == lexema), None)
-        linea = calcular_linea(codigo, start)
-        columna = calcular_columna(codigo, start)
-        
-        if entrada_diccionario:
-            resultados.append({
-                "ID": entrada_diccionario["id"],
-                "Lexema": lexema,
-                "Línea": linea,
-                "Columna": columna,
-                "Patrón": entrada_diccionario["nombre"],
-                "Reservada": entrada_diccionario["palabraReservada"]
-            })
+# Palabras reservadas de Java
+PALABRAS_RESERVADAS = frozenset({
+    "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char",
+    "class", "const", "continue", "default", "do", "double", "else", "enum",
+    "extends", "final", "finally", "float", "for", "goto", "if", "implements",
+    "import", "instanceof", "int", "interface", "long", "native", "new", "package",
+    "private", "protected", "public", "return", "short", "static", "strictfp", 
+    "super", "switch", "synchronized", "this", "throw", "throws", "transient", 
+    "try", "void", "volatile", "while", "true", "false", "null"
+})
+
+# Patrones en orden de prioridad (los más específicos primero)
+PATRONES = [
+    ("comentario_linea", r'//[^\n]*'),
+    ("comentario_bloque", r'/\*[\s\S]*?\*/'),
+    ("whitespace", r'\s+'),
+    ("literal_caracter", r"'([^'\\\n]|\\[tnrfb\"'\\]|\\u[0-9a-fA-F]{4})'"),
+    ("cadenaLiteral", r'"([^"\\\n]|\\[tnrfb\"\'\\]|\\u[0-9a-fA-F]{4})*"'),
+    ("literal_booleano", r'true|false'),
+    ("literal_nulo", r'null'),
+    ("operador_lambda", r'->'),
+    ("operador_referencia", r'::'),
+    ("operador_incremento", r'\+\+|--'),
+    ("operador_asignacion", r'=|\+=|-=|\*=|/=|%='),
+    ("operador_relacional", r'==|!=|>|<|>=|<='),
+    ("operador_logico", r'&&|\|\||!'),
+    ("operador_bit", r'&|\^|\||~|>>|<<|>>>'),
+    ("operador_ternario", r'\?|:'),
+    ("operador_aritmetico", r'\+|-|\*|/|%'),
+    ("numero_decimal", r'\d+\.\d+([eE][+-]?\d+)?[fFdD]?'),
+    ("numero_entero", r'\d+[lL]?'),
+    ("delimitador", r'\.|,|;|\[|\]|\(|\)|\{|\}'),
+    ("tipo_primitivo", r'byte|short|int|long|float|double|char|boolean'),
+    ("control_flujo", r'if|else|switch|case|default|for|while|do|break|continue'),
+    ("modificador_acceso", r'class|interface|enum|extends|implements|public|private|protected|static|final|abstract'),
+    ("identificador", r'[a-zA-Z_][a-zA-Z0-9_]*'),
+    # Patrones para símbolos no válidos
+    ("operador_no_valido", r'\*\*|:=|=>|<=>|<>'),
+    ("caracter_especial_no_valido", r'¿|¡|¬|‰|§'),
+    ("delimitador_no_valido", r'«|»|„|›|‹'),
+    ("operador_matematico_no_valido", r'÷|×|∑|∏'),
+    ("caracter_no_reconocido", r'ñ|Ñ|æ|ø|ß|ð'),
+]
+
+TOKENS_IGNORADOS = frozenset({"whitespace", "comentario_linea", "comentario_bloque"})
+
+TIPOS_ERROR = {
+    "operador_no_valido": "Operador no válido en Java",
+    "caracter_especial_no_valido": "Carácter especial no válido en Java",
+    "delimitador_no_valido": "Delimitador no válido en Java",
+    "operador_matematico_no_valido": "Operador matemático no válido en Java",
+    "caracter_no_reconocido": "Carácter no reconocido en identificadores de Java",
+}
+
+TAM_BLOQUE = 1 << 16
+
+RUTA_TABLA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tabla_signos_java.txt')
+
+
+class Lexer:
+    """
+    Motor léxico reutilizable.
+    Carga la tabla de símbolos y compila el regex combinado una sola vez,
+    de modo que cada llamada a analizar() solo hace el escaneo del código.
+    """
+
+    def __init__(self, ruta_tabla=RUTA_TABLA, patrones=PATRONES, palabras_reservadas=PALABRAS_RESERVADAS,
+                 tabla=None):
+        self.ruta_tabla = ruta_tabla
+        self.tabla = tabla if tabla is not None else TablaSimbolos.desde_archivo(ruta_tabla)
+        self.diccionario = self.tabla.entradas
+        self.palabras_reservadas = frozenset(palabras_reservadas)
+        self.patrones = list(patrones)
+        # Construir y compilar el regex combinado
+        self.patron_combinado = re.compile(
+            '|'.join(f'(?P<{name}>{pattern})' for name, pattern in self.patrones)
+        )
+
+    def analizar(self, codigo):
+        return list(self.iter_tokens(codigo))
+
+    def iter_tokens(self, fuente, tam_bloque=TAM_BLOQUE, codificacion='utf-8', incluir_ignorados=False):
+        """
+        Genera los tokens de `fuente` de uno en uno.
+        Args:
+            fuente: str, objeto archivo (texto o binario) o iterable de fragmentos (str o bytes).
+            tam_bloque (int): Tamaño de lectura cuando `fuente` es un archivo.
+            codificacion (str): Codificación usada para decodificar fragmentos en bytes.
+            incluir_ignorados (bool): Si es True, también se generan los espacios y comentarios.
+        Los tokens que cruzan el borde entre fragmentos (comentarios de bloque,
+        cadenas) se reconocen igual que si el código se hubiera leído completo.
+        """
+        if isinstance(fuente, str):
+            yield from self._escanear(fuente, len(fuente), 0, 1, 0, True, incluir_ignorados)
+            return
+
+        fragmentos = _leer_bloques(fuente, tam_bloque) if hasattr(fuente, 'read') else fuente
+        decodificador = None
+        buffer = ''
+        base = 0          # Desplazamiento absoluto de buffer[0]
+        linea = 1
+        inicio_linea = 0  # Desplazamiento absoluto del inicio de la línea actual
+        esperando_cierre = False
+
+        for fragmento in fragmentos:
+            if isinstance(fragmento, (bytes, bytearray, memoryview)):
+                if decodificador is None:
+                    decodificador = codecs.getincrementaldecoder(codificacion)()
+                fragmento = decodificador.decode(fragmento)
+            if not fragmento:
+                continue
+            # Si hay un comentario de bloque abierto, no vale la pena volver a
+            # escanear hasta que llegue un posible cierre
+            if esperando_cierre and '*/' not in buffer[-1:] + fragmento:
+                buffer += fragmento
+                continue
+            buffer += fragmento
+
+            # Solo se escanean líneas completas: salvo los comentarios de bloque,
+            # ningún token cruza un salto de línea
+            limite = buffer.rfind('\n') + 1
+            if not limite:
+                continue
+            consumido, linea, inicio_linea = yield from self._escanear(
+                buffer, limite, base, linea, inicio_linea, False, incluir_ignorados)
+            esperando_cierre = consumido < limite
+            base += consumido
+            buffer = buffer[consumido:]
+
+        if decodificador is not None:
+            buffer += decodificador.decode(b'', final=True)
+        yield from self._escanear(buffer, len(buffer), base, linea, inicio_linea, True, incluir_ignorados)
+
+    def _escanear(self, codigo, limite, base, linea_actual, inicio_linea, final, incluir_ignorados=False,
+                  inicio=0):
+        """
+        Tokeniza codigo[inicio:limite]. `base` es el desplazamiento absoluto de codigo[0]
+        y (linea_actual, inicio_linea) la posición de la línea en codigo[inicio].
+        Si no es el último fragmento, se detiene ante un comentario de bloque sin
+        cerrar. Devuelve (consumido, linea, inicio_linea) para continuar después.
+        """
+        buscar_entrada = self.tabla.buscar
+        palabras_reservadas = self.palabras_reservadas
+
+        # Escanear el código original
+        posicion_actual = inicio
+
+        # Contador incremental de líneas: las posiciones consultadas siempre
+        # avanzan, así que solo se cuentan los saltos de línea desde la última
+        # consulta y el costo total es lineal en el tamaño del código.
+        posicion_contada = inicio
+
+        def ubicar(posicion):
+            nonlocal linea_actual, inicio_linea, posicion_contada
+            saltos = codigo.count('\n', posicion_contada, posicion)
+            if saltos:
+                linea_actual += saltos
+                inicio_linea = base + codigo.rfind('\n', posicion_contada, posicion) + 1
+            posicion_contada = posicion
+            return linea_actual, base + posicion - inicio_linea + 1
+
+        for match in self.patron_combinado.finditer(codigo, inicio, limite):
+            tipo_token = match.lastgroup
+            lexema = match.group(tipo_token)
+            start = match.start()
+
+            # Un '/*' que no cierra en los datos disponibles: esperar más
+            if not final and tipo_token == "operador_aritmetico" and codigo.startswith('*', start + 1):
+                ubicar(posicion_actual)
+                return posicion_actual, linea_actual, inicio_linea
+
+            # Verificar si hay caracteres no reconocidos entre el último match y este
+            if start > posicion_actual:
+                fragmento_no_reconocido = codigo[posicion_actual:start]
+                if fragmento_no_reconocido.strip():  # Si hay algo que no sean espacios
+                    linea, columna = ubicar(posicion_actual)
+                    yield Token(TIPO_ERROR, fragmento_no_reconocido, linea, columna,
+                                "Carácter no reconocido", False, base + posicion_actual)
+
+            posicion_actual = match.end()
+
+            # Saltar comentarios y espacios
+            if tipo_token in TOKENS_IGNORADOS:
+                if incluir_ignorados:
+                    linea, columna = ubicar(start)
+                    yield Token(codigo_tipo(tipo_token), lexema, linea, columna, tipo_token, False, base + start)
+                continue
+
+            # Manejar símbolos no válidos
+            if tipo_token in TIPOS_ERROR:
+                linea, columna = ubicar(start)
+                yield Token(TIPO_ERROR, lexema, linea, columna, TIPOS_ERROR[tipo_token], False, base + start)
+                continue  # Saltar al siguiente token
+
+            # Buscar en el diccionario
+            entrada_diccionario = buscar_entrada(lexema)
+            linea, columna = ubicar(start)
+
+            if entrada_diccionario:
+                yield Token(codigo_tipo(entrada_diccionario["id"]), lexema, linea, columna,
+                            entrada_diccionario["nombre"], entrada_diccionario["palabraReservada"], base + start)
+            else:
+                # Determinar el patrón para tokens no reservados
+                patron = tipo_token
+                if tipo_token == "cadenaLiteral":
+                    patron = "literal_cadena"
+                elif tipo_token == "literal_caracter":
+                    patron = "literal_caracter"
+
+                # Verificar si es una palabra reservada
+                es_reservada = lexema in palabras_reservadas
+
+                yield Token(codigo_tipo(tipo_token if not es_reservada else "reserved_" + lexema),
+                            lexema, linea, columna, patron, es_reservada, base + start)
+
+        # Verificar si hay caracteres no reconocidos al final del código
+        if posicion_actual < limite:
+            fragmento_final = codigo[posicion_actual:limite]
+            if fragmento_final.strip():  # Si hay algo que no sean espacios
+                linea, columna = ubicar(posicion_actual)
+                yield Token(TIPO_ERROR, fragmento_final, linea, columna,
+                            "Carácter no reconocido", False, base + posicion_actual)
+
+        ubicar(limite)
+        return limite, linea_actual, inicio_linea
+
+
+    def relexar(self, tokens, codigo_anterior, codigo_nuevo, posicion, eliminados, agregados, en_el_lugar=True):
+        """
+        Actualiza `tokens` (resultado de analizar(codigo_anterior)) tras una edición
+        que reemplazó `eliminados` caracteres en `posicion` por `agregados` nuevos,
+        como informa la señal contentsChange de QTextDocument.
+        Solo se vuelve a tokenizar desde la línea anterior a la edición hasta que
+        el flujo se resincroniza; los tokens siguientes se reutilizan desplazando
+        su posición y su línea (en el lugar, salvo que en_el_lugar sea False).
+        Devuelve la nueva lista de tokens, idéntica a analizar(codigo_nuevo).
+        """
+        delta = agregados - eliminados
+        fin_nuevo = posicion + agregados
+        if (posicion < 0 or len(codigo_nuevo) - len(codigo_anterior) != delta
+                or posicion + eliminados > len(codigo_anterior)
+                or codigo_nuevo[:posicion] != codigo_anterior[:posicion]
+                or codigo_nuevo[fin_nuevo:] != codigo_anterior[posicion + eliminados:]):
+            # La edición no describe el cambio (p. ej. setPlainText): análisis completo
+            return self.analizar(codigo_nuevo)
+
+        # Punto de reinicio seguro: el último token que empieza antes de la línea
+        # editada. Ningún token (salvo los comentarios de bloque, que no se emiten)
+        # cruza un salto de línea, así que el escaneo allí no depende de la edición.
+        inicio_linea_edicion = codigo_anterior.rfind('\n', 0, posicion) + 1
+        reinicio = bisect.bisect_left(tokens, inicio_linea_edicion, key=_inicio_token) - 1
+
+        # Si la edición forma un '*/' puede cerrar un '/*' anterior que antes no
+        # cerraba (y que por eso se tokenizó como '/' y '*'): volver a empezar
+        if reinicio >= 0 and codigo_nuevo.find('*/', max(0, posicion - 1), fin_nuevo + 1) != -1:
+            # Un '/*' sin cerrar no tiene ningún '*/' que empiece después de él
+            ultimo_cierre = codigo_anterior.rfind('*/')
+            if codigo_anterior.find('/*', max(0, ultimo_cierre - 1), tokens[reinicio].inicio + 1) != -1:
+                reinicio = -1
+
+        if reinicio < 0:
+            reinicio, inicio, linea, inicio_linea = 0, 0, 1, 0
         else:
-            # Determinar el patrón para tokens no reservados
-            patron = tipo_token
-            if tipo_token == "cadenaLiteral":
-                patron = "literal_cadena"
-            elif tipo_token == "literal_caracter":
-                patron = "literal_caracter"
-                
-            # Verificar si es una palabra reservada
-            es_reservada = lexema in palabras_reservadas
-            
-            resultados.append({
-                "ID": tipo_token if not es_reservada else "reserved_" + lexema,
-                "Lexema": lexema,
-                "Línea": linea,
-                "Columna": columna,
-                "Patrón": patron,
-                "Reservada": es_reservada
-            })
-
-    # Verificar si hay caracteres no reconocidos al final del código
-    if posicion_actual < len(codigo):
-        fragmento_final = codigo[posicion_actual:]
-        if fragmento_final.strip():  # Si hay algo que no sean espacios
-            linea = calcular_linea(codigo, posicion_actual)
-            columna = calcular_columna(codigo, posicion_actual)
-            resultados.append({
-                "ID": "ERROR",
-                "Lexema": fragmento_final,
-                "Línea": linea,
-                "Columna": columna,
-                "Patrón": "Carácter no reconocido",
-                "Reservada": False
-            })
-
-    return resultados
+            token = tokens[reinicio]
+            inicio, linea, inicio_linea = token.inicio, token.linea, token.inicio - token.columna + 1
+
+        # Las líneas posteriores a la edición conservan sus columnas
+        linea_fin_edicion = linea + codigo_nuevo.count('\n', inicio, fin_nuevo)
+        resultado = tokens[:reinicio]
+        j = reinicio
+        escaneo = self._escanear(codigo_nuevo, len(codigo_nuevo), 0, linea, inicio_linea, True, inicio=inicio)
+        for token in escaneo:
+            if token.inicio >= fin_nuevo and token.linea > linea_fin_edicion:
+                # ¿Hay un token anterior en la misma posición? Entonces el resto coincide
+                inicio_anterior = token.inicio - delta
+                while j < len(tokens) and tokens[j].inicio < inicio_anterior:
+                    j += 1
+                if j < len(tokens) and tokens[j].inicio == inicio_anterior:
+                    escaneo.close()
+                    delta_lineas = token.linea - tokens[j].linea
+                    resto = tokens[j:]
+                    if (delta or delta_lineas) and not en_el_lugar:
+                        resto = [Token(t.tipo, t.lexema, t.linea + delta_lineas, t.columna, t.patron,
+                                       t.reservada, t.inicio + delta) for t in resto]
+                    elif delta or delta_lineas:
+                        for anterior in resto:
+                            anterior.inicio += delta
+                            anterior.linea += delta_lineas
+                    resultado.extend(resto)
+                    return resultado
+            resultado.append(token)
+        return resultado
+
+
+def diagnosticos_lexicos(tokens):
+    """
+    Devuelve los tokens de error como diagnósticos (línea, columna, largo, mensaje),
+    el mismo formato que AnalizadorSintactico.diagnosticos.
+    """
+    return [(token.linea, token.columna, len(token.lexema),
+             f"Error léxico en línea {token.linea}, columna {token.columna}: {token.patron} '{token.lexema}'")
+            for token in tokens if token.tipo == TIPO_ERROR]
+
+
+def _inicio_token(token):
+    return token.inicio
+
+def combinar_ediciones(primera, segunda):
+    """
+    Combina dos ediciones consecutivas (posicion, eliminados, agregados), con la
+    segunda expresada sobre el texto que dejó la primera, en una sola edición
+    sobre el texto original.
+    """
+    p, r, a = primera
+    q, r2, a2 = segunda
+    inicio = min(p, q)
+    fin_actual = max(p + a, q + r2)
+    return (inicio, fin_actual - (a - r) - inicio, fin_actual + (a2 - r2) - inicio)
+
+
+def _leer_bloques(archivo, tam_bloque):
+    while True:
+        bloque = archivo.read(tam_bloque)
+        if not bloque:
+            return
+        yield bloque
+
+
+_lexer_por_defecto = None
+
+def obtener_lexer():
+    """Devuelve la instancia compartida del Lexer (se crea en la primera llamada)."""
+    global _lexer_por_defecto
+    if _lexer_por_defecto is None:
+        _lexer_por_defecto = Lexer()
+    return _lexer_por_defecto
+
+def analizar_codigo(codigo, columnar=False):
+    """
+    Analiza `codigo` y devuelve la lista de tokens.
+    Con columnar=True devuelve un AlmacenTokens (arreglos paralelos, ver almacen_tokens).
+    """
+    if columnar:
+        from almacen_tokens import AlmacenTokens
+        return AlmacenTokens.desde_codigo(codigo)
+    return obtener_lexer().analizar(codigo)
+
+def relexar_codigo(tokens, codigo_anterior, codigo_nuevo, posicion, eliminados, agregados, en_el_lugar=True):
+    """Relexado incremental con la instancia compartida (ver Lexer.relexar)."""
+    return obtener_lexer().relexar(tokens, codigo_anterior, codigo_nuevo, posicion, eliminados, agregados,
+                                   en_el_lugar)
 
+def iter_tokens(fuente, **opciones):
+    """Versión perezosa de analizar_codigo sobre la instancia compartida (ver Lexer.iter_tokens)."""
+    return obtener_lexer().iter_tokens(fuente, **opciones)
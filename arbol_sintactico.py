@@ -0,0 +1,164 @@
+import json
+from array import array
+
+import serializacion
+
+MAGIA = b"CLXA"
+VERSION_FORMATO = 1
+
+# Tipos de nodo (el índice en esta tupla es el valor guardado en la columna `tipo`)
+TIPOS_NODO = (
+    "programa", "clase", "extiende", "implementa", "metodo", "modificador", "tipo", "parametro",
+    "bloque", "declaracion_variable", "declarador", "if", "for", "while", "return",
+    "sentencia_expresion", "vacio", "error",
+    "binaria", "unaria", "sufija", "ternaria", "llamada", "acceso", "indice", "nuevo", "nombre", "literal",
+)
+(PROGRAMA, CLASE, EXTIENDE, IMPLEMENTA, METODO, MODIFICADOR, TIPO, PARAMETRO,
+ BLOQUE, DECLARACION_VARIABLE, DECLARADOR, IF, FOR, WHILE, RETURN,
+ SENTENCIA_EXPRESION, VACIO, ERROR,
+ BINARIA, UNARIA, SUFIJA, TERNARIA, LLAMADA, ACCESO, INDICE, NUEVO, NOMBRE, LITERAL) = range(len(TIPOS_NODO))
+
+# Columnas del árbol: (nombre, typecode de array)
+COLUMNAS = (
+    ("tipo", "B"),       # Índice en TIPOS_NODO
+    ("inicio", "I"),     # Primer token del nodo (posición en la lista de tokens analizada)
+    ("fin", "I"),        # Token siguiente al último del nodo
+    ("tamano", "I"),     # Cantidad de nodos del subárbol, incluido el propio nodo
+    ("valor", "i"),      # Índice en self.textos (nombre, operador o literal) o -1
+    ("linea", "I"),
+    ("columna", "I"),
+)
+
+
+class ArbolSintactico:
+    """
+    Árbol sintáctico en arreglos paralelos, con los nodos en postorden: los
+    hijos de un nodo son los subárboles contiguos que lo preceden y la raíz
+    (el programa) es el último nodo. Cada nodo guarda su tipo, el intervalo de
+    tokens que cubre, el tamaño de su subárbol y un valor opcional (nombre de
+    clase, método o variable, operador o literal) como índice en `textos`.
+    """
+
+    def __init__(self, textos=None, columnas=None):
+        self.textos = list(textos or [])
+        columnas = columnas or {}
+        for nombre, typecode in COLUMNAS:
+            setattr(self, nombre, columnas.get(nombre, array(typecode)))
+
+    @classmethod
+    def desde_nodos(cls, nodos):
+        """
+        Construye el árbol a partir de la lista de tuplas
+        (tipo, inicio, fin, tamano, valor, linea, columna) que genera el
+        analizador sintáctico; `valor` es una cadena o None.
+        """
+        if not nodos:
+            return cls()
+        tipos, inicios, fines, tamanos, valores, lineas, columnas = zip(*nodos)
+        indice = {}
+        valores = [-1 if valor is None else indice.setdefault(valor, len(indice)) for valor in valores]
+        datos = (tipos, inicios, fines, tamanos, valores, lineas, columnas)
+        return cls(list(indice), {nombre: array(typecode, columna)
+                                  for (nombre, typecode), columna in zip(COLUMNAS, datos)})
+
+    # --- Navegación ---
+    def __len__(self):
+        return len(self.tipo)
+
+    @property
+    def raiz(self):
+        return len(self) - 1
+
+    def hijos(self, i):
+        """Índices de los hijos del nodo `i`, en el orden del código."""
+        hijos = []
+        primero = i - self.tamano[i] + 1
+        j = i - 1
+        while j >= primero:
+            hijos.append(j)
+            j -= self.tamano[j]
+        hijos.reverse()
+        return hijos
+
+    def tipo_nodo(self, i):
+        return TIPOS_NODO[self.tipo[i]]
+
+    def valor_nodo(self, i):
+        valor = self.valor[i]
+        return self.textos[valor] if valor >= 0 else None
+
+    def nodo(self, i):
+        """Devuelve el nodo `i` (sin hijos) como dict."""
+        return {"tipo": TIPOS_NODO[self.tipo[i]], "valor": self.valor_nodo(i),
+                "inicio": self.inicio[i], "fin": self.fin[i],
+                "linea": self.linea[i], "columna": self.columna[i]}
+
+    def buscar(self, tipo):
+        """Índices de todos los nodos de un tipo (p. ej. METODO), en postorden."""
+        return [i for i, t in enumerate(self.tipo) if t == tipo]
+
+    def a_dict(self):
+        """
+        Devuelve el árbol como dicts anidados con la clave "hijos".
+        Se arma sin recursión recorriendo el postorden con una pila.
+        """
+        pila = []  # (primer nodo del subárbol, dict)
+        for i in range(len(self)):
+            primero = i - self.tamano[i] + 1
+            hijos = []
+            while pila and pila[-1][0] >= primero:
+                hijos.append(pila.pop()[1])
+            hijos.reverse()
+            nodo = self.nodo(i)
+            nodo["hijos"] = hijos
+            pila.append((primero, nodo))
+        return pila[-1][1] if pila else None
+
+    # --- Serialización ---
+    def a_json(self):
+        """
+        Serializa el árbol como JSON plano: textos y una lista por columna.
+        No tiene anidamiento, así que no depende de la profundidad del árbol.
+        """
+        datos = {"version": VERSION_FORMATO, "tipos_nodo": TIPOS_NODO, "textos": self.textos}
+        for nombre, _ in COLUMNAS:
+            datos[nombre] = getattr(self, nombre).tolist()
+        return json.dumps(datos, ensure_ascii=False)
+
+    @classmethod
+    def desde_json(cls, texto):
+        datos = json.loads(texto)
+        if datos.get("version") != VERSION_FORMATO or tuple(datos["tipos_nodo"]) != TIPOS_NODO:
+            raise ValueError("Formato de árbol no compatible")
+        return cls(datos["textos"], {nombre: array(typecode, datos[nombre]) for nombre, typecode in COLUMNAS})
+
+    def a_bytes(self):
+        """
+        Serializa el árbol en binario: cabecera JSON (textos y ubicación de
+        las columnas) seguida de las columnas alineadas a 8 bytes.
+        """
+        return b"".join(self._partes())
+
+    def _partes(self):
+        columnas = [(nombre, typecode, len(getattr(self, nombre)), getattr(self, nombre))
+                    for nombre, typecode in COLUMNAS]
+        return serializacion.partes(MAGIA, VERSION_FORMATO, {"textos": self.textos}, columnas)
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        """
+        Reconstruye un árbol serializado con a_bytes(). Si `datos` es un buffer
+        (bytes, mmap), las columnas son vistas sobre él y no se copian.
+        """
+        cabecera, columnas, _ = serializacion.leer(datos, MAGIA, VERSION_FORMATO, "un árbol sintáctico")
+        return cls(cabecera["textos"], columnas)
+
+    def guardar(self, ruta):
+        with open(ruta, "wb") as archivo:
+            for parte in self._partes():
+                archivo.write(parte)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Abre un árbol guardado con guardar(); las columnas se leen del archivo mapeado."""
+        return serializacion.cargar(ruta, cls.desde_bytes)
@@ -0,0 +1,502 @@
+"""
+Benchmarks del analizador.
+
+Uso:
+    python benchmark.py            # ejecuta todos
+    python benchmark.py lexer      # ejecuta solo los indicados
+"""
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+from analizador import TOKENS_IGNORADOS, Lexer, TablaSimbolos, analizar_codigo, obtener_lexer, relexar_codigo
+
+CODIGO_PEQUENO = """public class Hola {
+    public static void main(String[] args) {
+        int x = 10;
+        if (x > 5) { x = x + 1; }
+        return;
+    }
+}
+"""
+
+
+def medir(funcion, repeticiones=5, numero=200):
+    """Devuelve el mejor tiempo por llamada (en segundos)."""
+    return min(timeit.repeat(funcion, repeat=repeticiones, number=numero)) / numero
+
+
+def bench_lexer():
+    # Preparación por llamada (comportamiento anterior) vs instancia compartida
+    analizar_codigo(CODIGO_PEQUENO)  # Calentar la instancia por defecto
+    por_llamada = medir(lambda: Lexer().analizar(CODIGO_PEQUENO))
+    compartido = medir(lambda: analizar_codigo(CODIGO_PEQUENO))
+    print("lexer: entrada pequeña")
+    print(f"  Lexer nuevo por llamada: {por_llamada * 1e6:9.1f} us")
+    print(f"  Lexer compartido:        {compartido * 1e6:9.1f} us")
+    print(f"  Ahorro por llamada:      {(por_llamada - compartido) * 1e6:9.1f} us "
+          f"({por_llamada / compartido:.1f}x)")
+
+
+def tabla_extendida(extra):
+    """Tabla base más `extra` palabras clave de usuario."""
+    tabla = TablaSimbolos(obtener_lexer().tabla.entradas)
+    for i in range(extra):
+        tabla.agregar({"id": "palabraUsuario", "lexema": f"clave_{i}",
+                       "palabraReservada": True, "nombre": f"clave_{i}"})
+    return tabla
+
+
+def bench_tabla():
+    codigo = CODIGO_PEQUENO * 20
+    lexemas = [token["Lexema"] for token in analizar_codigo(codigo)]
+    print(f"tabla de símbolos: {len(lexemas)} tokens por pasada")
+    print(f"  {'entradas':>9} {'lineal':>12} {'indexada':>12} {'lexer':>12}")
+    for extra in (0, 1000, 5000, 20000):
+        tabla = tabla_extendida(extra)
+        entradas = tabla.entradas
+        # Recorrido lineal (implementación anterior)
+        lineal = medir(lambda: [next((e for e in entradas if e["lexema"] == lexema), None)
+                                for lexema in lexemas], numero=1, repeticiones=3)
+        indexada = medir(lambda: [tabla.buscar(lexema) for lexema in lexemas], numero=20)
+        lexer = Lexer(tabla=tabla)
+        completo = medir(lambda: lexer.analizar(codigo), numero=5)
+        print(f"  {len(tabla):>9} {lineal * 1e3:>10.2f}ms {indexada * 1e3:>10.3f}ms {completo * 1e3:>10.2f}ms")
+
+
+def generar_java(lineas):
+    """Genera un archivo Java sintético de aproximadamente `lineas` líneas."""
+    cuerpo = [
+        "        int x = 10;",
+        "        /* comentario */ x = x + 1;",
+        "        if (x > 5) { x = x * 2; }",
+        "        String s = \"cadena\"; // comentario de línea",
+    ]
+    partes = ["public class Generado {", "    public static void main(String[] args) {"]
+    partes.extend(cuerpo[i % len(cuerpo)] for i in range(max(0, lineas - 4)))
+    partes.extend(["    }", "}"])
+    return "\n".join(partes) + "\n"
+
+
+def bench_lineas():
+    print("posiciones: tiempo por línea de 1k a 100k líneas")
+    tiempos = {}
+    for lineas in (1000, 10000, 100000):
+        codigo = generar_java(lineas)
+        tiempos[lineas] = medir(lambda: analizar_codigo(codigo), repeticiones=3, numero=1) / lineas
+        print(f"  {lineas:>7} líneas: {tiempos[lineas] * 1e6:8.2f} us/línea")
+    # Crecimiento lineal: el costo por línea no debe crecer con el tamaño
+    razon = tiempos[100000] / tiempos[1000]
+    lineal = razon < 2.0
+    print(f"  razón 100k/1k por línea: {razon:.2f} -> {'OK (lineal)' if lineal else 'FALLO (no lineal)'}")
+    return lineal
+
+
+def bench_lote(archivos=400, lineas=300):
+    print(f"lote: {archivos} archivos de {lineas} líneas")
+    with tempfile.TemporaryDirectory() as carpeta:
+        codigo = generar_java(lineas)
+        for i in range(archivos):
+            with open(os.path.join(carpeta, f"Archivo{i}.java"), "w", encoding="utf-8") as archivo:
+                archivo.write(codigo)
+
+        from lote import analizar_lote
+        nucleos = os.cpu_count() or 1
+        procesos = sorted({1, 2, 4, 8, nucleos} & set(range(1, nucleos + 1)))
+        base = None
+        for cantidad in procesos:
+            inicio = time.perf_counter()
+            analizar_lote([carpeta], procesos=cantidad)
+            por_segundo = archivos / (time.perf_counter() - inicio)
+            base = base or por_segundo
+            print(f"  {cantidad:>3} procesos: {por_segundo:8.1f} archivos/s ({por_segundo / base:.2f}x)")
+
+
+def bench_cache(archivos=400, lineas=300):
+    from lote import analizar_lote
+    print(f"caché de resultados: {archivos} archivos de {lineas} líneas")
+    with tempfile.TemporaryDirectory() as carpeta:
+        fuentes = os.path.join(carpeta, "fuentes")
+        os.mkdir(fuentes)
+        for i in range(archivos):
+            with open(os.path.join(fuentes, f"Archivo{i}.java"), "w", encoding="utf-8") as archivo:
+                archivo.write(generar_java(lineas) + f"// {i}\n")
+        ruta_cache = os.path.join(carpeta, "cache.sqlite")
+
+        tiempos = {}
+        for nombre, opciones in (("sin caché", {}), ("caché fría", {"ruta_cache": ruta_cache}),
+                                 ("caché caliente", {"ruta_cache": ruta_cache})):
+            inicio = time.perf_counter()
+            resumen = analizar_lote([fuentes], procesos=1, **opciones)
+            tiempos[nombre] = time.perf_counter() - inicio
+            print(f"  {nombre:<15} {tiempos[nombre] * 1e3:9.1f} ms ({archivos / tiempos[nombre]:8.1f} archivos/s)")
+            if nombre == "sin caché":
+                esperado = resumen
+        # Solo lectura y hash de los archivos, la cota inferior de una pasada caliente
+        inicio = time.perf_counter()
+        for ruta in sorted(os.listdir(fuentes)):
+            with open(os.path.join(fuentes, ruta), "rb") as archivo:
+                hashlib.sha256(archivo.read()).digest()
+        lectura = time.perf_counter() - inicio
+        print(f"  {'solo lectura':<15} {lectura * 1e3:9.1f} ms")
+        print(f"  aceleración caliente: {tiempos['sin caché'] / tiempos['caché caliente']:.1f}x")
+        return resumen == esperado
+
+
+def _memoria_pico(codigo_python):
+    """
+    Ejecuta `codigo_python` en un intérprete nuevo y devuelve (segundos, pico de memoria en MB).
+    En Linux el pico se lee de VmHWM: ru_maxrss del hijo arrastra el pico del
+    proceso que lo lanzó (el benchmark, que ya puede ocupar bastante).
+    """
+    script = ("import resource, sys, time\n"
+              f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+              "inicio = time.perf_counter()\n"
+              f"{codigo_python}\n"
+              "segundos = time.perf_counter() - inicio\n"
+              "pico_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+              "try:\n"
+              "    with open('/proc/self/status') as estado:\n"
+              "        pico_kb = next(int(l.split()[1]) for l in estado if l.startswith('VmHWM:'))\n"
+              "except OSError:\n"
+              "    pass\n"
+              "print(segundos, pico_kb)")
+    salida = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    segundos, pico_kb = salida.split()
+    return float(segundos), int(pico_kb) / 1024
+
+
+def bench_mapeo(lineas=200000):
+    print(f"archivo grande: {lineas} líneas, pico de memoria del proceso")
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "Grande.java")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.write(generar_java(lineas))
+        print(f"  tamaño: {os.path.getsize(ruta) / 2 ** 20:.1f} MB")
+        leer_texto = f"codigo = open({ruta!r}, encoding='utf-8').read()\n"
+        casos = {
+            "léxico, texto": ("from analizador import analizar_codigo\n" + leer_texto
+                              + "tokens = analizar_codigo(codigo)"),
+            "léxico, mapeado": ("from almacen_tokens import AlmacenTokens\n"
+                                f"almacen = AlmacenTokens.desde_archivo({ruta!r})"),
+            "completo, texto": ("from analizador import analizar_codigo\n"
+                                "from sintactico import AnalizadorSintactico\n" + leer_texto
+                                + "AnalizadorSintactico(analizar_codigo(codigo)).analizar()"),
+            "completo, mapeado": ("from lote import analizar_mapeado\n"
+                                  f"analizar_mapeado({ruta!r})"),
+        }
+        for nombre, codigo_python in casos.items():
+            segundos, pico = _memoria_pico(codigo_python)
+            print(f"  {nombre:<18} {segundos:7.2f} s {pico:9.1f} MB")
+
+
+def aplicacion_qt():
+    """QApplication sin ventanas visibles, para los benchmarks de la interfaz."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def bench_arranque():
+    # También sirve de prueba de humo: crear la ventana ejercita todos los widgets
+    app = aplicacion_qt()
+    from interfaz import AnalizadorLexicoUI
+    print("arranque de la interfaz")
+    inicio = time.perf_counter()
+    ventana = AnalizadorLexicoUI()
+    ventana.show()
+    app.processEvents()
+    print(f"  crear y mostrar la ventana {(time.perf_counter() - inicio) * 1e3:9.2f} ms")
+    inicio = time.perf_counter()
+    ventana.texto_codigo.setPlainText(CODIGO_PEQUENO)
+    app.processEvents()
+    print(f"  cargar un archivo pequeño  {(time.perf_counter() - inicio) * 1e3:9.2f} ms")
+    ventana.close()
+
+
+def bench_resaltado(lineas=100000):
+    app = aplicacion_qt()
+    from PySide6.QtGui import QTextCursor
+    from editor import CodeEditor
+    print(f"resaltado de sintaxis: {lineas} líneas")
+    editor = CodeEditor()
+    editor.resize(800, 600)
+    editor.show()
+    resaltador = editor.resaltador
+    llamadas = {"bloques": 0, "formateados": 0}
+    recorrer = resaltador.recorrer
+
+    def contar(text, dentroComentario, formatear):
+        llamadas["bloques"] += 1
+        llamadas["formateados"] += formatear
+        return recorrer(text, dentroComentario, formatear)
+    resaltador.recorrer = contar
+
+    def medir_paso(nombre, accion):
+        llamadas.update(bloques=0, formateados=0)
+        inicio = time.perf_counter()
+        accion()
+        app.processEvents()
+        tiempo = time.perf_counter() - inicio
+        print(f"  {nombre:<28} {tiempo * 1e3:9.2f} ms {llamadas['bloques']:>8} bloques "
+              f"{llamadas['formateados']:>6} formateados")
+
+    medir_paso("cargar texto", lambda: editor.setPlainText(generar_java(lineas)))
+
+    def escribir():
+        cursor = QTextCursor(editor.document().findBlockByNumber(lineas // 2))
+        editor.setTextCursor(cursor)
+        editor.centerCursor()
+        app.processEvents()
+        llamadas.update(bloques=0, formateados=0)
+        cursor.insertText("y")
+    medir_paso("escribir una letra", escribir)
+    medir_paso("abrir un comentario", lambda: editor.textCursor().insertText("/*"))
+    medir_paso("cerrarlo", lambda: editor.textCursor().insertText("*/"))
+
+    barra = editor.verticalScrollBar()
+
+    def desplazar():
+        for _ in range(100):
+            barra.setValue(barra.value() + barra.pageStep())
+            app.processEvents()
+    medir_paso("100 páginas de scroll", desplazar)
+    editor.close()
+
+
+def bench_margen(lineas=100000, cuadros=300):
+    app = aplicacion_qt()
+    from editor import CodeEditor
+    print(f"scroll con números de línea: {lineas} líneas, {cuadros} cuadros")
+    editor = CodeEditor()
+    editor.resize(800, 600)
+    editor.show()
+    editor.setPlainText(generar_java(lineas))
+    app.processEvents()
+    barra = editor.verticalScrollBar()
+    barra.setValue(barra.maximum() // 2)
+    app.processEvents()
+
+    for nombre, paso in (("de a una línea", 1), ("de a una página", barra.pageStep())):
+        tiempos = []
+        for _ in range(cuadros):
+            inicio = time.perf_counter()
+            barra.setValue(barra.value() + paso)
+            # Pinta el cuadro ya, en vez de esperar al próximo ciclo de eventos
+            editor.viewport().repaint()
+            editor.lineNumberArea.repaint()
+            app.processEvents()
+            tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        print(f"  {nombre:<16} media {sum(tiempos) / cuadros * 1e3:7.3f} ms "
+              f"p50 {tiempos[cuadros // 2] * 1e3:7.3f} ms p95 {tiempos[cuadros * 95 // 100] * 1e3:7.3f} ms "
+              f"máx {tiempos[-1] * 1e3:7.3f} ms por cuadro")
+    editor.close()
+
+
+def bench_informe(tamanos=(5000, 50000)):
+    print("informe PDF: tiempo y pico de memoria del proceso")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for lineas in tamanos:
+            ruta = os.path.join(carpeta, f"Informe{lineas}.java")
+            with open(ruta, "w", encoding="utf-8") as archivo:
+                archivo.write(generar_java(lineas))
+            codigo_python = ("from informe_pdf import aplicacion_sin_ventanas, exportar_pdf\n"
+                             "from analizador import analizar_codigo\n"
+                             "aplicacion_sin_ventanas()\n"
+                             f"codigo = open({ruta!r}, encoding='utf-8').read()\n"
+                             f"paginas = exportar_pdf({ruta + '.pdf'!r}, codigo, analizar_codigo(codigo))")
+            segundos, pico = _memoria_pico(codigo_python)
+            print(f"  {lineas:>7} líneas {segundos:7.2f} s {pico:9.1f} MB "
+                  f"{os.path.getsize(ruta + '.pdf') / 2 ** 20:7.1f} MB de PDF")
+
+
+def bench_exportar(lineas=50000):
+    from exportadores import ESCRITORES, ResultadosColumnares, exportar_resultados
+    print(f"exportación de resultados: {lineas} líneas")
+    tokens = analizar_codigo(generar_java(lineas))
+    print(f"  tokens: {len(tokens)}")
+    with tempfile.TemporaryDirectory() as carpeta:
+        for formato, escritor in ESCRITORES.items():
+            ruta = os.path.join(carpeta, "resultados." + escritor.extension)
+            inicio = time.perf_counter()
+            exportar_resultados(ruta, tokens)
+            tiempo = time.perf_counter() - inicio
+            print(f"  {formato:<10} {tiempo * 1e3:9.1f} ms {len(tokens) / tiempo / 1e6:6.2f} M tokens/s "
+                  f"{os.path.getsize(ruta) / 2 ** 20:7.1f} MB")
+        ruta = os.path.join(carpeta, "resultados.clxc")
+        inicio = time.perf_counter()
+        resultados = ResultadosColumnares.cargar(ruta)
+        lineas_con_tokens = len(set(resultados.linea))
+        print(f"  leer columnar y contar líneas con tokens ({lineas_con_tokens}): "
+              f"{(time.perf_counter() - inicio) * 1e3:.1f} ms")
+
+        # Flujo de tokens a columnar: el pico no debería crecer con la cantidad de tokens
+        print("  columnar desde iter_tokens, pico de memoria del proceso:")
+        for cantidad in (lineas, 4 * lineas):
+            fuente = os.path.join(carpeta, f"Flujo{cantidad}.java")
+            with open(fuente, "w", encoding="utf-8") as archivo:
+                archivo.write(generar_java(cantidad))
+            codigo_python = ("from analizador import iter_tokens\n"
+                             "from exportadores import exportar_resultados\n"
+                             f"with open({fuente!r}, encoding='utf-8') as archivo:\n"
+                             f"    exportar_resultados({ruta!r}, iter_tokens(archivo))")
+            segundos, pico = _memoria_pico(codigo_python)
+            print(f"    {cantidad:>7} líneas {segundos:7.2f} s {pico:9.1f} MB")
+
+
+def bench_truncados(lineas=200):
+    """Comprobación: un archivo binario truncado o ajeno se rechaza con ValueError al cargarlo."""
+    from almacen_tokens import AlmacenTokens
+    from exportadores import ResultadosColumnares, exportar_resultados
+    from sintactico import AnalizadorSintactico
+    print("archivos binarios truncados")
+    codigo = generar_java(lineas)
+    tokens = analizar_codigo(codigo)
+    analizador = AnalizadorSintactico(tokens)
+    analizador.analizar()
+    correcto = True
+    with tempfile.TemporaryDirectory() as carpeta:
+        guardados = {
+            AlmacenTokens: AlmacenTokens.desde_codigo(codigo).guardar,
+            type(analizador.arbol): analizador.arbol.guardar,
+            ResultadosColumnares: lambda ruta: exportar_resultados(ruta, tokens, formato="columnar"),
+        }
+        for clase, guardar in guardados.items():
+            ruta = os.path.join(carpeta, clase.__name__ + ".bin")
+            guardar(ruta)
+            with open(ruta, "rb") as archivo:
+                datos = archivo.read()
+            clase.cargar(ruta)  # Completo: debe cargar
+            casos = {"sin el último byte": datos[:-1], "a la mitad": datos[:len(datos) // 2],
+                     "solo la cabecera": datos[:16], "ajeno": b"no es un archivo de compLex"}
+            for nombre, contenido in casos.items():
+                with open(ruta, "wb") as archivo:
+                    archivo.write(contenido)
+                try:
+                    clase.cargar(ruta)
+                    resultado = "FALLO (se cargó)"
+                except ValueError:
+                    resultado = "OK (ValueError)"
+                except Exception as e:
+                    resultado = f"FALLO ({type(e).__name__}: {e})"
+                correcto = correcto and resultado.startswith("OK")
+                print(f"  {clase.__name__:<21} {nombre:<19} {resultado}")
+    return correcto
+
+
+def bench_diagnosticos(lineas=100000, repintados=50):
+    app = aplicacion_qt()
+    from editor import CodeEditor
+    print(f"repintado con diagnósticos: {lineas} líneas, {repintados} repintados")
+    editor = CodeEditor()
+    editor.resize(800, 600)
+    editor.show()
+    editor.setPlainText(generar_java(lineas))
+    editor.verticalScrollBar().setValue(editor.verticalScrollBar().maximum() // 2)
+    app.processEvents()
+
+    for cantidad in (0, 1000, 100000):
+        # Un diagnóstico en cada línea hasta `cantidad`, repartidos en todo el archivo
+        paso = max(1, lineas // cantidad) if cantidad else 1
+        editor.establecerDiagnosticos(
+            [(linea, 5, 3, "diagnóstico de prueba") for linea in range(1, lineas + 1, paso)][:cantidad])
+        inicio = time.perf_counter()
+        for _ in range(repintados):
+            editor.viewport().repaint()
+            editor.lineNumberArea.repaint()
+        tiempo = (time.perf_counter() - inicio) / repintados
+        print(f"  {cantidad:>7} diagnósticos {tiempo * 1e3:9.3f} ms por repintado")
+    editor.close()
+
+
+def bench_incremental(lineas=20000):
+    print(f"relexado por pulsación en {lineas} líneas")
+    codigo = generar_java(lineas)
+    posicion = codigo.index("x = x + 1", len(codigo) // 2)
+    con_tecla = codigo[:posicion] + "y" + codigo[posicion:]
+    tokens = analizar_codigo(codigo)
+
+    def escribir_y_borrar():
+        # Insertar una letra y borrarla, para volver siempre al mismo estado
+        nonlocal tokens
+        tokens = relexar_codigo(tokens, codigo, con_tecla, posicion, 0, 1)
+        tokens = relexar_codigo(tokens, con_tecla, codigo, posicion, 1, 0)
+
+    incremental = medir(escribir_y_borrar, repeticiones=3, numero=20) / 2
+    completo = medir(lambda: analizar_codigo(con_tecla), repeticiones=3, numero=1)
+    assert tokens == analizar_codigo(codigo)
+    print(f"  completo:    {completo * 1e3:9.2f} ms")
+    print(f"  incremental: {incremental * 1e3:9.2f} ms ({completo / incremental:.0f}x)")
+
+
+def programa_con_sentencias(sentencias):
+    return ("public class Expresiones {\n    public static void main(String[] args) {\n"
+            + sentencias + "\n    }\n}\n")
+
+
+def bench_expresiones(operandos=50000, profundidad=5000):
+    from sintactico import AnalizadorSintactico
+    operadores = ["+", "*", "-", "/", "%", "&", "|", "&&", "||", "<", "^"]
+    cadena = " ".join(f"a{i} {operadores[i % len(operadores)]}" for i in range(operandos)) + " b"
+    casos = {
+        f"cadena de {operandos} operandos": f"x = {cadena};",
+        f"{profundidad} paréntesis anidados": "x = " + "(" * profundidad + "y" + ")" * profundidad + ";",
+        f"{profundidad} llamadas anidadas": "x = " + "f(" * profundidad + "y" + ")" * profundidad + ";",
+        f"{profundidad} índices anidados": "x = " + "a[" * profundidad + "0" + "]" * profundidad + ";",
+        f"{profundidad} prefijos": "x = " + "-" * profundidad + "y;",
+        f"{profundidad} asignaciones encadenadas": "x" + " = x" * profundidad + ";",
+        # Sentencias anidadas (también sin recursión, ver AnalizadorSintactico.declaracion)
+        f"{profundidad} bloques anidados": "{" * profundidad + "x = 1;" + "}" * profundidad,
+        f"{profundidad} if/else anidados": "if (x > 0) { " * profundidad + "x = 1;" + " } else { x = 2; }" * profundidad,
+        f"{profundidad} while/for anidados": "while (x > 0) for (;;) " * (profundidad // 2) + "x = 1;",
+    }
+    print("expresiones y sentencias anidadas: análisis sintáctico")
+    correcto = True
+    for nombre, sentencia in casos.items():
+        tokens = [token for token in analizar_codigo(programa_con_sentencias(sentencia))
+                  if token.id not in TOKENS_IGNORADOS]
+        errores = []
+        tiempo = medir(lambda: errores.extend(AnalizadorSintactico(tokens).analizar()),
+                       repeticiones=3, numero=1)
+        correcto = correcto and not errores
+        print(f"  {nombre:<34} {len(tokens):>7} tokens {tiempo * 1e3:9.2f} ms "
+              f"({len(tokens) / tiempo / 1e6:.2f} Mtokens/s){'  ERRORES' if errores else ''}")
+    return correcto
+
+
+def bench_sintactico(lineas=20000):
+    from sintactico import AnalizadorSintactico
+    tokens = [token for token in analizar_codigo(generar_java(lineas)) if token.id not in TOKENS_IGNORADOS]
+    tiempo = medir(lambda: AnalizadorSintactico(tokens).analizar(), repeticiones=3, numero=1)
+    print(f"sintáctico: {lineas} líneas, {len(tokens)} tokens")
+    print(f"  {tiempo * 1e3:9.2f} ms ({len(tokens) / tiempo / 1e6:.2f} Mtokens/s)")
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "tabla": bench_tabla,
+    "lineas": bench_lineas,
+    "lote": bench_lote,
+    "cache": bench_cache,
+    "mapeo": bench_mapeo,
+    "arranque": bench_arranque,
+    "resaltado": bench_resaltado,
+    "diagnosticos": bench_diagnosticos,
+    "margen": bench_margen,
+    "informe": bench_informe,
+    "exportar": bench_exportar,
+    "truncados": bench_truncados,
+    "incremental": bench_incremental,
+    "expresiones": bench_expresiones,
+    "sintactico": bench_sintactico,
+}
+
+if __name__ == "__main__":
+    nombres = sys.argv[1:] or list(BENCHMARKS)
+    fallos = [nombre for nombre in nombres if BENCHMARKS[nombre]() is False]
+    sys.exit(1 if fallos else 0)
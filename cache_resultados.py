@@ -0,0 +1,275 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import analizador
+import sintactico
+from almacen_tokens import AlmacenTokens
+
+# Incrementar cuando cambie el resultado del léxico o del sintáctico sin que
+# cambie el código de sus módulos (p. ej. por una dependencia)
+VERSION_ANALIZADOR = 1
+
+MAX_BYTES = 256 * 1024 * 1024
+# Al superar MAX_BYTES se desalojan entradas hasta quedar en esta fracción
+FRACCION_DESALOJO = 0.9
+# Las fechas de uso de los aciertos se escriben en grupos de este tamaño; una
+# escritura por acierto dominaría el tiempo de una pasada con la caché caliente
+LOTE_USOS = 256
+ESPERA_BLOQUEO = 30.0  # Segundos que una conexión espera a que otra libere la base
+
+# Límites de CacheMemoria
+MAX_ENTRADAS_MEMORIA = 16
+MAX_TOKENS_MEMORIA = 2_000_000
+
+# Se ejecuta en una sola transacción para que dos procesos que abren una base
+# nueva a la vez no creen dos filas en `total`
+ESQUEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS resultados (
+    clave BLOB PRIMARY KEY,
+    tokens BLOB NOT NULL,
+    resumen TEXT NOT NULL,
+    tamano INTEGER NOT NULL,
+    uso REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resultados_uso ON resultados (uso);
+CREATE TABLE IF NOT EXISTS total (bytes INTEGER NOT NULL);
+INSERT INTO total SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM total);
+CREATE TRIGGER IF NOT EXISTS total_insertar AFTER INSERT ON resultados
+    BEGIN UPDATE total SET bytes = bytes + NEW.tamano; END;
+CREATE TRIGGER IF NOT EXISTS total_borrar AFTER DELETE ON resultados
+    BEGIN UPDATE total SET bytes = bytes - OLD.tamano; END;
+COMMIT;
+"""
+
+_huellas = {}
+
+
+def huella_analizador(ruta_tabla=analizador.RUTA_TABLA):
+    """
+    Resume en un hash todo lo que determina el resultado del análisis: la tabla
+    de símbolos, el código de los módulos léxico y sintáctico y VERSION_ANALIZADOR.
+    Se calcula una vez por proceso y tabla.
+    """
+    huella = _huellas.get(ruta_tabla)
+    if huella is None:
+        h = hashlib.sha256(f"v{VERSION_ANALIZADOR}\0".encode())
+        for ruta in (ruta_tabla, analizador.__file__, sintactico.__file__):
+            with open(ruta, "rb") as archivo:
+                h.update(hashlib.sha256(archivo.read()).digest())
+        huella = _huellas[ruta_tabla] = h.digest()
+    return huella
+
+
+class CacheResultados:
+    """
+    Caché persistente de resultados de análisis en una base SQLite.
+    Cada entrada guarda el flujo de tokens (un AlmacenTokens sin el código
+    fuente, comprimido) y un resumen en JSON con el conteo por ID y la lista
+    de errores sintácticos; quien solo necesita el resumen no lee los tokens.
+    La clave combina el
+    hash del contenido del archivo con huella_analizador(), así que un cambio
+    en la tabla de símbolos o en el analizador invalida todo sin borrar nada.
+    Varias conexiones (de varios procesos) pueden usar la misma base: SQLite
+    serializa las escrituras y el modo WAL permite leer mientras tanto.
+    El tamaño total se limita a `max_bytes` desalojando las entradas usadas
+    hace más tiempo.
+    """
+
+    def __init__(self, ruta, max_bytes=MAX_BYTES, ruta_tabla=analizador.RUTA_TABLA):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.huella = huella_analizador(ruta_tabla)
+        self.aciertos = 0
+        self.fallos = 0
+        self._usos = []
+        carpeta = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(carpeta, exist_ok=True)
+        # isolation_level=None: las transacciones se abren a mano con BEGIN IMMEDIATE
+        self.conexion = sqlite3.connect(ruta, timeout=ESPERA_BLOQUEO, isolation_level=None)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(ESQUEMA)
+
+    @contextmanager
+    def _transaccion(self):
+        # BEGIN IMMEDIATE toma el bloqueo de escritura al empezar y no a mitad
+        # de la transacción, donde dos procesos podrían bloquearse mutuamente
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conexion.execute("ROLLBACK")
+            raise
+        self.conexion.execute("COMMIT")
+
+    def clave(self, contenido, max_errores=sintactico.MAX_ERRORES):
+        """
+        Clave de caché para el contenido (bytes) de un archivo. `max_errores`
+        forma parte de la clave porque limita la lista de errores guardada.
+        """
+        h = hashlib.sha256(self.huella)
+        h.update(max_errores.to_bytes(4, "little", signed=True))
+        h.update(contenido)
+        return h.digest()
+
+    def obtener(self, clave, codigo=None):
+        """
+        Busca un resultado en la caché.
+        Args:
+            clave (bytes): Clave calculada con clave().
+            codigo (str): Texto del archivo, del que se cortan los lexemas. Si
+                          es None no se leen los tokens.
+        Devuelve None si no está, o un dict {"por_tipo", "errores", "tokens"}
+        donde "tokens" es un AlmacenTokens (o None si no se pasó `codigo`).
+        """
+        columnas = "resumen, tokens" if codigo is not None else "resumen"
+        fila = self.conexion.execute(
+            f"SELECT {columnas} FROM resultados WHERE clave = ?", (clave,)).fetchone()
+        if fila is None:
+            self.fallos += 1
+            return None
+        self.aciertos += 1
+        self._usos.append((time.time(), clave))
+        if len(self._usos) >= LOTE_USOS:
+            self.registrar_usos()
+        resultado = json.loads(fila[0])
+        resultado["tokens"] = None
+        if codigo is not None:
+            resultado["tokens"] = AlmacenTokens.desde_bytes(zlib.decompress(fila[1]), codigo)
+        return resultado
+
+    def registrar_usos(self):
+        """Escribe las fechas de uso pendientes, que ordenan el desalojo."""
+        if self._usos:
+            with self._transaccion():
+                self.conexion.executemany("UPDATE resultados SET uso = ? WHERE clave = ?", self._usos)
+            self._usos.clear()
+
+    def guardar(self, clave, almacen, errores):
+        """Guarda el resultado de un análisis y desaloja entradas si se supera max_bytes."""
+        tokens = zlib.compress(almacen.a_bytes(incluir_codigo=False), 1)
+        resumen = json.dumps({"por_tipo": almacen.contar_por_tipo(), "errores": errores}, ensure_ascii=False)
+        tamano = len(clave) + len(tokens) + len(resumen.encode("utf-8"))
+        with self._transaccion():
+            if self._usos:
+                self.conexion.executemany("UPDATE resultados SET uso = ? WHERE clave = ?", self._usos)
+                self._usos.clear()
+            self.conexion.execute(
+                "INSERT OR REPLACE INTO resultados (clave, tokens, resumen, tamano, uso) VALUES (?, ?, ?, ?, ?)",
+                (clave, tokens, resumen, tamano, time.time()))
+            total = self.conexion.execute("SELECT bytes FROM total").fetchone()[0]
+            if total > self.max_bytes:
+                self._desalojar(total - int(self.max_bytes * FRACCION_DESALOJO))
+
+    def _desalojar(self, liberar):
+        """Borra las entradas usadas hace más tiempo hasta liberar `liberar` bytes."""
+        claves = []
+        for clave, tamano in self.conexion.execute("SELECT clave, tamano FROM resultados ORDER BY uso"):
+            if liberar <= 0:
+                break
+            claves.append((clave,))
+            liberar -= tamano
+        self.conexion.executemany("DELETE FROM resultados WHERE clave = ?", claves)
+
+    def estadisticas(self):
+        entradas, = self.conexion.execute("SELECT COUNT(*) FROM resultados").fetchone()
+        total, = self.conexion.execute("SELECT bytes FROM total").fetchone()
+        return {"aciertos": self.aciertos, "fallos": self.fallos, "entradas": entradas, "bytes": total}
+
+    def vaciar(self):
+        with self._transaccion():
+            self.conexion.execute("DELETE FROM resultados")
+
+    def cerrar(self):
+        self.registrar_usos()
+        self.conexion.close()
+
+
+_caches = {}
+
+
+def obtener_cache(ruta, max_bytes=MAX_BYTES):
+    """Devuelve la caché de `ruta` del proceso actual (se abre en la primera llamada)."""
+    cache = _caches.get(ruta)
+    if cache is None:
+        cache = _caches[ruta] = CacheResultados(ruta, max_bytes)
+    return cache
+
+
+def huella_texto(codigo):
+    """Identifica el contenido de un búfer: largo y hash del texto."""
+    return len(codigo), hashlib.blake2b(codigo.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+class CacheMemoria:
+    """
+    Caché LRU en memoria de los resultados de análisis de la sesión, indexada
+    por huella_texto(). Cada entrada es un dict {"tokens", "errores",
+    "diagnosticos"}, donde "errores" y "diagnosticos" (los de
+    AnalizadorSintactico) son None mientras solo se hizo el análisis léxico. Las listas se
+    comparten con quien las pidió, así que no deben modificarse (p. ej. con
+    relexar(..., en_el_lugar=True)).
+    Se limita por cantidad de entradas y por total de tokens guardados, y se
+    puede usar desde varios hilos.
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS_MEMORIA, max_tokens=MAX_TOKENS_MEMORIA):
+        self.max_entradas = max_entradas
+        self.max_tokens = max_tokens
+        self.entradas = OrderedDict()
+        self.total_tokens = 0
+        self.aciertos = 0
+        self.parciales = 0  # Había tokens pero faltaba el análisis sintáctico
+        self.fallos = 0
+        self._candado = threading.Lock()
+
+    def obtener(self, huella, sintactico=False):
+        """
+        Devuelve la entrada de `huella` o None. Con `sintactico`, una entrada
+        que solo tiene tokens se devuelve igual (y se cuenta como parcial).
+        """
+        with self._candado:
+            entrada = self.entradas.get(huella)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self.entradas.move_to_end(huella)
+            if sintactico and entrada["errores"] is None:
+                self.parciales += 1
+            else:
+                self.aciertos += 1
+            return entrada
+
+    def guardar(self, huella, tokens, errores=None, diagnosticos=None):
+        """Guarda un resultado; si ya hay errores para esa huella y no se pasan, se conservan."""
+        with self._candado:
+            anterior = self.entradas.pop(huella, None)
+            if anterior is not None:
+                self.total_tokens -= len(anterior["tokens"])
+                if errores is None:
+                    errores, diagnosticos = anterior["errores"], anterior["diagnosticos"]
+            self.entradas[huella] = {"tokens": tokens, "errores": errores, "diagnosticos": diagnosticos}
+            self.total_tokens += len(tokens)
+            # La entrada recién guardada no se desaloja aunque supere el límite sola
+            while len(self.entradas) > 1 and (len(self.entradas) > self.max_entradas
+                                              or self.total_tokens > self.max_tokens):
+                _, desalojada = self.entradas.popitem(last=False)
+                self.total_tokens -= len(desalojada["tokens"])
+
+    def estadisticas(self):
+        with self._candado:
+            return {"aciertos": self.aciertos, "parciales": self.parciales, "fallos": self.fallos,
+                    "entradas": len(self.entradas), "tokens": self.total_tokens}
+
+    def vaciar(self):
+        with self._candado:
+            self.entradas.clear()
+            self.total_tokens = 0
@@ -6,11 +6,13 @@ from PySide6.QtWidgets import (
     QWidget,
     QHBoxLayout,
     QVBoxLayout,
-    QTextEdit
+    QTextEdit,
+    QToolTip
 )
-from PySide6.QtGui import QPainter, QColor, QTextFormat, QFont, QFontMetrics
-from PySide6.QtCore import Qt, QRect, QSize, Slot
-from analizador import analizar_codigo
+from PySide6.QtGui import (QPainter, QColor, QTextFormat, QFont, QFontMetrics, QSyntaxHighlighter,
+                           QTextCharFormat, QTextCursor, QPen, QPolygon, QTextBlockUserData)
+from PySide6.QtCore import Qt, QRect, QSize, QPoint, QEvent, Slot, Signal, QTimer
+from analizador import TIPOS_ERROR, analizar_codigo, obtener_lexer
 from sintactico import AnalizadorSintactico
 
 # --- Widget para el área de números de línea ---
@@ -27,19 +29,202 @@ class LineNumberArea(QWidget):
         # Llama al método de pintura del editor principal
         self.codeEditor.lineNumberAreaPaintEvent(event)
 
+    def event(self, event):
+        # Al pasar el mouse sobre una marca, muestra los diagnósticos de esa línea
+        if event.type() == QEvent.Type.ToolTip:
+            cursor = self.codeEditor.cursorForPosition(QPoint(0, event.pos().y()))
+            self.codeEditor.mostrarDiagnosticos(event.globalPos(), cursor.blockNumber() + 1, widget=self)
+            return True
+        return super().event(event)
+
+# --- Resaltado de sintaxis ---
+class BloqueFormateado(QTextBlockUserData):
+    """Marca de los bloques a los que ResaltadorSintaxis ya aplicó formato."""
+    pass
+
+
+class ResaltadorSintaxis(QSyntaxHighlighter):
+    """
+    Colorea el código con los mismos patrones que el lexer (analizador.PATRONES),
+    línea por línea. El estado de cada bloque indica si termina dentro de un
+    comentario de bloque, así que al editar solo se vuelven a procesar el
+    bloque cambiado y los siguientes cuyo estado cambie.
+    Solo se aplica formato a los bloques visibles (más un margen); los demás
+    solo calculan su estado, casi siempre sin pasar por el lexer, y se
+    formatean cuando entran en la vista (actualizarVisibles).
+    Que un bloque ya tenga formato se marca con BloqueFormateado en sus datos de
+    usuario y no en el estado: un cambio de estado hace que Qt vuelva a procesar
+    también el bloque siguiente.
+    """
+    DENTRO_COMENTARIO = 1  # Estado de bloque
+    MARGEN_BLOQUES = 20    # Bloques formateados por encima y por debajo de la vista
+
+    def __init__(self, editor):
+        super().__init__(editor.document())
+        self.editor = editor
+        lexer = obtener_lexer()
+        self.patron = lexer.patron_combinado
+        self.palabrasReservadas = lexer.palabras_reservadas
+        self.primerVisible = 0
+        self.ultimoVisible = 0
+        self.actualizarRango()
+
+        def formato(color, negrita=False, cursiva=False):
+            charFormat = QTextCharFormat()
+            charFormat.setForeground(QColor(color))
+            if negrita:
+                charFormat.setFontWeight(QFont.Weight.Bold)
+            charFormat.setFontItalic(cursiva)
+            return charFormat
+
+        comentario = formato("#808080", cursiva=True)
+        cadena = formato("#067d17")
+        numero = formato("#1750eb")
+        self.formatoReservada = formato("#0033b3", negrita=True)
+        self.formatoError = QTextCharFormat()
+        self.formatoError.setUnderlineStyle(QTextCharFormat.UnderlineStyle.WaveUnderline)
+        self.formatoError.setUnderlineColor(QColor("red"))
+        self.formatoComentario = comentario
+        # Grupo del patrón combinado -> formato (los que no están van sin formato)
+        self.formatos = {
+            "comentario_linea": comentario,
+            "comentario_bloque": comentario,
+            "cadenaLiteral": cadena,
+            "literal_caracter": cadena,
+            "numero_decimal": numero,
+            "numero_entero": numero,
+            "literal_booleano": self.formatoReservada,
+            "literal_nulo": self.formatoReservada,
+        }
+        for grupo in TIPOS_ERROR:
+            self.formatos[grupo] = self.formatoError
+
+    def actualizarRango(self):
+        # Cada bloque ocupa al menos una línea: alcanza con tantos bloques como líneas quepan
+        primero = self.editor.firstVisibleBlock().blockNumber()
+        lineas = self.editor.viewport().height() // max(1, self.editor.altoLinea) + 1
+        self.primerVisible = max(0, primero - self.MARGEN_BLOQUES)
+        self.ultimoVisible = primero + lineas + self.MARGEN_BLOQUES
+
+    def highlightBlock(self, text):
+        anterior = self.previousBlockState()
+        dentroComentario = anterior == self.DENTRO_COMENTARIO
+        if self.primerVisible <= self.currentBlock().blockNumber() <= self.ultimoVisible:
+            self.setCurrentBlockState(self.recorrer(text, dentroComentario, True))
+            if self.currentBlockUserData() is None:
+                self.setCurrentBlockUserData(BloqueFormateado())
+        else:
+            # Qt reemplaza el formato del bloque por el de esta pasada, que no tiene ninguno
+            self.setCurrentBlockState(self.recorrer(text, dentroComentario, False))
+            if self.currentBlockUserData() is not None:
+                self.setCurrentBlockUserData(None)
+
+    def recorrer(self, text, dentroComentario, formatear):
+        """
+        Recorre una línea empezando (o no) dentro de un comentario de bloque y
+        devuelve DENTRO_COMENTARIO si termina dentro de uno. Con `formatear`
+        aplica el formato de cada token.
+        """
+        posicion = 0
+        if dentroComentario:
+            cierre = text.find("*/")
+            if cierre < 0:
+                if formatear:
+                    self.setFormat(0, len(text), self.formatoComentario)
+                return self.DENTRO_COMENTARIO
+            posicion = cierre + 2
+            if formatear:
+                self.setFormat(0, posicion, self.formatoComentario)
+        # Sin '/*' la línea no puede abrir un comentario: no hace falta el lexer
+        if not formatear and text.find("/*", posicion) < 0:
+            return 0
+
+        for match in self.patron.finditer(text, posicion):
+            inicio = match.start()
+            if formatear and inicio > posicion and text[posicion:inicio].strip():
+                self.setFormat(posicion, inicio - posicion, self.formatoError)  # Carácter no reconocido
+            posicion = match.end()
+            grupo = match.lastgroup
+            # Un '/*' que no cierra en esta línea sigue en el bloque siguiente
+            if grupo == "operador_aritmetico" and text.startswith("/*", inicio):
+                if formatear:
+                    self.setFormat(inicio, len(text) - inicio, self.formatoComentario)
+                return self.DENTRO_COMENTARIO
+            if formatear:
+                charFormat = self.formatos.get(grupo)
+                if charFormat is None and match.group() in self.palabrasReservadas:
+                    charFormat = self.formatoReservada
+                if charFormat is not None:
+                    self.setFormat(inicio, posicion - inicio, charFormat)
+        if formatear and text[posicion:].strip():
+            self.setFormat(posicion, len(text) - posicion, self.formatoError)
+        return 0
+
+    def actualizarVisibles(self):
+        """Formatea los bloques que entraron en la vista sin haber sido formateados."""
+        self.actualizarRango()
+        documento = self.document()
+        pendientes = []
+        block = documento.findBlockByNumber(self.primerVisible)
+        while block.isValid() and block.blockNumber() <= self.ultimoVisible:
+            if block.userData() is None:
+                pendientes.append(block)
+            block = block.next()
+        if not pendientes:
+            return
+        # Aplicar formato no es una edición: que no lo vean quienes escuchan
+        # contentsChange (relexado incremental, cancelación del análisis)
+        documento.blockSignals(True)
+        try:
+            for block in pendientes:
+                self.rehighlightBlock(block)
+        finally:
+            documento.blockSignals(False)
+
+
 # --- Widget principal del editor de código ---
 class CodeEditor(QPlainTextEdit):
+    # Se emite una sola vez tras una ráfaga de ediciones (modo de análisis en vivo)
+    analisisSolicitado = Signal()
+    RETARDO_ANALISIS_MS = 300
+    COLOR_DIAGNOSTICO = QColor(220, 0, 0)
+    ANCHO_MARCA = 8  # Espacio del margen reservado para las marcas de diagnóstico
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.lineNumberArea = LineNumberArea(self)
 
+        # Métricas del margen; se recalculan solo al cambiar la fuente
+        # (actualizarMetricas) o la cantidad de dígitos de la última línea.
+        # Van antes del resaltador, que usa altoLinea desde que se crea
+        self.digitosMargen = 0
+        self.anchoMargen = 0
+        self.actualizarMetricas()
+
+        # Diagnósticos por línea (base 1): {línea: [(columna, largo, mensaje), ...]}.
+        # Al pintar solo se consultan las líneas visibles, así que el costo no
+        # depende de cuántos diagnósticos haya en total
+        self.diagnosticosPorLinea = {}
+        self.bloquesAntes = self.document().blockCount()
+        self.document().contentsChange.connect(self.ajustarDiagnosticos)
+
+        self.resaltador = ResaltadorSintaxis(self)
+
+        # Análisis en vivo: cada edición reinicia el temporizador, de modo que
+        # solo se analiza el texto cuando el usuario deja de escribir
+        self.analisisEnVivo = False
+        self.temporizadorAnalisis = QTimer(self)
+        self.temporizadorAnalisis.setSingleShot(True)
+        self.temporizadorAnalisis.setInterval(self.RETARDO_ANALISIS_MS)
+        self.temporizadorAnalisis.timeout.connect(self.analisisSolicitado)
+        self.textChanged.connect(self.programarAnalisis)
+
         # Conectar señales a slots para actualizar el área de números de línea
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
         self.updateRequest.connect(self.updateLineNumberArea)
         self.cursorPositionChanged.connect(self.highlightCurrentLine)
 
         # Establecer configuraciones iniciales
-        self.updateLineNumberAreaWidth(0) # Establece el margen inicial
         self.highlightCurrentLine()        # Resalta la línea actual inicial
         # self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap) # Opcional: Desactivar ajuste de línea
 
@@ -47,27 +232,38 @@ class CodeEditor(QPlainTextEdit):
         font = QFont("Courier New", 10) # O usa "Consolas", "Monaco", etc.
         self.setFont(font)
         self.lineNumberArea.setFont(font)
+        self.actualizarMetricas() # Calcula las métricas y establece el margen inicial
 
+    def actualizarMetricas(self):
+        # Guarda las medidas de la fuente que usa el margen y lo redimensiona
+        font_metrics = QFontMetrics(self.font())
+        self.altoLinea = font_metrics.height()
+        self.ascenso = font_metrics.ascent()
+        # Los dígitos tienen el mismo ancho en casi todas las fuentes; con el
+        # de '9' se alinean los números a la derecha sin medir cada uno
+        self.anchoDigito = font_metrics.horizontalAdvance('9')
+        self.digitosMargen = 0 # Fuerza el recálculo del ancho
+        self.updateLineNumberAreaWidth()
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange:
+            self.actualizarMetricas()
 
     def lineNumberAreaWidth(self):
-        # Calcula el ancho necesario para mostrar los números de línea
-        digits = 1
-        max_lines = max(1, self.blockCount())
-        while max_lines >= 10:
-            max_lines //= 10
-            digits += 1
-
-        # Usa QFontMetrics para obtener el ancho del carácter más ancho ('9')
-        # y añade un poco de padding
-        font_metrics = QFontMetrics(self.font())
-        # space = 5 + font_metrics.horizontalAdvance('9') * digits # Ancho basado en '9'
-        space = 10 + font_metrics.averageCharWidth() * digits # Ancho basado en promedio + padding
-        return space
+        # Ancho necesario para mostrar los números de línea: dígitos + padding + marcas
+        return 10 + self.anchoDigito * self.digitosMargen + self.ANCHO_MARCA
 
-    @Slot()
+    @Slot(int)
     def updateLineNumberAreaWidth(self, newBlockCount=0): # newBlockCount no se usa directamente aquí
-        # Establece el margen izquierdo del viewport para dejar espacio
-        self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
+        # Solo cambia el margen izquierdo del viewport (y con él la
+        # distribución del editor) cuando cambia la cantidad de dígitos
+        digitos = len(str(max(1, self.blockCount())))
+        if digitos != self.digitosMargen:
+            self.digitosMargen = digitos
+            self.anchoMargen = self.lineNumberAreaWidth()
+            self.setViewportMargins(self.anchoMargen, 0, 0, 0)
+            self.ubicarMargen()
 
     @Slot(QRect, int)
     def updateLineNumberArea(self, rect, dy):
@@ -75,61 +271,176 @@ class CodeEditor(QPlainTextEdit):
         if dy:
             # Si hubo scroll vertical, desplaza el área de números
             self.lineNumberArea.scroll(0, dy)
+            self.resaltador.actualizarVisibles()
         else:
             # Si no hubo scroll vertical (p.ej., cambio de texto, scroll horizontal),
             # repinta el área de números visible afectada por 'rect'
             self.lineNumberArea.update(0, rect.y(), self.lineNumberArea.width(), rect.height())
-
-        # Si la primera línea visible ha cambiado (p.ej., al añadir/eliminar líneas arriba),
-        # recalcula el ancho por si acaso el número de dígitos cambió.
-        if rect.contains(self.viewport().rect().topLeft()):
-            self.updateLineNumberAreaWidth(0)
+        # El ancho no depende del scroll: blockCountChanged lo mantiene al día
 
 
     def resizeEvent(self, event):
         # Llama al método base
         super().resizeEvent(event)
 
+        self.ubicarMargen()
+        self.resaltador.actualizarVisibles()
+
+    def ubicarMargen(self):
         # Actualiza la geometría (posición y tamaño) del área de números de línea
         # para que ocupe el espacio del margen izquierdo que hemos reservado
         cr = self.contentsRect() # Área interior del widget QPlainTextEdit
-        self.lineNumberArea.setGeometry(QRect(cr.left(), cr.top(), self.lineNumberAreaWidth(), cr.height()))
+        self.lineNumberArea.setGeometry(QRect(cr.left(), cr.top(), self.anchoMargen, cr.height()))
 
     def lineNumberAreaPaintEvent(self, event):
         # Dibuja los números de línea
         painter = QPainter(self.lineNumberArea)
         painter.fillRect(event.rect(), QColor(228, 228, 228)) # Color de fondo del área
+        arriba = event.rect().top()
+        abajo = event.rect().bottom()
 
         # Obtiene el primer bloque visible
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         # Calcula la posición Y superior del primer bloque visible
         top = int(self.blockBoundingGeometry(block).translated(self.contentOffset()).top())
-        # Calcula la posición Y inferior del último bloque (aproximado)
-        bottom = top + int(self.blockBoundingRect(block).height())
-
-        # Itera sobre los bloques visibles
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(blockNumber + 1) # Número de línea (base 1)
-                painter.setPen(Qt.GlobalColor.darkGray) # Color del texto de los números
-                # Dibuja el número alineado a la derecha en el área
-                painter.drawText(
-                    0,                          # x
-                    top,                        # y
-                    self.lineNumberArea.width() - 5, # Ancho (con padding derecho)
-                    self.fontMetrics().height(), # Alto
-                    Qt.AlignmentFlag.AlignRight,  # Alineación
-                    number                      # Texto
-                )
 
+        # Primero se juntan los números y las marcas de los bloques visibles y
+        # después se dibujan con un solo cambio de pincel por grupo
+        numeros = [] # (y de la línea base, texto)
+        marcas = []  # y superior del bloque
+        while block.isValid() and top <= abajo:
+            # Alto real del bloque: con ajuste de línea puede ocupar varias líneas
+            bottom = top + int(self.blockBoundingRect(block).height())
+            if block.isVisible() and bottom >= arriba:
+                numeros.append((top + self.ascenso, str(blockNumber + 1))) # Número de línea (base 1)
+                if blockNumber + 1 in self.diagnosticosPorLinea:
+                    marcas.append(top)
             # Pasa al siguiente bloque
             block = block.next()
-            # Actualiza la posición Y para el siguiente bloque
             top = bottom
-            bottom = top + int(self.blockBoundingRect(block).height())
             blockNumber += 1
 
+        # Números alineados a la derecha (con padding derecho)
+        derecha = self.anchoMargen - 5
+        painter.setPen(Qt.GlobalColor.darkGray) # Color del texto de los números
+        for y, number in numeros:
+            painter.drawText(derecha - self.anchoDigito * len(number), y, number)
+
+        if marcas:
+            # Marcas de diagnóstico a la izquierda de los números
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(self.COLOR_DIAGNOSTICO)
+            lado = self.ANCHO_MARCA - 2
+            for top in marcas:
+                painter.drawEllipse(2, top + (self.altoLinea - lado) // 2, lado, lado)
+
+    # --- Diagnósticos en línea ---
+    def establecerDiagnosticos(self, diagnosticos):
+        """
+        Reemplaza los diagnósticos mostrados.
+        Args:
+            diagnosticos (iterable): Tuplas (línea, columna, largo, mensaje), como
+                                     AnalizadorSintactico.diagnosticos.
+        """
+        porLinea = {}
+        for linea, columna, largo, mensaje in diagnosticos:
+            porLinea.setdefault(linea, []).append((columna, largo, mensaje))
+        self.diagnosticosPorLinea = porLinea
+        self.viewport().update()
+        self.lineNumberArea.update()
+
+    @Slot(int, int, int)
+    def ajustarDiagnosticos(self, position, charsRemoved, charsAdded):
+        # Las líneas editadas pierden sus diagnósticos y las siguientes se
+        # desplazan si cambió la cantidad de líneas
+        bloques = self.document().blockCount()
+        delta = bloques - self.bloquesAntes
+        self.bloquesAntes = bloques
+        if not self.diagnosticosPorLinea:
+            return
+        primera = self.document().findBlock(position).blockNumber() + 1
+        ultima = self.document().findBlock(position + charsAdded).blockNumber() + 1
+        if delta == 0:
+            for linea in range(primera, ultima + 1):
+                self.diagnosticosPorLinea.pop(linea, None)
+        else:
+            ultimaAnterior = ultima - delta  # Última línea editada, antes del cambio
+            self.diagnosticosPorLinea = {
+                linea if linea < primera else linea + delta: marcas
+                for linea, marcas in self.diagnosticosPorLinea.items()
+                if linea < primera or linea > ultimaAnterior
+            }
+        self.lineNumberArea.update()
+
+    def mensajesDiagnostico(self, linea, columna=None):
+        """Mensajes de la línea; con `columna`, solo los que la abarcan."""
+        return [mensaje for inicio, largo, mensaje in self.diagnosticosPorLinea.get(linea, ())
+                if columna is None or inicio <= columna <= inicio + max(largo, 1)]
+
+    def mostrarDiagnosticos(self, globalPos, linea, columna=None, widget=None):
+        mensajes = self.mensajesDiagnostico(linea, columna)
+        if mensajes:
+            QToolTip.showText(globalPos, "\n".join(mensajes), widget or self.viewport())
+        else:
+            QToolTip.hideText()
+
+    def viewportEvent(self, event):
+        if event.type() == QEvent.Type.ToolTip and self.diagnosticosPorLinea:
+            cursor = self.cursorForPosition(event.pos())
+            self.mostrarDiagnosticos(event.globalPos(), cursor.blockNumber() + 1, cursor.positionInBlock() + 1)
+            return True
+        return super().viewportEvent(event)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.diagnosticosPorLinea:
+            self.pintarSubrayados(event.rect())
+
+    def pintarSubrayados(self, rect):
+        # Subrayado ondulado bajo cada diagnóstico de los bloques visibles
+        painter = QPainter(self.viewport())
+        painter.setPen(QPen(self.COLOR_DIAGNOSTICO, 1))
+        offset = self.contentOffset()
+        block = self.firstVisibleBlock()
+        while block.isValid():
+            if self.blockBoundingGeometry(block).translated(offset).top() > rect.bottom():
+                break
+            marcas = self.diagnosticosPorLinea.get(block.blockNumber() + 1)
+            if marcas and block.isVisible():
+                ultimo = block.length() - 1  # Sin el salto de línea
+                cursor = QTextCursor(block)
+                for columna, largo, _ in marcas:
+                    inicio = max(0, min(columna - 1, ultimo))
+                    cursor.setPosition(block.position() + inicio)
+                    izquierda = self.cursorRect(cursor)
+                    cursor.setPosition(block.position() + min(inicio + largo, ultimo))
+                    derecha = self.cursorRect(cursor)
+                    x2 = derecha.left()
+                    if derecha.top() != izquierda.top() or x2 <= izquierda.left():
+                        # Final de línea o lexema partido por el ajuste de línea
+                        x2 = izquierda.left() + self.anchoDigito
+                    self.dibujarOnda(painter, izquierda.left(), x2, izquierda.bottom())
+            block = block.next()
+        painter.end()
+
+    def dibujarOnda(self, painter, x1, x2, y):
+        puntos = [QPoint(x, y - (x - x1) // 2 % 2 * 2) for x in range(x1, x2 + 1, 2)]
+        if len(puntos) > 1:
+            painter.drawPolyline(QPolygon(puntos))
+
+    def setAnalisisEnVivo(self, activo):
+        self.analisisEnVivo = activo
+        if activo:
+            self.temporizadorAnalisis.start()  # Analizar el texto actual
+        else:
+            self.temporizadorAnalisis.stop()
+
+    @Slot()
+    def programarAnalisis(self):
+        if self.analisisEnVivo:
+            self.temporizadorAnalisis.start()  # Reinicia la cuenta si ya estaba activo
+
     @Slot()
     def highlightCurrentLine(self):
         # Resalta la línea donde está el cursor
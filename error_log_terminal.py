@@ -1,11 +1,28 @@
 # error_log_terminal.py (o en el mismo archivo de tu UI principal)
+from collections import Counter, deque
+from itertools import chain, groupby
+from operator import itemgetter
+
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit
 from PySide6.QtGui import QFont, QColor, QTextCharFormat, QTextCursor
-from PySide6.QtCore import QDateTime, Qt
+from PySide6.QtCore import QDateTime, Qt, QTimer
 
 class ErrorLogTerminal(QWidget):
+    # Los mensajes se acumulan y se insertan juntos cada FLUSH_INTERVAL_MS
+    FLUSH_INTERVAL_MS = 50
+    # Máximo de mensajes pendientes; los más antiguos se resumen en una línea
+    MAX_PENDING = 2000
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._pending = deque(maxlen=self.MAX_PENDING)
+        self._dropped = Counter()  # Mensajes resumidos por nivel desde el último volcado
+        self.counts = Counter()    # Mensajes recibidos por nivel
+        self._formats = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL_MS)
+        self._flush_timer.timeout.connect(self.flush)
         self.init_ui()
 
     def init_ui(self):
@@ -37,42 +54,103 @@ class ErrorLogTerminal(QWidget):
             message (str): El mensaje a añadir.
             level (str): El nivel del mensaje ('INFO', 'WARN', 'ERROR', 'DEBUG', etc.).
                          Se usa para formateo visual (opcional).
+        El mensaje se muestra en el próximo volcado (ver add_messages).
+        """
+        self.add_messages((message,), level)
+
+    def add_messages(self, messages, level="INFO", omitted=0, summary=None):
         """
+        Añade varios mensajes del mismo nivel de una vez.
+        Args:
+            messages (iterable): Los mensajes a añadir.
+            level (str): El nivel de los mensajes.
+            omitted (int): Mensajes anteriores a `messages` que quien llama no llegó
+                           a armar; se cuentan y en su lugar va una sola línea.
+            summary (str): Texto de esa línea (por defecto "N mensajes omitidos").
+        Los mensajes se insertan juntos en el próximo volcado. Nunca quedan más
+        de MAX_PENDING pendientes: cada mensaje que llega con la cola llena
+        desplaza al más antiguo, que pasa a la línea de resumen del principio.
+        """
+        level = level.upper()
+        pending = self._pending
+        dropped = self._dropped
+        # Cada pendiente es (nivel, texto, mensajes que representa)
+        entries = ((level, message, 1) for message in messages)
+        if omitted:
+            entries = chain(((level, summary or f"{omitted} mensajes omitidos", omitted),), entries)
+        received = 0
+        for entry in entries:
+            if len(pending) == pending.maxlen:
+                oldest = pending[0]
+                dropped[oldest[0]] += oldest[2]
+            pending.append(entry)  # La deque descarta sola el más antiguo
+            received += entry[2]
+        self.counts[level] += received
+        if received and not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """Inserta los mensajes pendientes en el historial con una sola edición del documento."""
+        self._flush_timer.stop()
+        if not self._pending and not self._dropped:
+            return
         timestamp = QDateTime.currentDateTime().toString("yyyy-MM-dd hh:mm:ss")
-        prefix = f"[{timestamp}] [{level.upper()}] "
 
-        # Mover cursor al final para asegurar que appendPlainText funcione como se espera
-        # y para aplicar formato si es necesario.
+        # Mover cursor al final para asegurar que el texto se agregue al final
         cursor = self.log_output.textCursor()
         cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.log_output.setTextCursor(cursor)
+        cursor.beginEditBlock()
+        # Los desplazados son anteriores a todo lo pendiente: su resumen va primero
+        if self._dropped:
+            detail = ", ".join(f"{level}: {count}" for level, count in sorted(self._dropped.items()))
+            cursor.insertText(
+                f"[{timestamp}] [INFO] {sum(self._dropped.values())} mensajes resumidos ({detail})\n",
+                self._format_for("INFO"))
+        # Cada tramo de mensajes consecutivos del mismo nivel es una sola inserción
+        for level, run in groupby(self._pending, key=itemgetter(0)):
+            prefix = f"[{timestamp}] [{level}] "
+            text = "".join(f"{prefix}{message}\n" for _, message, _ in run)
+            cursor.insertText(text, self._format_for(level))
+        cursor.endEditBlock()
+        self._pending.clear()
+        self._dropped.clear()
 
-        # Formato de color según el nivel (opcional)
-        char_format = QTextCharFormat()
-        if level.upper() == "ERROR":
-            char_format.setForeground(QColor("red"))
-        elif level.upper() == "WARN":
-            char_format.setForeground(QColor(200, 100, 0)) # Naranja oscuro
-        elif level.upper() == "DEBUG":
-             char_format.setForeground(QColor("gray"))
-        # else: INFO usa el color por defecto
+        # Asegurar que la última línea sea visible (auto-scroll)
+        self.log_output.setTextCursor(cursor)
+        self.log_output.ensureCursorVisible()
 
-        # Insertar prefijo con formato
-        cursor.insertText(prefix, char_format)
+    def _format_for(self, level):
+        char_format = self._formats.get(level)
+        if char_format is None:
+            # Formato de color según el nivel (opcional)
+            char_format = QTextCharFormat()
+            if level == "ERROR":
+                char_format.setForeground(QColor("red"))
+            elif level == "WARN":
+                char_format.setForeground(QColor(200, 100, 0)) # Naranja oscuro
+            elif level == "DEBUG":
+                char_format.setForeground(QColor("gray"))
+            # else: INFO usa el color por defecto
+            self._formats[level] = char_format
+        return char_format
 
-        # Insertar el mensaje principal (sin formato especial aquí, hereda el último)
-        # Si quieres resetear formato, crea un char_format normal aquí
-        cursor.insertText(message + "\n") # Añade el salto de línea
+    def get_counts(self):
+        """Devuelve la cantidad de mensajes recibidos por nivel, p. ej. {'INFO': 10, 'ERROR': 2}."""
+        return dict(self.counts)
 
-        # Asegurar que la última línea sea visible (auto-scroll)
-        self.log_output.ensureCursorVisible()
+    def reset_counts(self):
+        self.counts.clear()
 
     def clear_log(self):
         """Limpia el contenido del log (para uso interno del programa si es necesario)."""
+        self._flush_timer.stop()
+        self._pending.clear()
+        self._dropped.clear()
         self.log_output.clear()
 
     def get_log_text(self):
         """Devuelve el texto completo del log (para uso externo si es necesario)."""
+        self.flush()
         return self.log_output.toPlainText()
     # Puedes añadir más métodos si necesitas, por ejemplo, para guardar el log a un archivo.
     # def save_log_to_file(self, filename):
@@ -0,0 +1,290 @@
+import csv
+import json
+import os
+import tempfile
+from array import array
+from json.encoder import encode_basestring
+
+import serializacion
+from analizador import CLAVES_TOKEN, Token
+
+COLUMNAS_CSV = ("Registro",) + CLAVES_TOKEN + ("Mensaje",)
+
+MAGIA = b"CLXC"
+VERSION_FORMATO = 1
+BLOQUE_COLUMNAR = 1 << 16  # Tokens que EscritorColumnar junta en memoria antes de volcarlos
+
+# Columnas del formato columnar: (nombre, typecode de array)
+COLUMNAS = (
+    ("id", "H"),          # Índice en el diccionario de ID
+    ("patron", "H"),      # Índice en el diccionario de patrones
+    ("reservada", "B"),
+    ("linea", "I"),
+    ("columna", "I"),
+    ("inicio", "q"),      # Desplazamiento del lexema en el código fuente (-1 si no se conoce)
+    ("fin_lexema", "Q"),  # Fin del lexema en `lexemas` (el inicio es el fin del anterior)
+)
+
+
+class EscritorJSONL:
+    """Un objeto JSON por línea: {"Registro": "token", ...} o {"Registro": "error", ...}."""
+    extension = "jsonl"
+    binario = False
+
+    def __init__(self, salida):
+        self.salida = salida
+
+    @staticmethod
+    def _registro_token(token):
+        # Armado a mano con el escapado de json: igual a json.dumps(..., ensure_ascii=False)
+        # pero varias veces más rápido que construir y codificar un dict por token
+        return (f'{{"Registro": "token", "ID": {encode_basestring(token.id)}, '
+                f'"Lexema": {encode_basestring(token.lexema)}, "Línea": {token.linea}, '
+                f'"Columna": {token.columna}, "Patrón": {encode_basestring(token.patron)}, '
+                f'"Reservada": {"true" if token.reservada else "false"}}}\n')
+
+    def token(self, token):
+        self.salida.write(self._registro_token(token))
+
+    def tokens(self, tokens):
+        self.salida.writelines(map(self._registro_token, tokens))
+
+    def error(self, mensaje, linea=None, columna=None):
+        registro = {"Registro": "error", "Mensaje": mensaje}
+        if linea is not None:
+            registro["Línea"] = linea
+            registro["Columna"] = columna
+        self.salida.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+    def cerrar(self):
+        pass
+
+    def descartar(self):
+        pass
+
+
+class EscritorCSV:
+    """Una fila por token o error con las columnas de COLUMNAS_CSV."""
+    extension = "csv"
+    binario = False
+
+    def __init__(self, salida):
+        self.escritor = csv.writer(salida)
+        self.escritor.writerow(COLUMNAS_CSV)
+
+    def token(self, token):
+        self.escritor.writerow(_fila_token(token))
+
+    def tokens(self, tokens):
+        self.escritor.writerows(map(_fila_token, tokens))
+
+    def error(self, mensaje, linea=None, columna=None):
+        if linea is None:
+            linea = columna = ""
+        self.escritor.writerow(("error", "", "", linea, columna, "", "", mensaje))
+
+    def cerrar(self):
+        pass
+
+    def descartar(self):
+        pass
+
+
+def _fila_token(token):
+    return ("token", token.id, token.lexema, token.linea, token.columna, token.patron, token.reservada, "")
+
+
+class EscritorColumnar:
+    """
+    Formato binario por columnas: cabecera JSON (diccionarios de ID y
+    patrones, errores y ubicación de las columnas) seguida de las columnas
+    alineadas a 8 bytes y de los lexemas en UTF-8, uno tras otro.
+    La cabecera va primero pero depende de todos los tokens, así que cada
+    BLOQUE_COLUMNAR tokens los arreglos se vuelcan a un segmento temporal por
+    columna; al cerrar se copian los segmentos detrás de la cabecera. La
+    memoria no depende de la cantidad de tokens.
+    Se lee con ResultadosColumnares.
+    """
+    extension = "clxc"
+    binario = True
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.ids = []
+        self.patrones = []
+        self._indice_ids = {}
+        self._indice_patrones = {}
+        self.columnas = {nombre: array(typecode) for nombre, typecode in COLUMNAS}
+        self.lexemas = bytearray()
+        self.errores = []  # [línea, columna, mensaje]
+        self.cantidad = 0
+        self.largo_lexemas = 0  # Bytes de lexemas ya volcados
+        self.segmentos = {nombre: tempfile.TemporaryFile() for nombre, _ in COLUMNAS}
+        self.segmentos["lexemas"] = tempfile.TemporaryFile()
+
+    def token(self, token):
+        self.tokens((token,))
+
+    def tokens(self, tokens):
+        ids, patrones = self._indice_ids, self._indice_patrones
+        columnas = self.columnas
+        agregar_id, agregar_patron = columnas["id"].append, columnas["patron"].append
+        agregar_reservada, agregar_linea = columnas["reservada"].append, columnas["linea"].append
+        agregar_columna, agregar_inicio = columnas["columna"].append, columnas["inicio"].append
+        agregar_fin = columnas["fin_lexema"].append
+        lexemas = self.lexemas
+        base = self.largo_lexemas
+        pendientes = BLOQUE_COLUMNAR - len(columnas["id"])
+        for token in tokens:
+            id_token = token.id
+            indice = ids.get(id_token)
+            if indice is None:
+                indice = ids[id_token] = len(self.ids)
+                self.ids.append(id_token)
+            agregar_id(indice)
+            indice = patrones.get(token.patron)
+            if indice is None:
+                indice = patrones[token.patron] = len(self.patrones)
+                self.patrones.append(token.patron)
+            agregar_patron(indice)
+            agregar_reservada(token.reservada)
+            agregar_linea(token.linea)
+            agregar_columna(token.columna)
+            agregar_inicio(token.inicio)
+            # surrogateescape: los bytes inválidos de un archivo mapeado se conservan
+            lexemas += token.lexema.encode("utf-8", "surrogateescape")
+            agregar_fin(base + len(lexemas))
+            pendientes -= 1
+            if not pendientes:
+                self._volcar()
+                base = self.largo_lexemas
+                pendientes = BLOQUE_COLUMNAR
+
+    def _volcar(self):
+        """Pasa los arreglos a los segmentos y los vacía (los métodos append siguen sirviendo)."""
+        self.cantidad += len(self.columnas["id"])
+        for nombre, _ in COLUMNAS:
+            datos = self.columnas[nombre]
+            datos.tofile(self.segmentos[nombre])
+            del datos[:]
+        self.segmentos["lexemas"].write(self.lexemas)
+        self.largo_lexemas += len(self.lexemas)
+        self.lexemas.clear()
+
+    def error(self, mensaje, linea=None, columna=None):
+        self.errores.append([linea, columna, mensaje])
+
+    def cerrar(self):
+        self._volcar()
+        columnas = [(nombre, typecode, self.cantidad, self.segmentos[nombre]) for nombre, typecode in COLUMNAS]
+        cabecera = {"ids": self.ids, "patrones": self.patrones, "errores": self.errores}
+        try:
+            serializacion.escribir(self.salida, MAGIA, VERSION_FORMATO, cabecera, columnas,
+                                   (("lexemas", self.largo_lexemas, self.segmentos["lexemas"]),))
+        finally:
+            self.descartar()
+
+    def descartar(self):
+        """Cierra (y así borra) los segmentos temporales; se usa si la exportación no llega a cerrar()."""
+        for segmento in self.segmentos.values():
+            segmento.close()
+
+
+class ResultadosColumnares:
+    """
+    Lee un archivo de EscritorColumnar. Las columnas son vistas sobre los
+    datos (o el archivo mapeado, con cargar()) y no se copian.
+    """
+
+    def __init__(self, ids, patrones, errores, columnas, lexemas):
+        self.ids = ids
+        self.patrones = patrones
+        self.errores = errores  # [línea, columna, mensaje]; línea y columna pueden ser None
+        self.lexemas = lexemas
+        for nombre, _ in COLUMNAS:
+            setattr(self, nombre, columnas[nombre])
+
+    @classmethod
+    def desde_bytes(cls, datos):
+        cabecera, columnas, extras = serializacion.leer(datos, MAGIA, VERSION_FORMATO,
+                                                        "resultados columnares", ("lexemas",))
+        return cls(cabecera["ids"], cabecera["patrones"], cabecera["errores"], columnas, extras["lexemas"])
+
+    @classmethod
+    def cargar(cls, ruta):
+        return serializacion.cargar(ruta, cls.desde_bytes)
+
+    def __len__(self):
+        return len(self.id)
+
+    def lexema(self, i):
+        inicio = self.fin_lexema[i - 1] if i > 0 else 0
+        return str(self.lexemas[inicio:self.fin_lexema[i]], "utf-8", "surrogateescape")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return Token.crear(self.ids[self.id[i]], self.lexema(i), self.linea[i], self.columna[i],
+                           self.patrones[self.patron[i]], bool(self.reservada[i]), self.inicio[i])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def como_numpy(self):
+        """Vistas NumPy sin copia de cada columna (requiere numpy instalado)."""
+        import numpy
+        return {nombre: numpy.frombuffer(getattr(self, nombre), dtype=numpy.dtype(typecode))
+                for nombre, typecode in COLUMNAS}
+
+
+ESCRITORES = {"jsonl": EscritorJSONL, "csv": EscritorCSV, "columnar": EscritorColumnar}
+
+
+def formato_de_ruta(ruta):
+    """Formato de ESCRITORES que corresponde a la extensión de `ruta`."""
+    extension = os.path.splitext(ruta)[1].lower().lstrip(".")
+    for formato, escritor in ESCRITORES.items():
+        if escritor.extension == extension:
+            return formato
+    raise ValueError(f"No hay un formato de exportación para '{ruta}'")
+
+
+def escribir_resultados(escritor, tokens, errores=()):
+    """
+    Escribe los tokens y después los errores con `escritor` y lo cierra.
+    Cada error es un mensaje o un diagnóstico (línea, columna, largo, mensaje),
+    como los de AnalizadorSintactico.diagnosticos y diagnosticos_lexicos().
+    Si algo falla (o se interrumpe) antes de cerrar, el escritor se descarta
+    para no dejar sus archivos temporales.
+    """
+    try:
+        escritor.tokens(tokens)
+        for error in errores:
+            if isinstance(error, str):
+                escritor.error(error)
+            else:
+                linea, columna, _, mensaje = error
+                escritor.error(mensaje, linea, columna)
+    except BaseException:
+        escritor.descartar()
+        raise
+    escritor.cerrar()
+
+
+def exportar_resultados(ruta, tokens, errores=(), formato=None):
+    """
+    Exporta un análisis a `ruta` sin pasar por la interfaz.
+    Args:
+        tokens (iterable): Tokens (lista, AlmacenTokens o un flujo como iter_tokens).
+        errores (iterable): Mensajes o diagnósticos, ver escribir_resultados().
+        formato (str): Clave de ESCRITORES; por defecto se deduce de la extensión.
+    """
+    escritor = ESCRITORES[formato or formato_de_ruta(ruta)]
+    if escritor.binario:
+        salida = open(ruta, "wb")
+    else:
+        salida = open(ruta, "w", encoding="utf-8", newline="")
+    with salida:
+        escribir_resultados(escritor(salida), tokens, errores)
+
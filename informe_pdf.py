@@ -0,0 +1,267 @@
+import os
+
+from PySide6.QtCore import Qt, QDateTime, QRect
+from PySide6.QtGui import QColor, QFont, QFontMetrics, QGuiApplication, QPageSize, QPainter
+from PySide6.QtPrintSupport import QPrinter
+
+from modelo_tokens import ENCABEZADOS
+
+# Fracción del ancho de la página para cada columna de ENCABEZADOS
+ANCHOS_COLUMNAS = (0.14, 0.30, 0.09, 0.09, 0.28, 0.10)
+PADDING_CELDA = 0.25  # En múltiplos del alto de línea
+COLOR_FONDO_CODIGO = QColor(240, 240, 240)
+COLOR_ENCABEZADO = QColor(220, 220, 220)
+COLOR_SECCION = QColor(0, 0, 139)   # Azul oscuro
+COLOR_REGISTRO = QColor(139, 0, 0)  # Rojo oscuro
+
+
+class ExportacionCancelada(Exception):
+    """Se lanza cuando el callback `cancelar` pide detener la exportación."""
+    pass
+
+
+def aplicacion_sin_ventanas():
+    """
+    Devuelve la aplicación Qt del proceso o crea una con la plataforma
+    offscreen, para generar informes sin pantalla (p. ej. desde main.py).
+    """
+    app = QGuiApplication.instance()
+    if app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = QGuiApplication([])
+    return app
+
+
+def iter_lineas(codigo):
+    """Recorre las líneas de `codigo` sin copiarlo entero (como haría splitlines)."""
+    inicio = 0
+    while inicio <= len(codigo):
+        fin = codigo.find("\n", inicio)
+        if fin < 0:
+            fin = len(codigo)
+        yield codigo[inicio:fin]
+        inicio = fin + 1
+
+
+def celdas_token(token):
+    """Textos de las columnas de ENCABEZADOS para un token."""
+    return (token.id, token.lexema, str(token.linea), str(token.columna), token.patron,
+            "Sí" if token.reservada else "No")
+
+
+class InformePDF:
+    """
+    Informe en PDF con el código fuente, la tabla de tokens y el registro de
+    errores. Cada página se pinta con QPainter directamente sobre el QPrinter
+    a medida que se recorren los datos, sin armar un documento con todo el
+    contenido: la memoria no depende del tamaño del análisis.
+    """
+
+    def __init__(self, codigo, tokens, registro=(), titulo="Informe Completo",
+                 progreso=None, cancelar=None):
+        """
+        Args:
+            codigo (str): Código fuente.
+            tokens (iterable): Tokens a listar, en el orden de la tabla.
+            registro (iterable): Líneas de la sección de errores.
+            progreso: Función opcional (hechos, total) que se llama al empezar
+                      cada página; `total` es 0 si no se conoce.
+            cancelar: Función opcional sin argumentos que se consulta en cada
+                      página; si devuelve True se lanza ExportacionCancelada.
+        """
+        self.codigo = codigo
+        self.tokens = tokens
+        self.registro = registro
+        self.titulo = titulo
+        self.progreso = progreso
+        self.cancelar = cancelar
+        self.hechos = 0
+        self.total = 0
+        if hasattr(tokens, "__len__") and hasattr(registro, "__len__"):
+            self.total = codigo.count("\n") + 1 + len(tokens) + len(registro)
+
+    def exportar(self, ruta):
+        """
+        Escribe el informe en `ruta` y devuelve la cantidad de páginas.
+        Si se cancela, borra el archivo incompleto.
+        """
+        printer = QPrinter(QPrinter.PrinterMode.HighResolution)
+        printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
+        printer.setOutputFileName(ruta)
+        printer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
+        self.printer = printer
+        self.painter = QPainter()
+        if not self.painter.begin(printer):
+            raise OSError(f"No se pudo escribir el PDF en {ruta}")
+        try:
+            self._preparar()
+            self._titulo()
+            self._seccion("CÓDIGO FUENTE")
+            self._codigo()
+            self._seccion("DATOS TABULARES")
+            self._tabla()
+            self._seccion("REGISTRO DE ERRORES")
+            self._registro()
+            self._pie()
+        except BaseException:
+            self.painter.end()
+            try:
+                os.remove(ruta)
+            except OSError:
+                pass
+            raise
+        self.painter.end()
+        return self.pagina
+
+    # --- Página ---
+    def _preparar(self):
+        area = self.printer.pageLayout().paintRectPixels(self.printer.resolution())
+        self.ancho = area.width()
+        self.alto = area.height()
+
+        def fuente(puntos, negrita=False, cursiva=False, subrayada=False, monoespaciada=False):
+            # Las métricas se miden en la resolución de la impresora
+            font = QFont("Courier New") if monoespaciada else QFont()
+            if monoespaciada:
+                font.setStyleHint(QFont.StyleHint.Monospace)
+                font.setFixedPitch(True)
+            font.setPointSize(puntos)
+            font.setBold(negrita)
+            font.setItalic(cursiva)
+            font.setUnderline(subrayada)
+            return font, QFontMetrics(font, self.printer)
+
+        self.fuenteTitulo = fuente(16, negrita=True)
+        self.fuenteNormal = fuente(10)
+        self.fuenteSeccion = fuente(12, negrita=True, subrayada=True)
+        self.fuenteCodigo = fuente(10, monoespaciada=True)
+        self.fuenteTabla = fuente(9)
+        self.fuenteEncabezado = fuente(10, negrita=True)
+        self.fuenteRegistro = fuente(9, cursiva=True)
+        # El pie de página se reserva al final de cada página
+        self.limite = self.alto - 2 * self.fuenteTabla[1].height()
+        self.pagina = 1
+        self.y = 0
+
+    def _espacio(self, alto):
+        """Pasa a una página nueva si no caben `alto` píxeles más. Devuelve True si cambió."""
+        if self.y + alto <= self.limite:
+            return False
+        self._pie()
+        if self.cancelar is not None and self.cancelar():
+            raise ExportacionCancelada()
+        if self.progreso is not None:
+            self.progreso(self.hechos, self.total)
+        self.printer.newPage()
+        self.pagina += 1
+        self.y = 0
+        return True
+
+    def _pie(self):
+        font, metricas = self.fuenteTabla
+        self.painter.setFont(font)
+        self.painter.setPen(Qt.GlobalColor.darkGray)
+        self.painter.drawText(QRect(0, self.alto - metricas.height(), self.ancho, metricas.height()),
+                              Qt.AlignmentFlag.AlignRight, f"Página {self.pagina}")
+
+    def _texto(self, texto, fuente, color=Qt.GlobalColor.black):
+        font, metricas = fuente
+        self._espacio(metricas.height())
+        self.painter.setFont(font)
+        self.painter.setPen(color)
+        self.painter.drawText(0, self.y + metricas.ascent(), texto)
+        self.y += metricas.height()
+
+    def _titulo(self):
+        self._texto(self.titulo, self.fuenteTitulo)
+        self._texto(f"Generado el: {QDateTime.currentDateTime().toString('dd/MM/yyyy HH:mm')}", self.fuenteNormal)
+
+    def _seccion(self, nombre):
+        self.y += self.fuenteNormal[1].height()
+        # El encabezado no queda solo al pie de una página
+        self._espacio(3 * self.fuenteSeccion[1].height())
+        self._texto(nombre, self.fuenteSeccion, COLOR_SECCION)
+        self.y += self.fuenteNormal[1].height() // 2
+
+    # --- Secciones ---
+    def _codigo(self):
+        font, metricas = self.fuenteCodigo
+        alto = metricas.height()
+        margen = metricas.horizontalAdvance(" ")
+        # Fuente de ancho fijo: las líneas largas se cortan por cantidad de caracteres
+        por_linea = max(1, (self.ancho - 2 * margen) // max(1, metricas.horizontalAdvance("M")))
+        self.painter.setFont(font)
+        self.painter.setPen(Qt.GlobalColor.black)
+        for linea in iter_lineas(self.codigo):
+            linea = linea.rstrip("\r").expandtabs(4)
+            for inicio in range(0, max(1, len(linea)), por_linea):
+                if self._espacio(alto):
+                    self.painter.setFont(font)
+                    self.painter.setPen(Qt.GlobalColor.black)
+                self.painter.fillRect(0, self.y, self.ancho, alto, COLOR_FONDO_CODIGO)
+                self.painter.drawText(margen, self.y + metricas.ascent(), linea[inicio:inicio + por_linea])
+                self.y += alto
+            self.hechos += 1
+
+    def _tabla(self):
+        x = 0
+        self.columnas = []  # (x, ancho) de cada columna
+        for fraccion in ANCHOS_COLUMNAS:
+            ancho = int(self.ancho * fraccion)
+            self.columnas.append((x, ancho))
+            x += ancho
+        self.anchoTabla = x
+        font, metricas = self.fuenteTabla
+        padding = int(metricas.height() * PADDING_CELDA)
+        alto = metricas.height() + 2 * padding
+        self._encabezado_tabla()
+        self.painter.setFont(font)
+        for token in self.tokens:
+            if self._espacio(alto):
+                # Los encabezados se repiten en cada página
+                self._encabezado_tabla()
+                self.painter.setFont(font)
+            self.painter.setPen(Qt.GlobalColor.black)
+            for (x, ancho), texto in zip(self.columnas, celdas_token(token)):
+                texto = texto or "-"  # Marcador para celdas vacías
+                if metricas.horizontalAdvance(texto) > ancho - 2 * padding:
+                    texto = metricas.elidedText(texto, Qt.TextElideMode.ElideRight, ancho - 2 * padding)
+                self.painter.drawText(x + padding, self.y + padding + metricas.ascent(), texto)
+            self.painter.setPen(Qt.GlobalColor.lightGray)
+            self.painter.drawLine(0, self.y + alto, self.anchoTabla, self.y + alto)
+            self.y += alto
+            self.hechos += 1
+
+    def _encabezado_tabla(self):
+        font, metricas = self.fuenteEncabezado
+        padding = int(metricas.height() * PADDING_CELDA)
+        alto = metricas.height() + 2 * padding
+        self._espacio(2 * alto)
+        self.painter.fillRect(0, self.y, self.anchoTabla, alto, COLOR_ENCABEZADO)
+        self.painter.setFont(font)
+        self.painter.setPen(Qt.GlobalColor.black)
+        for (x, _), encabezado in zip(self.columnas, ENCABEZADOS):
+            self.painter.drawText(x + padding, self.y + padding + metricas.ascent(), encabezado)
+        self.y += alto
+
+    def _registro(self):
+        font, metricas = self.fuenteRegistro
+        for linea in self.registro:
+            if metricas.horizontalAdvance(linea) <= self.ancho:
+                self._texto(linea, self.fuenteRegistro, COLOR_REGISTRO)
+            else:
+                # Línea larga: se parte en varias sin cortar palabras
+                rect = metricas.boundingRect(QRect(0, 0, self.ancho, self.alto),
+                                             Qt.TextFlag.TextWordWrap, linea)
+                self._espacio(rect.height())
+                self.painter.setFont(font)
+                self.painter.setPen(COLOR_REGISTRO)
+                self.painter.drawText(QRect(0, self.y, self.ancho, rect.height()),
+                                      Qt.TextFlag.TextWordWrap, linea)
+                self.y += rect.height()
+            self.hechos += 1
+
+
+def exportar_pdf(ruta, codigo, tokens, registro=(), progreso=None, cancelar=None):
+    """Genera el informe con InformePDF y devuelve la cantidad de páginas."""
+    return InformePDF(codigo, tokens, registro, progreso=progreso, cancelar=cancelar).exportar(ruta)
@@ -1,14 +1,23 @@
 import sys
-from PySide6.QtGui import QColor, QPainter, QTextFormat, QFont, QFontMetrics, QTextDocument, QTextCursor, QPageSize, QTextCharFormat, QTextFrameFormat, QTextTableFormat, QTextBlockFormat
-from PySide6.QtPrintSupport import QPrinter
-from PySide6.QtWidgets import (QApplication, QTableWidget,
-                               QTableWidgetItem, QMainWindow, QWidget, QGridLayout, QPlainTextEdit, QFileDialog, QMessageBox, QSplitter, QTabWidget)
-from PySide6.QtCore import Qt, QRect, QSize, Slot, QDateTime
-
-from analizador import analizar_codigo
-from sintactico import AnalizadorSintactico
+from itertools import chain
+from PySide6.QtGui import QPainter, QTextFormat
+from PySide6.QtWidgets import (QApplication, QTableView, QHeaderView, QLineEdit, QComboBox,
+                               QHBoxLayout, QVBoxLayout, QMainWindow, QWidget, QGridLayout, QPlainTextEdit, QFileDialog, QMessageBox, QSplitter, QTabWidget,
+                               QProgressBar, QProgressDialog, QPushButton)
+from PySide6.QtCore import Qt, QRect, QSize, Slot, QThreadPool
+
+from analizador import TIPO_ERROR, combinar_ediciones, diagnosticos_lexicos
+from cache_resultados import CacheMemoria
 from editor import CodeEditor
 from error_log_terminal import ErrorLogTerminal
+from exportadores import ESCRITORES, exportar_resultados
+from informe_pdf import ExportacionCancelada, exportar_pdf
+from trabajador import TareaAnalisis
+from modelo_tokens import ModeloTokens, FiltroTokens
+
+# Tokens del análisis léxico que se listan en el registro, uno por línea; los
+# anteriores se resumen en una línea (deja lugar en ErrorLogTerminal.MAX_PENDING)
+MAX_TOKENS_REGISTRO = 1000
 
 class AnalizadorLexicoUI(QMainWindow):
     def __init__(self):
@@ -40,12 +49,37 @@ class AnalizadorLexicoUI(QMainWindow):
         self.texto_codigo.setStyleSheet("background-color: #f0f0f0; color: #000000;")
         #layout.addWidget(self.texto_codigo)
         
-        # Tabla de resultados
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(6)
-        self.tabla.setHorizontalHeaderLabels(["ID", "Lexema", "Línea", "Columna", "Patrón", "Reservada"])
+        # Tabla de resultados (vista sobre la lista de tokens, sin copiarla)
+        self.modelo_tokens = ModeloTokens(self)
+        self.proxy_tokens = FiltroTokens(self)
+        self.proxy_tokens.setSourceModel(self.modelo_tokens)
+        self.tabla = QTableView()
+        self.tabla.setModel(self.proxy_tokens)
+        self.tabla.setSortingEnabled(True)
+        self.tabla.sortByColumn(-1, Qt.SortOrder.AscendingOrder)  # Orden original hasta que se pulse un encabezado
+        # Filas de alto fijo: la vista no necesita medir cada fila
+        self.tabla.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tabla.verticalHeader().setDefaultSectionSize(self.tabla.fontMetrics().height() + 6)
         #layout.addWidget(self.tabla)
 
+        # Filtro por ID o Patrón
+        self.texto_filtro = QLineEdit()
+        self.texto_filtro.setPlaceholderText("Filtrar...")
+        self.columna_filtro = QComboBox()
+        self.columna_filtro.addItem("ID", 0)
+        self.columna_filtro.addItem("Patrón", 4)
+        self.texto_filtro.textChanged.connect(self.aplicar_filtro_tabla)
+        self.columna_filtro.currentIndexChanged.connect(self.aplicar_filtro_tabla)
+        filtro_layout = QHBoxLayout()
+        filtro_layout.setContentsMargins(0, 0, 0, 0)
+        filtro_layout.addWidget(self.columna_filtro)
+        filtro_layout.addWidget(self.texto_filtro)
+        panel_tabla = QWidget()
+        panel_tabla_layout = QVBoxLayout(panel_tabla)
+        panel_tabla_layout.setContentsMargins(0, 0, 0, 0)
+        panel_tabla_layout.addLayout(filtro_layout)
+        panel_tabla_layout.addWidget(self.tabla)
+
         # Terminal
         #self.terminal = QTextEdit(self)
         #self.terminal.setPlaceholderText("Salida de la terminal...")
@@ -61,7 +95,7 @@ class AnalizadorLexicoUI(QMainWindow):
         self.tabs.setTabPosition(QTabWidget.TabPosition.North)
         self.tabs.setTabShape(QTabWidget.TabShape.Rounded)
         self.tabs.addTab(self.error_log, "Historial")
-        self.tabs.addTab(self.tabla, "Tabla de Resultados")
+        self.tabs.addTab(panel_tabla, "Tabla de Resultados")
         # --- Splitter para dividir Editor y Log ---
         splitter = QSplitter(Qt.Orientation.Vertical)
         splitter.addWidget(self.texto_codigo)         # Área superior en el splitter
@@ -79,9 +113,40 @@ class AnalizadorLexicoUI(QMainWindow):
         file_menu.addAction("&Open", self.abrir_archivo)
         file_menu.addAction("&Save", self.guardar_archivo)
         file_menu.addAction("&Exportar a PDF", self.exportar_a_pdf)
+        file_menu.addAction("Exportar &resultados (CSV, JSONL, columnar)", self.exportar_resultados)
         analizar_menu = menu.addMenu("&Analizar")
         analizar_menu.addAction("&Lexico", self.procesar_codigo)
         analizar_menu.addAction("&Sintactico", self.procesar_codigo2)
+        analizar_menu.addAction("&Cancelar", self.cancelar_analisis)
+        accion_en_vivo = analizar_menu.addAction("En &vivo")
+        accion_en_vivo.setCheckable(True)
+        accion_en_vivo.toggled.connect(self.texto_codigo.setAnalisisEnVivo)
+        self.texto_codigo.analisisSolicitado.connect(self.analisis_en_vivo)
+
+        # --- Análisis en segundo plano ---
+        self.pool = QThreadPool(self)
+        self.tarea_actual = None
+        self.id_tarea = 0  # Identifica cada tarea; se descartan las señales de las anteriores
+        self.barra_progreso = QProgressBar()
+        self.barra_progreso.setRange(0, 100)
+        self.barra_progreso.setMaximumWidth(200)
+        self.boton_cancelar = QPushButton("Cancelar")
+        self.boton_cancelar.clicked.connect(self.cancelar_analisis)
+        self.statusBar().addPermanentWidget(self.barra_progreso)
+        self.statusBar().addPermanentWidget(self.boton_cancelar)
+        self.barra_progreso.hide()
+        self.boton_cancelar.hide()
+        # Editar el código invalida el análisis en curso
+        self.texto_codigo.textChanged.connect(self.cancelar_analisis)
+
+        # Relexado incremental: último texto analizado, sus tokens y la edición
+        # acumulada desde entonces (posicion, eliminados, agregados)
+        self.ultimo_analisis = None
+        self.edicion_pendiente = None
+        self.texto_codigo.document().contentsChange.connect(self.registrar_edicion)
+        # Resultados de la sesión por contenido del búfer: Léxico, Sintáctico y
+        # las exportaciones no vuelven a analizar un texto ya analizado
+        self.cache_analisis = CacheMemoria()
 
         
 
@@ -103,59 +168,176 @@ class AnalizadorLexicoUI(QMainWindow):
                 self.error_log.add_message(f"Archivo guardado: {self.archivo_actual}", level="INFO")
 
     def procesar_codigo(self):
-        codigo = self.texto_codigo.toPlainText()
-        tokens = analizar_codigo(codigo)
+        self.iniciar_analisis(sintactico=False)
+
+    def procesar_codigo2(self):
+        self.iniciar_analisis(sintactico=True)
+
+    @Slot()
+    def analisis_en_vivo(self):
+        self.iniciar_analisis(sintactico=True, en_vivo=True)
+
+    @Slot(int, int, int)
+    def registrar_edicion(self, posicion, eliminados, agregados):
+        edicion = (posicion, eliminados, agregados)
+        if self.edicion_pendiente is None:
+            self.edicion_pendiente = edicion
+        else:
+            self.edicion_pendiente = combinar_ediciones(self.edicion_pendiente, edicion)
+
+    def iniciar_analisis(self, sintactico, en_vivo=False, al_terminar=None):
+        # Un análisis nuevo reemplaza al que esté en curso
+        self.cancelar_analisis()
+        self.id_tarea += 1
+        previo = None
+        if self.ultimo_analisis is not None and self.edicion_pendiente is not None:
+            previo = self.ultimo_analisis + (self.edicion_pendiente,)
+        tarea = TareaAnalisis(self.id_tarea, self.texto_codigo.toPlainText(), sintactico, previo,
+                              cache=self.cache_analisis)
+        tarea.en_vivo = en_vivo
+        tarea.al_terminar = al_terminar
+        tarea.senales.progreso.connect(self.actualizar_progreso)
+        tarea.senales.terminado.connect(self.analisis_terminado)
+        tarea.senales.cancelado.connect(self.analisis_cancelado)
+        tarea.senales.fallo.connect(self.analisis_fallido)
+        self.tarea_actual = tarea
+        if not en_vivo:
+            self.barra_progreso.setValue(0)
+            self.barra_progreso.show()
+            self.boton_cancelar.show()
+            self.statusBar().showMessage("Analizando...")
+        self.pool.start(tarea)
+
+    @Slot()
+    def cancelar_analisis(self):
+        if self.tarea_actual is not None:
+            tarea = self.tarea_actual
+            tarea.cancelar()
+            self.finalizar_tarea()
+            if not tarea.en_vivo:  # En vivo se cancela en cada edición
+                self.error_log.add_message("Análisis cancelado.", level="WARN")
+
+    def finalizar_tarea(self):
+        self.tarea_actual = None
+        self.barra_progreso.hide()
+        self.boton_cancelar.hide()
+        self.statusBar().clearMessage()
+
+    def es_tarea_actual(self, id_tarea):
+        # Descarta señales de tareas canceladas o reemplazadas
+        return self.tarea_actual is not None and self.tarea_actual.id_tarea == id_tarea
+
+    @Slot(int, int)
+    def actualizar_progreso(self, id_tarea, porcentaje):
+        if self.es_tarea_actual(id_tarea):
+            self.barra_progreso.setValue(porcentaje)
+
+    @Slot(int)
+    def analisis_cancelado(self, id_tarea):
+        pass  # Ya se informó al pedir la cancelación
+
+    @Slot(int, str)
+    def analisis_fallido(self, id_tarea, mensaje):
+        if not self.es_tarea_actual(id_tarea):
+            return
+        self.finalizar_tarea()
+        print(f"Error crítico: {mensaje}")
+        self.error_log.add_message(f"Error crítico: {mensaje}", level="ERROR")
+
+    @Slot(int, object)
+    def analisis_terminado(self, id_tarea, resultado):
+        if not self.es_tarea_actual(id_tarea):
+            return  # Resultado de un análisis cancelado o reemplazado
+        en_vivo = self.tarea_actual.en_vivo
+        al_terminar = self.tarea_actual.al_terminar
+        self.finalizar_tarea()
+        # Cualquier edición cancela la tarea, así que el texto no cambió desde
+        # que empezó: sirve como punto de partida del próximo relexado
+        self.ultimo_analisis = (resultado["codigo"], resultado["tokens"])
+        self.edicion_pendiente = None
+        # Subrayados y marcas en el margen: errores léxicos y, si hubo, sintácticos
+        self.texto_codigo.establecerDiagnosticos(
+            diagnosticos_lexicos(resultado["tokens"]) + (resultado["diagnosticos"] or []))
+        if al_terminar is not None:
+            # Análisis pedido por otra acción (p. ej. una exportación): sin volcar los tokens al registro
+            if resultado["tokens"] is not self.modelo_tokens.tokens:
+                self.dictio = [resultado["tokens"]]
+                self.actualizar_tabla(resultado["tokens"])
+            self.registrar_estado_cache(resultado["desde_cache"])
+            al_terminar(resultado)
+            return
+        if en_vivo:
+            self.mostrar_resultado_en_vivo(resultado["tokens"], resultado["errores"])
+            return
+        if resultado["errores"] is None:
+            self.mostrar_resultado_lexico(resultado["tokens"])
+        else:
+            self.mostrar_resultado_sintactico(resultado["tokens"], resultado["errores"])
+        self.registrar_estado_cache(resultado["desde_cache"])
+
+    def registrar_estado_cache(self, desde_cache=None):
+        if desde_cache == "completo":
+            self.error_log.add_message("Resultado reutilizado de la caché (el código no cambió).", level="DEBUG")
+        elif desde_cache == "parcial":
+            self.error_log.add_message("Tokens reutilizados de la caché.", level="DEBUG")
+        estadisticas = self.cache_analisis.estadisticas()
+        self.error_log.add_message(
+            f"Caché de análisis: {estadisticas['aciertos']} aciertos, {estadisticas['parciales']} parciales, "
+            f"{estadisticas['fallos']} fallos ({estadisticas['entradas']} entradas, "
+            f"{estadisticas['tokens']} tokens)", level="DEBUG")
+
+    def sincronizar_tabla(self, al_terminar, sintactico=False):
+        """
+        Deja en la tabla los tokens del texto actual del editor y después llama a
+        `al_terminar(resultado)` con el resultado de TareaAnalisis. La consulta a
+        la caché de análisis y, si el texto no se analizó, el análisis se hacen
+        en el pool de trabajo, sin bloquear la interfaz.
+        """
+        self.iniciar_analisis(sintactico, al_terminar=al_terminar)
+
+    def mostrar_resultado_en_vivo(self, tokens, errores):
+        # Sin registrar cada token: solo la tabla y un resumen en la barra de estado
+        self.dictio=[tokens]
+        self.actualizar_tabla(tokens)
+        errores_lexicos = sum(1 for token in tokens if token.tipo == TIPO_ERROR)
+        self.statusBar().showMessage(
+            f"Tokens: {len(tokens)} | Errores léxicos: {errores_lexicos} | Errores sintácticos: {len(errores)}")
+
+    def mostrar_resultado_lexico(self, tokens):
         self.dictio=[tokens]
         self.actualizar_tabla(tokens)
-        for token in tokens:
-            self.error_log.add_message(f"Token: {token['Lexema']}, ID: {token['ID']}, Línea: {token['Línea']}, Columna: {token['Columna']}, Patrón: {token['Patrón']}, Reservada: {'Sí' if token['Reservada'] else 'No'}", level="INFO")
+        # Solo se arman las líneas de los últimos MAX_TOKENS_REGISTRO tokens; los
+        # anteriores quedan en una línea que los cuenta, en su lugar del registro
+        omitidos = max(0, len(tokens) - MAX_TOKENS_REGISTRO)
+        self.error_log.add_messages(
+            (f"Token: {token.lexema}, ID: {token.id}, Línea: {token.linea}, Columna: {token.columna}, Patrón: {token.patron}, Reservada: {'Sí' if token.reservada else 'No'}"
+             for token in tokens[omitidos:]), level="INFO", omitted=omitidos,
+            summary=f"{omitidos} tokens emitidos (se listan solo los últimos {len(tokens) - omitidos})")
         self.error_log.add_message("Análisis léxico completado.", level="INFO")
         self.error_log.add_message(f"Tokens encontrados: {len(tokens)}", level="INFO")
-        
 
-    def actualizar_tabla(self, resultados):
-        self.tabla.setRowCount(len(resultados))
-        for row, resultado in enumerate(resultados):
-            self.tabla.setItem(row, 0, QTableWidgetItem(str(resultado["ID"])))
-            self.tabla.setItem(row, 1, QTableWidgetItem(resultado["Lexema"]))
-            self.tabla.setItem(row, 2, QTableWidgetItem(str(resultado["Línea"])))
-            self.tabla.setItem(row, 3, QTableWidgetItem(str(resultado["Columna"])))
-            self.tabla.setItem(row, 4, QTableWidgetItem(resultado["Patrón"]))
-            self.tabla.setItem(row, 5, QTableWidgetItem("Sí" if resultado["Reservada"] else "No"))
-
-                
-    def procesar_codigo2(self):
-        codigo = self.texto_codigo.toPlainText()
-        tokens = analizar_codigo(codigo)
-        
-        # Filtrar tokens irrelevantes
-        tokens_filtrados = [t for t in tokens if t['ID'] not in [
-            'whitespace', 
-            'comentario_linea', 
-            'comentario_bloque'
-        ]]
-        
-        try:
-            analizador = AnalizadorSintactico(tokens_filtrados)
-            errores = analizador.analizar()
-            if not errores:
-                print("¡Análisis sintáctico exitoso!")
-            else:
-                print("\nErrores encontrados:")
-                self.error_log.add_message("Errores encontrados:", level="ERROR")
-                for error in errores:
-                    print(error)
-                    self.error_log.add_message(error, level="ERROR")
-                    
-        except Exception as e:
-            print(f"Error crítico: {str(e)}")   
-            self.error_log.add_message(f"Error crítico: {str(e)}", level="ERROR")
+    def mostrar_resultado_sintactico(self, tokens_filtrados, errores):
+        if not errores:
+            print("¡Análisis sintáctico exitoso!")
+        else:
+            print("\nErrores encontrados:")
+            self.error_log.add_message("Errores encontrados:", level="ERROR")
+            for error in errores:
+                print(error)
+            self.error_log.add_messages(errores, level="ERROR")
         self.error_log.add_message(f"Tokens analizados: {len(tokens_filtrados)}", level="INFO")
         self.error_log.add_message(f"Errores encontrados: {len(errores)}", level="INFO")
-        self.error_log.add_message("Análisis sintáctico completado.", level="INFO") 
+        self.error_log.add_message("Análisis sintáctico completado.", level="INFO")
+
+    def actualizar_tabla(self, resultados):
+        self.modelo_tokens.establecer_tokens(resultados)
+
+    @Slot()
+    def aplicar_filtro_tabla(self):
+        self.proxy_tokens.establecer_filtro(self.texto_filtro.text(), self.columna_filtro.currentData())
 
     def exportar_a_pdf(self):
-        """Exporta el contenido del QPlainTextEdit a un archivo PDF"""
+        """Exporta el código, la tabla de tokens y el registro a un archivo PDF"""
         # Configurar el diálogo para guardar archivo
         file_dialog = QFileDialog()
         file_dialog.setAcceptMode(QFileDialog.AcceptMode.AcceptSave)
@@ -164,172 +346,70 @@ class AnalizadorLexicoUI(QMainWindow):
         
         if file_dialog.exec():
             file_path = file_dialog.selectedFiles()[0]
-            
-            # Crear el documento para PDF
-            document = QTextDocument()
-            cursor = QTextCursor(document)
-            
-            # Configurar formato del documento
-            font = QFont()
-            font.setPointSize(10)
-            document.setDefaultFont(font)
-            
-            # --- Estilos predefinidos ---
-            # Estilo para título principal
-            title_format = QTextCharFormat()
-            title_format.setFontPointSize(16)
-            title_format.setFontWeight(QFont.Weight.Bold)
-            title_format.setVerticalAlignment(QTextCharFormat.AlignMiddle)
-            
-            # Estilo para encabezados de sección
-            section_format = QTextCharFormat()
-            section_format.setFontPointSize(12)
-            section_format.setFontWeight(QFont.Weight.Bold)
-            section_format.setForeground(QColor(0, 0, 139))  # Azul oscuro
-            section_format.setUnderlineStyle(QTextCharFormat.SingleUnderline)
-            
-            # Estilo para código
-            code_format = QTextCharFormat()
-            code_format.setFontFamily("Courier New")
-            code_format.setFontPointSize(10)
-            
-            # Fondo para bloque de código
-            code_block_format = QTextBlockFormat()
-            code_block_format.setBackground(QColor(240, 240, 240))
-            code_block_format.setTopMargin(10)
-            code_block_format.setBottomMargin(10)
-            code_block_format.setLeftMargin(10)
-            code_block_format.setRightMargin(10)
-            
-            # Estilo para tabla
-            table_format = QTextCharFormat()
-            table_format.setFontPointSize(9)
-            
-            # Estilo para logs de error
-            error_format = QTextCharFormat()
-            error_format.setFontPointSize(9)
-            error_format.setFontItalic(True)
-            error_format.setForeground(QColor(139, 0, 0))  # Rojo oscuro
-
-            
-            # --- Contenido del PDF ---
-            # Título del documento
-            cursor.setCharFormat(title_format)
-            cursor.insertText("Informe Completo\n")
-            
-            # Fecha
-            normal_format = QTextCharFormat()
-            normal_format.setFontPointSize(10)
-            cursor.setCharFormat(normal_format)
-            cursor.insertText(f"Generado el: {QDateTime.currentDateTime().toString('dd/MM/yyyy HH:mm')}\n\n")
-            
-            # Sección 1: Código fuente
-            cursor.setCharFormat(section_format)
-            cursor.insertText("CÓDIGO FUENTE\n")
-            
-            # Bloque de código con fondo
-            cursor.insertBlock(code_block_format)
-            cursor.setCharFormat(code_format)
-            cursor.insertText(self.texto_codigo.toPlainText())
-            cursor.insertBlock()  # Nueva línea sin fondo
-            
-            # Espacio entre secciones
-            cursor.setCharFormat(normal_format)
-            cursor.insertText("\n\n")
-            
-            # Sección 2: Datos tabulares
-            cursor.insertText("DATOS TABULARES\n", section_format)
-            cursor.insertText("\n")
-
-            # Crear tabla en el PDF
-            table = cursor.insertTable(
-                self.tabla.rowCount() + 1,  # +1 para encabezados
-                self.tabla.columnCount(),
-                QTextTableFormat()
-            )
-            
-            # Formato de la tabla
-            table_format = table.format()
-            table_format.setHeaderRowCount(1)
-            table_format.setBorder(1)
-            table_format.setBorderStyle(QTextFrameFormat.BorderStyle_Solid)
-            table_format.setCellSpacing(2)
-            table_format.setCellPadding(5)
-            table_format.setAlignment(Qt.AlignmentFlag.AlignLeft)
-            table.setFormat(table_format)
-            
-            # Crear formato para encabezados
-            header_format = QTextCharFormat()
-            header_format.setFontWeight(QFont.Weight.Bold)
-            header_format.setBackground(QColor(220, 220, 220))
-            header_format.setFontPointSize(10)
-            
-            # Crear formato para datos
-            data_format = QTextCharFormat()
-            data_format.setFontPointSize(9)
-            
-            # Llenar encabezados de tabla
-            for col in range(self.tabla.columnCount()):
-                header_item = self.tabla.horizontalHeaderItem(col)
-                if header_item:  # Verificar si el encabezado existe
-                    cell = table.cellAt(0, col)
-                    cell_cursor = cell.firstCursorPosition()
-                    cell_cursor.setCharFormat(header_format)
-                    cell_cursor.insertText(header_item.text())
-            
-            # Llenar datos de la tabla
-            for row in range(self.tabla.rowCount()):
-                for col in range(self.tabla.columnCount()):
-                    cell = table.cellAt(row + 1, col)  # +1 por la fila de encabezado
-                    cell_cursor = cell.firstCursorPosition()
-                    cell_cursor.setCharFormat(data_format)
-            
-                    item = self.tabla.item(row, col)
-                    if item and item.text():  # Verificar si el item existe y tiene texto
-                        cell_cursor.insertText(item.text())
-                    else:
-                        cell_cursor.insertText("-")  # Marcador para celdas vacías
-            
-            cursor.movePosition(QTextCursor.MoveOperation.End)
-            cursor.insertText("\n\n")
-            
-            # Sección 3: Logs de error
-            cursor.insertText("REGISTRO DE ERRORES\n", section_format)
-            cursor.insertText("\n")
-            
-            # Insertar logs con formato especial
-            cursor.insertBlock(code_block_format)
-            cursor.setCharFormat(error_format)
-            cursor.insertText(self.error_log.get_log_text())
-            cursor.insertText("\n\n")
-            #error_block.mergeCharFormat(error_format)
-
-            #Este es el bloque de código que se encarga de insertar la tabla de resultados y el log de errores en el PDF
-            #table1 = self.tabla
-            #cursor.insertText("Tabla de Resultados\n\n")
-            #for row in range(table1.rowCount()):
-            #    for col in range(table1.columnCount()):
-            #        cursor.insertText(table1.item(row, col).text() + "\t")
-            #    cursor.insertText("\n")
-            #cursor.insertText(ErrorLogTerminal.get_log_text(self.error_log) + "\n\n")
-            
-            # Configurar la impresora (PDF)
-            printer = QPrinter(QPrinter.PrinterMode.HighResolution)
-            printer.setOutputFormat(QPrinter.OutputFormat.PdfFormat)
-            printer.setOutputFileName(file_path)
-            printer.setPageSize(QPageSize(QPageSize.PageSizeId.A4))
-            #printer.setPageMargins(15, 15, 15, 15, QPrinter.Unit.Millimeter)
-            
-            # Exportar a PDF
-            document.print_(printer)
-            
-            # Mostrar mensaje de éxito
-            QMessageBox.information(self, "Éxito", 
-                                  f"El archivo PDF se ha guardado correctamente en:\n{file_path}")
+            # La tabla exportada corresponde al código actual, aunque no se haya vuelto a analizar
+            self.sincronizar_tabla(lambda resultado: self.escribir_pdf(file_path, resultado))
         else:
             QMessageBox.warning(self, "Advertencia", 
                               "La operación de exportación ha sido cancelada.")
-        
+
+    def escribir_pdf(self, file_path, resultado):
+        """Genera el PDF una vez que la tabla tiene los tokens de `resultado`"""
+        # Las páginas se pintan a medida que se recorren los tokens (con el
+        # orden y filtro de la vista); el diálogo permite cancelar entre páginas
+        progreso = QProgressDialog("Exportando a PDF...", "Cancelar", 0, 0, self)
+        progreso.setWindowModality(Qt.WindowModality.WindowModal)
+        progreso.setMinimumDuration(500)
+
+        def avanzar(hechos, total):
+            progreso.setMaximum(total)
+            progreso.setValue(hechos)
+
+        try:
+            paginas = exportar_pdf(file_path, resultado["codigo"],
+                                   self.proxy_tokens.tokens_en_vista(),
+                                   self.error_log.get_log_text().splitlines(),
+                                   progreso=avanzar, cancelar=progreso.wasCanceled)
+        except ExportacionCancelada:
+            QMessageBox.warning(self, "Advertencia", "La exportación a PDF se canceló.")
+            return
+        except OSError as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        finally:
+            progreso.close()
+
+        # Mostrar mensaje de éxito
+        QMessageBox.information(self, "Éxito", 
+                              f"El archivo PDF ({paginas} páginas) se ha guardado correctamente en:\n{file_path}")
+
+    def exportar_resultados(self):
+        """Exporta los tokens y errores del código actual a CSV, JSON Lines o el formato columnar"""
+        filtros = {"CSV (*.csv)": "csv", "JSON Lines (*.jsonl)": "jsonl",
+                   "Columnar (*.clxc)": "columnar"}
+        file_path, filtro = QFileDialog.getSaveFileName(self, "Exportar resultados", "", ";;".join(filtros))
+        if not file_path:
+            return
+        formato = filtros[filtro]
+        if not file_path.lower().endswith("." + ESCRITORES[formato].extension):
+            file_path += "." + ESCRITORES[formato].extension
+
+        # La tarea reutiliza el análisis de la sesión (una sola consulta a la
+        # caché) y hace el sintáctico en el pool solo si falta
+        self.sincronizar_tabla(lambda resultado: self.escribir_resultados(file_path, formato, resultado),
+                               sintactico=True)
+
+    def escribir_resultados(self, file_path, formato, resultado):
+        tokens, diagnosticos = resultado["tokens"], resultado["diagnosticos"]
+        try:
+            # escribir_resultados solo recorre los errores: no hace falta juntarlos en una lista
+            exportar_resultados(file_path, tokens, chain(diagnosticos_lexicos(tokens), diagnosticos), formato)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", str(e))
+            return
+        self.error_log.add_message(
+            f"Resultados exportados a {file_path}: {len(tokens)} tokens, {len(diagnosticos)} errores sintácticos.",
+            level="INFO")
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,165 @@
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import chain
+
+from almacen_tokens import AlmacenTokens
+from analizador import NOMBRES_TIPO, TIPO_ERROR, Lexer, obtener_lexer
+from cache_resultados import MAX_BYTES, obtener_cache
+from sintactico import MAX_ERRORES, AnalizadorSintactico
+
+EXTENSIONES = (".java",)
+# Desde este tamaño los archivos se analizan mapeados en memoria (ver analizar_mapeado)
+UMBRAL_MAPEO = 64 * 1024 * 1024
+
+# Lexer del proceso trabajador (se crea una vez en _iniciar_trabajador)
+_lexer = None
+
+
+def buscar_archivos(rutas, extensiones=EXTENSIONES):
+    """Recorre archivos y directorios y genera las rutas de los archivos fuente."""
+    for ruta in rutas:
+        if os.path.isdir(ruta):
+            for carpeta, subcarpetas, archivos in os.walk(ruta):
+                subcarpetas.sort()
+                for nombre in sorted(archivos):
+                    if nombre.endswith(extensiones):
+                        yield os.path.join(carpeta, nombre)
+        else:
+            yield ruta
+
+
+def _iniciar_trabajador():
+    global _lexer
+    _lexer = Lexer()
+
+
+def analizar_mapeado(ruta, codificacion="utf-8", max_errores=MAX_ERRORES, lexer=None):
+    """
+    Análisis léxico y sintáctico de un archivo mapeado en memoria, para fuentes
+    muy grandes: el texto nunca se decodifica completo y los tokens se guardan
+    como desplazamientos en bytes sobre el mapeo (ver AlmacenTokens.mapear).
+    El sintáctico consume los tokens a medida que se generan.
+    Devuelve (almacen, errores).
+    """
+    almacen = AlmacenTokens.mapear(ruta, codificacion)
+    return almacen, _analizar_almacen(almacen, max_errores, lexer)
+
+
+def _analizar_almacen(almacen, max_errores, lexer=None):
+    tokens = almacen.iter_extender_mapeado(lexer or _lexer)
+    errores = AnalizadorSintactico(tokens, max_errores=max_errores, construir_arbol=False).analizar()
+    for _ in tokens:  # Los tokens que el sintáctico no llegó a pedir
+        pass
+    return errores
+
+
+def analizar_archivo(ruta, max_errores=MAX_ERRORES, ruta_cache=None, max_bytes_cache=MAX_BYTES,
+                     umbral_mapeo=UMBRAL_MAPEO):
+    """
+    Ejecuta el análisis léxico y sintáctico de un archivo.
+    Devuelve un dict con el conteo de tokens por ID y los errores encontrados.
+    Con `ruta_cache`, los resultados se buscan y guardan en esa caché
+    (ver cache_resultados) y un archivo sin cambios no se vuelve a analizar.
+    Los archivos de `umbral_mapeo` bytes o más se analizan con analizar_mapeado().
+    """
+    lexer = _lexer or obtener_lexer()
+    resultado = {"archivo": ruta, "tokens": 0, "por_tipo": {}, "errores_lexicos": 0, "errores": []}
+    almacen = None
+    try:
+        if os.path.getsize(ruta) >= umbral_mapeo:
+            almacen = AlmacenTokens.mapear(ruta)
+            contenido = almacen.codigo
+        else:
+            with open(ruta, "rb") as archivo:
+                contenido = archivo.read()
+    except OSError as e:
+        resultado["errores"].append(f"Error al leer el archivo: {e}")
+        return resultado
+
+    if ruta_cache is not None:
+        cache = obtener_cache(ruta_cache, max_bytes_cache)
+        clave = cache.clave(contenido, max_errores)
+        guardado = cache.obtener(clave)
+        if guardado is not None:
+            resultado["errores"] = guardado["errores"]
+            resultado["por_tipo"] = guardado["por_tipo"]
+            resultado["tokens"] = sum(guardado["por_tipo"].values())
+            resultado["errores_lexicos"] = resultado["por_tipo"].get(NOMBRES_TIPO[TIPO_ERROR], 0)
+            return resultado
+
+    if almacen is not None:
+        resultado["errores"] = _analizar_almacen(almacen, max_errores, lexer)
+        resultado["tokens"] = len(almacen)
+        resultado["por_tipo"] = almacen.contar_por_tipo()
+        resultado["errores_lexicos"] = resultado["por_tipo"].get(NOMBRES_TIPO[TIPO_ERROR], 0)
+    else:
+        # Igual que al abrir en modo texto: saltos de línea universales
+        codigo = contenido.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+        tokens = lexer.analizar(codigo)
+        por_tipo = Counter(token.tipo for token in tokens)
+        resultado["tokens"] = len(tokens)
+        resultado["por_tipo"] = {NOMBRES_TIPO[tipo]: cantidad for tipo, cantidad in por_tipo.items()}
+        resultado["errores_lexicos"] = por_tipo.get(TIPO_ERROR, 0)
+        resultado["errores"] = AnalizadorSintactico(tokens, max_errores=max_errores,
+                                                    construir_arbol=False).analizar()
+        if ruta_cache is not None:
+            almacen = AlmacenTokens(codigo)
+            almacen.extender(tokens)
+    if ruta_cache is not None:
+        cache.guardar(clave, almacen, resultado["errores"])
+    return resultado
+
+
+def _analizar_grupo(rutas, max_errores, ruta_cache, max_bytes_cache):
+    """
+    Analiza un grupo de archivos en el proceso actual. Al terminar escribe en
+    la caché los usos pendientes del grupo: los trabajadores del pool terminan
+    sin ejecutar atexit, y lo que quedara en CacheResultados._usos se perdería.
+    """
+    resultados = [analizar_archivo(ruta, max_errores, ruta_cache, max_bytes_cache) for ruta in rutas]
+    if ruta_cache is not None:
+        obtener_cache(ruta_cache, max_bytes_cache).registrar_usos()
+    return resultados
+
+
+def analizar_lote(rutas, procesos=None, tam_lote=None, max_errores=MAX_ERRORES, ruta_cache=None,
+                  max_bytes_cache=MAX_BYTES):
+    """
+    Analiza todos los archivos de `rutas` repartiéndolos en un pool de procesos.
+    Args:
+        rutas (list): Archivos o directorios a recorrer.
+        procesos (int): Cantidad de procesos (por defecto, los núcleos disponibles).
+                        Con 1 se analiza en el proceso actual.
+        tam_lote (int): Archivos enviados a cada trabajador por vez.
+        max_errores (int): Errores sintácticos a reportar como máximo por archivo.
+        ruta_cache (str): Base de la caché de resultados (por defecto, sin caché).
+        max_bytes_cache (int): Tamaño máximo de la caché antes de desalojar entradas.
+    Devuelve un dict con los resultados por archivo y los totales.
+    """
+    archivos = list(buscar_archivos(rutas))
+    procesos = procesos or os.cpu_count() or 1
+    analizar = partial(_analizar_grupo, max_errores=max_errores, ruta_cache=ruta_cache,
+                       max_bytes_cache=max_bytes_cache)
+
+    if procesos == 1 or len(archivos) <= 1:
+        resultados = analizar(archivos)
+    else:
+        # Cada tarea es un grupo de tam_lote archivos, que se cierra registrando sus usos en la caché
+        tam_lote = tam_lote or max(1, len(archivos) // (procesos * 4))
+        grupos = [archivos[i:i + tam_lote] for i in range(0, len(archivos), tam_lote)]
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador) as pool:
+            resultados = list(chain.from_iterable(pool.map(analizar, grupos)))
+
+    por_tipo = Counter()
+    for resultado in resultados:
+        por_tipo.update(resultado["por_tipo"])
+    return {
+        "archivos": resultados,
+        "total_archivos": len(resultados),
+        "total_tokens": sum(resultado["tokens"] for resultado in resultados),
+        "total_errores_lexicos": sum(resultado["errores_lexicos"] for resultado in resultados),
+        "total_errores_sintacticos": sum(len(resultado["errores"]) for resultado in resultados),
+        "por_tipo": dict(por_tipo),
+    }
@@ -0,0 +1,176 @@
+import argparse
+import json
+import sys
+import time
+
+from analizador import TIPO_ERROR, analizar_codigo, diagnosticos_lexicos, iter_tokens
+from cache_resultados import MAX_BYTES
+from exportadores import ESCRITORES, exportar_resultados
+from lote import analizar_lote
+from sintactico import MAX_ERRORES, AnalizadorSintactico
+
+
+def comando_analizar(args):
+    clase = ESCRITORES[args.formato]
+    escritor = clase(sys.stdout.buffer if clase.binario else sys.stdout)
+    errores_lexicos = 0
+
+    def escribir_tokens(tokens):
+        # Cada token se escribe a medida que el analizador sintáctico lo pide
+        nonlocal errores_lexicos
+        for token in tokens:
+            if token.tipo == TIPO_ERROR:
+                errores_lexicos += 1
+            escritor.token(token)
+            yield token
+
+    try:
+        if args.archivo == "-":
+            entrada = sys.stdin
+        else:
+            entrada = open(args.archivo, "r", encoding=args.codificacion)
+        with entrada:
+            tokens = escribir_tokens(iter_tokens(entrada))
+            diagnosticos = []
+            if not args.solo_lexico:
+                # El árbol solo se conserva si se pidió guardarlo
+                analizador = AnalizadorSintactico(tokens, max_errores=args.max_errores,
+                                                  construir_arbol=bool(args.arbol))
+                analizador.analizar()
+                diagnosticos = analizador.diagnosticos
+                if args.arbol:
+                    analizador.arbol.guardar(args.arbol)
+            for _ in tokens:  # Escribir los tokens que el analizador no llegó a pedir
+                pass
+        for linea, columna, _, mensaje in diagnosticos:
+            escritor.error(mensaje, linea, columna)
+    except BaseException:
+        # Errores de lectura o Ctrl+C: no dejar los segmentos temporales del escritor
+        escritor.descartar()
+        raise
+    escritor.cerrar()
+    return 1 if errores_lexicos or diagnosticos else 0
+
+
+def comando_lote(args):
+    inicio = time.perf_counter()
+    resumen = analizar_lote(args.rutas, procesos=args.procesos, tam_lote=args.tam_lote,
+                            max_errores=args.max_errores, ruta_cache=args.cache,
+                            max_bytes_cache=args.cache_max_mb * 1024 * 1024)
+    duracion = time.perf_counter() - inicio
+
+    if args.formato == "jsonl":
+        for resultado in resumen["archivos"]:
+            sys.stdout.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+        return 1 if resumen["total_errores_lexicos"] or resumen["total_errores_sintacticos"] else 0
+
+    for resultado in resumen["archivos"]:
+        for error in resultado["errores"]:
+            print(f"{resultado['archivo']}: {error}")
+    print(f"Archivos analizados: {resumen['total_archivos']}")
+    print(f"Tokens encontrados: {resumen['total_tokens']}")
+    print(f"Errores léxicos: {resumen['total_errores_lexicos']}")
+    print(f"Errores sintácticos: {resumen['total_errores_sintacticos']}")
+    if duracion > 0:
+        print(f"Tiempo: {duracion:.2f} s ({resumen['total_archivos'] / duracion:.1f} archivos/s)")
+    return 1 if resumen["total_errores_lexicos"] or resumen["total_errores_sintacticos"] else 0
+
+
+def comando_exportar(args):
+    with open(args.archivo, "r", encoding=args.codificacion) as archivo:
+        codigo = archivo.read()
+    tokens = analizar_codigo(codigo)
+    errores = diagnosticos_lexicos(tokens)
+    if not args.solo_lexico:
+        analizador = AnalizadorSintactico(tokens, max_errores=args.max_errores, construir_arbol=False)
+        analizador.analizar()
+        errores.extend(analizador.diagnosticos)
+    exportar_resultados(args.salida, tokens, errores, args.formato)
+    return 1 if errores else 0
+
+
+def comando_informe(args):
+    # Qt se importa solo aquí: el resto de los comandos no necesita PySide6
+    from informe_pdf import aplicacion_sin_ventanas, exportar_pdf
+    aplicacion_sin_ventanas()
+
+    with open(args.archivo, "r", encoding=args.codificacion) as archivo:
+        codigo = archivo.read()
+    tokens = analizar_codigo(codigo)
+    registro = [mensaje for _, _, _, mensaje in diagnosticos_lexicos(tokens)]
+    errores = []
+    if not args.solo_lexico:
+        errores = AnalizadorSintactico(tokens, max_errores=args.max_errores, construir_arbol=False).analizar()
+        registro.extend(errores)
+    paginas = exportar_pdf(args.salida, codigo, tokens, registro)
+    print(f"{args.salida}: {paginas} páginas, {len(tokens)} tokens, {len(registro)} errores", file=sys.stderr)
+    return 1 if registro else 0
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(prog="compLex", description="Analizador léxico y sintáctico de Java")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    analizar = subcomandos.add_parser("analizar", help="Analiza un archivo (o stdin) y escribe tokens y errores")
+    analizar.add_argument("archivo", nargs="?", default="-", help="Archivo Java ('-' o vacío para stdin)")
+    analizar.add_argument("-f", "--formato", choices=sorted(ESCRITORES), default="jsonl",
+                          help="Formato de salida (por defecto jsonl)")
+    analizar.add_argument("--solo-lexico", action="store_true", help="Omite el análisis sintáctico")
+    analizar.add_argument("--codificacion", default="utf-8", help="Codificación del archivo de entrada")
+    analizar.add_argument("--max-errores", type=int, default=MAX_ERRORES,
+                          help=f"Errores sintácticos a reportar como máximo (por defecto {MAX_ERRORES})")
+    analizar.add_argument("--arbol", metavar="RUTA",
+                          help="Guarda el árbol sintáctico en binario (se lee con ArbolSintactico.cargar)")
+    analizar.set_defaults(funcion=comando_analizar)
+
+    lote = subcomandos.add_parser("lote", help="Analiza directorios completos en paralelo")
+    lote.add_argument("rutas", nargs="+", help="Archivos o directorios con código Java")
+    lote.add_argument("-j", "--procesos", type=int, default=None,
+                      help="Cantidad de procesos (por defecto, todos los núcleos)")
+    lote.add_argument("--tam-lote", type=int, default=None,
+                      help="Archivos enviados a cada proceso por vez")
+    lote.add_argument("-f", "--formato", choices=["jsonl", "texto"], default="texto",
+                      help="jsonl escribe un registro por archivo")
+    lote.add_argument("--max-errores", type=int, default=MAX_ERRORES,
+                      help="Errores sintácticos a reportar como máximo por archivo")
+    lote.add_argument("--cache", metavar="RUTA",
+                      help="Base de la caché de resultados; los archivos sin cambios no se reanalizan")
+    lote.add_argument("--cache-max-mb", type=int, default=MAX_BYTES // (1024 * 1024),
+                      help="Tamaño máximo de la caché en MB")
+    lote.set_defaults(funcion=comando_lote)
+
+    exportar = subcomandos.add_parser("exportar", help="Exporta tokens y errores de un archivo a CSV, JSONL o columnar")
+    exportar.add_argument("archivo", help="Archivo Java")
+    exportar.add_argument("-o", "--salida", required=True,
+                          help="Archivo de salida (.csv, .jsonl o .clxc; la extensión elige el formato)")
+    exportar.add_argument("-f", "--formato", choices=sorted(ESCRITORES), default=None,
+                          help="Formato de salida, si no se deduce de la extensión")
+    exportar.add_argument("--solo-lexico", action="store_true", help="Omite el análisis sintáctico")
+    exportar.add_argument("--codificacion", default="utf-8", help="Codificación del archivo de entrada")
+    exportar.add_argument("--max-errores", type=int, default=MAX_ERRORES,
+                          help=f"Errores sintácticos a reportar como máximo (por defecto {MAX_ERRORES})")
+    exportar.set_defaults(funcion=comando_exportar)
+
+    informe = subcomandos.add_parser("informe", help="Genera el informe en PDF de un archivo, sin interfaz")
+    informe.add_argument("archivo", help="Archivo Java")
+    informe.add_argument("-o", "--salida", required=True, help="Ruta del PDF")
+    informe.add_argument("--solo-lexico", action="store_true", help="Omite el análisis sintáctico")
+    informe.add_argument("--codificacion", default="utf-8", help="Codificación del archivo de entrada")
+    informe.add_argument("--max-errores", type=int, default=MAX_ERRORES,
+                         help=f"Errores sintácticos a reportar como máximo (por defecto {MAX_ERRORES})")
+    informe.set_defaults(funcion=comando_informe)
+    return parser
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    return args.funcion(args)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except BrokenPipeError:
+        # La salida se cerró antes de tiempo (p. ej. `| head`)
+        sys.stderr.close()
+        sys.exit(1)
@@ -0,0 +1,96 @@
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+
+ENCABEZADOS = ["ID", "Lexema", "Línea", "Columna", "Patrón", "Reservada"]
+
+# Rol con el valor sin formato (enteros para Línea/Columna) usado para ordenar
+ROL_ORDEN = Qt.ItemDataRole.UserRole + 1
+
+
+def _valor(token, columna):
+    if columna == 0:
+        return token.id
+    if columna == 1:
+        return token.lexema
+    if columna == 2:
+        return token.linea
+    if columna == 3:
+        return token.columna
+    if columna == 4:
+        return token.patron
+    return token.reservada
+
+
+class ModeloTokens(QAbstractTableModel):
+    """
+    Modelo de solo lectura sobre la lista de tokens del analizador.
+    No crea un objeto por celda: la vista pide los datos de las filas visibles
+    y se leen directamente del token.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tokens = []
+
+    def establecer_tokens(self, tokens):
+        self.beginResetModel()
+        self.tokens = tokens
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.tokens)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(ENCABEZADOS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            valor = _valor(self.tokens[index.row()], index.column())
+            if index.column() == 5:
+                return "Sí" if valor else "No"
+            return str(valor)
+        if role == ROL_ORDEN:
+            return _valor(self.tokens[index.row()], index.column())
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return ENCABEZADOS[section]
+        return str(section + 1)
+
+
+class FiltroTokens(QSortFilterProxyModel):
+    """
+    Proxy de ordenamiento y filtrado por ID o Patrón. Solo guarda el mapeo de
+    filas; el filtro se evalúa directamente sobre los tokens del modelo fuente.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(ROL_ORDEN)
+        self.texto_filtro = ""
+        self.columna_filtro = 0  # 0 = ID, 4 = Patrón
+
+    def establecer_filtro(self, texto, columna=0):
+        self.texto_filtro = texto.lower()
+        self.columna_filtro = columna
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self.texto_filtro:
+            return True
+        token = self.sourceModel().tokens[source_row]
+        return self.texto_filtro in str(_valor(token, self.columna_filtro)).lower()
+
+    def tokens_en_vista(self):
+        """
+        Tokens en el orden y con el filtro de la vista. Sin filtro ni orden
+        devuelve la lista del modelo fuente tal cual, sin copiarla.
+        """
+        tokens = self.sourceModel().tokens
+        if not self.texto_filtro and self.sortColumn() < 0:
+            return tokens
+        return [tokens[self.mapToSource(self.index(fila, 0)).row()] for fila in range(self.rowCount())]
@@ -0,0 +1,133 @@
+import json
+import mmap
+import sys
+from array import array
+
+ALINEACION = 8
+TAM_COPIA = 1 << 20  # Bloque con el que se copian los datos que vienen de un archivo
+
+
+def alinear(n, alineacion=ALINEACION):
+    return (n + alineacion - 1) // alineacion * alineacion
+
+
+def partes(magia, version, cabecera, columnas, extras=()):
+    """
+    Genera, fragmento a fragmento, el formato binario común de los archivos de
+    compLex: `magia`, el largo de la cabecera (4 bytes), la cabecera JSON y,
+    alineados a 8 bytes, las columnas y después los extras.
+    Args:
+        cabecera (dict): Datos propios del formato. Se le agregan "version", "orden",
+                         "columnas" ([nombre, typecode, desplazamiento, cantidad]) y,
+                         por cada extra, su clave con [desplazamiento, largo].
+        columnas: Tuplas (nombre, typecode, cantidad, datos).
+        extras: Tuplas (clave, largo, datos) con bytes sin estructura (p. ej. el código).
+    `datos` es un buffer (array, bytes, memoryview) o un archivo binario, que
+    se copia desde el principio sin leerlo entero.
+    """
+    cabecera = dict(cabecera, version=version, orden=sys.byteorder)
+    cabecera["columnas"] = descripcion = []
+    desplazamiento = 0
+    for nombre, typecode, cantidad, _ in columnas:
+        descripcion.append([nombre, typecode, desplazamiento, cantidad])
+        desplazamiento = alinear(desplazamiento + cantidad * array(typecode).itemsize)
+    ubicaciones = []
+    for clave, largo, _ in extras:
+        desplazamiento = alinear(desplazamiento)
+        cabecera[clave] = [desplazamiento, largo]
+        ubicaciones.append(desplazamiento)
+        desplazamiento += largo
+    texto = json.dumps(cabecera, ensure_ascii=False).encode("utf-8")
+    inicio_datos = alinear(len(magia) + 4 + len(texto))
+
+    yield magia
+    yield len(texto).to_bytes(4, "little")
+    yield texto
+    yield bytes(inicio_datos - len(magia) - 4 - len(texto))
+    fin = 0
+    for (_, typecode, cantidad, datos), (_, _, desplazamiento, _) in zip(columnas, descripcion):
+        yield from _copiar(datos)
+        fin = desplazamiento + cantidad * array(typecode).itemsize
+        yield bytes(alinear(fin) - fin)
+        fin = alinear(fin)
+    for (_, largo, datos), desplazamiento in zip(extras, ubicaciones):
+        yield bytes(desplazamiento - fin)
+        yield from _copiar(datos)
+        fin = desplazamiento + largo
+
+
+def _copiar(datos):
+    if hasattr(datos, "read"):
+        datos.seek(0)
+        while bloque := datos.read(TAM_COPIA):
+            yield bloque
+    else:
+        yield datos
+
+
+def escribir(salida, *args, **kwargs):
+    """Escribe en el archivo `salida` lo que genera partes(...) sin juntarlo en memoria."""
+    for parte in partes(*args, **kwargs):
+        salida.write(parte)
+
+
+def leer(datos, magia, version, descripcion, extras=()):
+    """
+    Interpreta datos escritos con partes(). Si `datos` es un buffer (bytes,
+    mmap), las columnas y los extras son vistas sobre él y no se copian.
+    Devuelve (cabecera, {nombre: columna}, {clave: extra o None}).
+    Si los datos no tienen este formato o están truncados lanza ValueError.
+    """
+    vista = memoryview(datos)
+    if vista[:len(magia)] != magia or len(vista) < len(magia) + 4:
+        raise ValueError(f"Los datos no son {descripcion}")
+    largo_cabecera = int.from_bytes(vista[len(magia):len(magia) + 4], "little")
+    inicio_datos = alinear(len(magia) + 4 + largo_cabecera)
+    if inicio_datos > len(vista):
+        raise ValueError(f"Datos truncados ({descripcion})")
+    cabecera = json.loads(bytes(vista[len(magia) + 4:len(magia) + 4 + largo_cabecera]))
+    if (not isinstance(cabecera, dict) or cabecera.get("version") != version
+            or cabecera.get("orden") != sys.byteorder):
+        raise ValueError(f"Formato no compatible ({descripcion})")
+
+    # Tramos (desplazamiento, largo) descritos por la cabecera; el archivo debe
+    # llegar hasta el final del último, con el relleno de alineación incluido
+    tramos = {nombre: (desplazamiento, cantidad * array(typecode).itemsize, typecode)
+              for nombre, typecode, desplazamiento, cantidad in cabecera["columnas"]}
+    fin = max((alinear(desplazamiento + largo) for desplazamiento, largo, _ in tramos.values()), default=0)
+    for clave in extras:
+        if cabecera.get(clave) is not None:
+            desplazamiento, largo = cabecera[clave]
+            fin = max(fin, desplazamiento + largo)
+    if inicio_datos + fin > len(vista):
+        raise ValueError(f"Datos truncados ({descripcion})")
+
+    columnas = {nombre: vista[inicio_datos + desplazamiento:inicio_datos + desplazamiento + largo].cast(typecode)
+                for nombre, (desplazamiento, largo, typecode) in tramos.items()}
+    ubicados = {}
+    for clave in extras:
+        ubicados[clave] = None
+        if cabecera.get(clave) is not None:
+            desplazamiento, largo = cabecera[clave]
+            ubicados[clave] = vista[inicio_datos + desplazamiento:inicio_datos + desplazamiento + largo]
+    return cabecera, columnas, ubicados
+
+
+def cargar(ruta, desde_bytes):
+    """
+    Abre `ruta` mapeada en memoria y la interpreta con `desde_bytes`; el
+    objeto devuelto mantiene abierto el mapeo mientras se use.
+    """
+    with open(ruta, "rb") as archivo:
+        mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        objeto = desde_bytes(mapa)
+    except ValueError as e:
+        mensaje = f"'{ruta}': {e}"
+    else:
+        objeto._mapa = mapa
+        return objeto
+    # Fuera del except: el traceback ya no retiene las vistas que leer() hizo
+    # sobre el mapeo, que si no impedirían cerrarlo (BufferError)
+    mapa.close()
+    raise ValueError(mensaje)
@@ -1,399 +1,856 @@
-class ParseError(Exception):
-    pass
-
-class AnalizadorSintactico:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos_actual = 0
-        self.errores = []
-        self.ambito_actual = []  # Para manejar bloques anidados
-
-    def analizar(self):
-        try:
-            self.programa()
-            if not self.esta_al_final():
-                token = self.token_actual()
-                self.error(f"Tokens inesperados al final: '{token['Lexema']}'")
-            return self.errores
-        except ParseError:
-            return self.errores
-
-    def programa(self):
-        # Punto de entrada principal para analizar un programa Java
-        while not self.esta_al_final():
-            if self.comprobar('modificadorAcceso', 'public'):
-                self.declaracion_clase()
-            else:
-                self.error("Se esperaba una clase pública")
-                break
-
-    def declaracion_clase(self):
-        self.consumir('modificadorAcceso', 'public')
-        self.consumir('palabraReservada', 'class')
-        self.consumir('identificador')  # Nombre de la clase
-        
-        # Herencia e interfaces
-        if self.comprobar('palabraReservada', 'extends'):
-            self.consumir('palabraReservada', 'extends')
-            self.consumir('identificador')
-        if self.comprobar('palabraReservada', 'implements'):
-            self.consumir('palabraReservada', 'implements')
-            self.lista_identificadores()
-        
-        # Cuerpo de la clase
-        self.consumir('separador', '{')
-        self.ambito_actual.append('clase')
-        while not self.comprobar('separador', '}'):
-            if self.comprobar('modificadorAcceso') or self.comprobar('palabraReservada', 'static'):
-                self.declaracion_metodo()
-            else:
-                self.error("Declaración inválida en ámbito de clase")
-        self.consumir('separador', '}')
-        self.ambito_actual.pop()
-
-    def declaracion_metodo(self):
-        # Modificadores
-        while self.comprobar('modificadorAcceso') or self.comprobar('palabraReservada', 'static'):
-            self.avanzar()
-        
-        # Tipo de retorno
-        if not self.comprobar_tipo(incluir_void=True):
-            self.error("Tipo de retorno inválido")
-        self.avanzar()
-        
-        # Nombre del método
-        if self.comprobar('metodoEspecial', 'main'):
-            self.consumir('metodoEspecial', 'main')
-        else:
-            self.consumir('identificador')
-        
-        # Parámetros
-        self.consumir('separador', '(')
-        self.lista_parametros()
-        self.consumir('separador', ')')
-        
-        # Cuerpo del método
-        self.parse_bloque()
-
-    def lista_parametros(self):
-        # Analiza parámetros separados por comas
-        if self.comprobar('separador', ')'):
-            return  # Lista vacía de parámetros
-            
-        while not self.comprobar('separador', ')'):
-            self.consumir_tipo()
-            while self.comprobar('separador', '['):
-                self.consumir('separador', '[')
-                self.consumir('separador', ']')
-            # Nombre del parámetro
-            if not (self.comprobar('identificador') or self.comprobar('parametro')):
-                self.error("Se esperaba un identificador como nombre del parámetro")
-            self.avanzar()
-            if self.comprobar('separador', ','):
-                self.consumir('separador', ',')
-            elif not self.comprobar('separador', ')'):
-                self.error("Se esperaba ',' o ')' después del parámetro")
-
-    def lista_identificadores(self):
-        while True:
-            self.consumir('identificador')
-            if not self.comprobar('separador', ','):
-                break
-            self.consumir('separador', ',')
-
-    def consumir_tipo(self):
-        if self.comprobar('tipoPrimitivo') or self.comprobar('tipoReferencia'):
-            self.avanzar()
-        else:
-            self.error("Tipo inválido")
-
-    def comprobar_tipo(self, incluir_void=False):
-        if incluir_void:
-            return (self.comprobar('tipoPrimitivo') or 
-                    self.comprobar('tipoReferencia') or 
-                    self.comprobar('tipoRetorno', 'void'))
-        return self.comprobar('tipoPrimitivo') or self.comprobar('tipoReferencia')
-
-    # --- Manejo de declaraciones dentro de métodos ---
-    def declaracion(self):
-        # Determina qué tipo de sentencia hay y la parsea
-        if self.comprobar('palabraReservada', 'if'):
-            self.sentencia_if()
-        elif self.comprobar('palabraReservada', 'for'):
-            self.sentencia_for()
-        elif self.comprobar('palabraReservada', 'while'):
-            self.sentencia_while()
-        elif self.comprobar('palabraReservada', 'return'):
-            self.sentencia_return()
-        elif self.comprobar('tipoPrimitivo') or self.comprobar('tipoReferencia'):
-            # Declaración de variable
-            self.declaracion_variable()
-        elif self.comprobar('separador', '{'):
-            # Bloque de código
-            self.parse_bloque()
-        else:
-            self.sentencia_expresion()
-
-    def declaracion_variable(self):
-        # Tipo de la variable
-        self.consumir_tipo()
-        
-        # Nombre de la variable
-        self.consumir('identificador')
-        
-        # Inicialización opcional
-        if self.comprobar('operadorAsignacion', '='):
-            self.consumir('operadorAsignacion', '=')
-            self.expresion()
-        
-        # Posibles declaraciones múltiples
-        while self.comprobar('separador', ','):
-            self.consumir('separador', ',')
-            self.consumir('identificador')
-            if self.comprobar('operadorAsignacion', '='):
-                self.consumir('operadorAsignacion', '=')
-                self.expresion()
-        
-        self.consumir('separador', ';')
-
-    def parse_bloque(self):
-        self.consumir('separador', '{')
-        self.ambito_actual.append('bloque')
-        while not self.comprobar('separador', '}'):
-            if self.esta_al_final():
-                self.error("Bloque no cerrado correctamente, se esperaba '}'")
-                break
-            self.declaracion()
-        self.consumir('separador', '}')
-        self.ambito_actual.pop()
-
-    # Sentencias de control y expresiones
-    def sentencia_if(self):
-        self.consumir('palabraReservada', 'if')
-        self.consumir('separador', '(')
-        self.expresion()
-        self.consumir('separador', ')')
-        self.declaracion()  # cuerpo if
-        if self.comprobar('palabraReservada', 'else'):
-            self.consumir('palabraReservada', 'else')
-            self.declaracion()
-
-    def sentencia_for(self):
-        self.consumir('palabraReservada', 'for')
-        self.consumir('separador', '(')
-        
-        # Inicialización
-        if not self.comprobar('separador', ';'):
-            if self.comprobar_tipo():
-                self.declaracion_variable()
-            else:
-                self.sentencia_expresion(inner=True)
-                self.consumir('separador', ';')
-        else:
-            self.consumir('separador', ';')
-        
-        # Condición
-        if not self.comprobar('separador', ';'):
-            self.expresion()
-        self.consumir('separador', ';')
-        
-        # Incremento
-        if not self.comprobar('separador', ')'):
-            self.expresion()
-        self.consumir('separador', ')')
-        
-        self.declaracion()
-
-    def sentencia_while(self):
-        self.consumir('palabraReservada', 'while')
-        self.consumir('separador', '(')
-        self.expresion()
-        self.consumir('separador', ')')
-        self.declaracion()
-
-    def sentencia_return(self):
-        self.consumir('palabraReservada', 'return')
-        # expresión opcional
-        if not self.comprobar('separador', ';'):
-            self.expresion()
-        self.consumir('separador', ';')
-
-    def sentencia_expresion(self, inner=False):
-        # Ahora realmente evaluamos la expresión
-        self.expresion()
-        if not inner:
-            self.consumir('separador', ';')
-
-    def expresion(self):
-        """
-        Analiza una expresión completa.
-        Este método es una implementación simplificada que maneja expresiones básicas.
-        """
-        self.termino_primario()
-        
-        # Continuar mientras haya operadores o acceso a propiedades
-        while (self.comprobar('operadorAritmetico') or 
-               self.comprobar('operadorRelacional') or
-               self.comprobar('operadorLogico') or
-               self.comprobar('operadorAsignacion') or
-               self.comprobar('operadorBit') or
-               self.comprobar('separador', '.') or 
-               self.comprobar('separador', '[') or
-               self.comprobar('separador', '(')):
-               
-            if self.comprobar('separador', '.'):
-                # Llamada a método o acceso a propiedad
-                self.consumir('separador', '.')
-                self.consumir('identificador')
-                
-                # Llamada a método
-                if self.comprobar('separador', '('):
-                    self.consumir('separador', '(')
-                    self.argumentos_llamada()
-                    self.consumir('separador', ')')
-                    
-            elif self.comprobar('separador', '['):
-                # Acceso a array
-                self.consumir('separador', '[')
-                self.expresion()
-                self.consumir('separador', ']')
-                
-            elif self.comprobar('separador', '('):
-                # Llamada a método
-                self.consumir('separador', '(')
-                self.argumentos_llamada()
-                self.consumir('separador', ')')
-                
-            else:
-                # Operador binario (aritmetico, relacional, lógico, bit, asignación)
-                if self.comprobar('operadorAritmetico'):
-                    self.consumir('operadorAritmetico')
-                elif self.comprobar('operadorRelacional'):
-                    self.consumir('operadorRelacional')
-                elif self.comprobar('operadorLogico'):
-                    self.consumir('operadorLogico')
-                elif self.comprobar('operadorAsignacion'):
-                    self.consumir('operadorAsignacion')
-                elif self.comprobar('operadorBit'):
-                    self.consumir('operadorBit')
-                
-                self.termino_primario()
-
-    def termino_primario(self):
-        """
-        Analiza un término primario (identificador, literal, o expresión parentizada)
-        """
-        # Manejar clases predefinidas (Math) o identificadores normales
-        if self.comprobar('clasePredefinida') or self.comprobar('identificador'):
-            # Consumir el token (clasePredefinida o identificador)
-            token_tipo = 'clasePredefinida' if self.comprobar('clasePredefinida') else 'identificador'
-            self.consumir(token_tipo)
-            
-            # Procesar acceso a métodos/propiedades: .sqrt()
-            while self.comprobar('separador', '.'):
-                self.consumir('separador', '.')
-                if self.comprobar('identificador'):
-                    self.consumir('identificador')
-                    # Llamada a método: .sqrt(64)
-                    if self.comprobar('separador', '('):
-                        self.consumir('separador', '(')
-                        self.argumentos_llamada()
-                        self.consumir('separador', ')')
-                else:
-                    self.error("Se esperaba un identificador después de '.'")
-                
-        elif self.comprobar('literal'):
-            self.consumir('literal')
-        elif self.comprobar('cadenaLiteral'):
-            self.consumir('cadenaLiteral')
-        elif self.comprobar('tipoPrimitivo'):
-            self.consumir('tipoPrimitivo')
-        elif self.comprobar('literalEspecial'):
-            self.consumir('literalEspecial')
-        elif self.comprobar('numero_entero'):
-            self.consumir('numero_entero')
-        elif self.comprobar('literalBooleano'):  # <--- Caso añadido
-            self.consumir('literalBooleano')
-        elif self.comprobar('operadorAritmetico', '+') or self.comprobar('operadorAritmetico', '-') or self.comprobar('operadorLogico', '!'):
-            # Operador unario
-            if self.comprobar('operadorAritmetico'):
-                self.consumir('operadorAritmetico')
-            else:
-                self.consumir('operadorLogico')
-            self.termino_primario()
-        elif self.comprobar('separador', '('):
-            # Expresión parentizada
-            self.consumir('separador', '(')
-            self.expresion()
-            self.consumir('separador', ')')
-        elif self.comprobar('palabraReservada', 'new'):
-            # Instanciación de objeto
-            self.consumir('palabraReservada', 'new')
-            self.consumir_tipo()
-            
-            # Array o instancia normal
-            if self.comprobar('separador', '['):
-                self.consumir('separador', '[')
-                self.expresion()
-                self.consumir('separador', ']')
-                # Más dimensiones posibles
-                while self.comprobar('separador', '['):
-                    self.consumir('separador', '[')
-                    if not self.comprobar('separador', ']'):
-                        self.expresion()
-                    self.consumir('separador', ']')
-            else:
-                # Constructor
-                self.consumir('separador', '(')
-                self.argumentos_llamada()
-                self.consumir('separador', ')')
-        else:
-            self.error("Expresión inválida")
-
-    def argumentos_llamada(self):
-        """
-        Analiza los argumentos de una llamada a método
-        """
-        if self.comprobar('separador', ')'):
-            return  # Sin argumentos
-            
-        self.expresion()
-        while self.comprobar('separador', ','):
-            self.consumir('separador', ',')
-            self.expresion()
-
-    # --- Métodos auxiliares ---
-    def consumir(self, tipo, valor=None):
-        if self.esta_al_final():
-            self.error(f"Se esperaba {tipo} pero se terminó el código")
-            return
-        token = self.token_actual()
-        if token['ID'] != tipo or (valor is not None and token['Lexema'] != valor):
-            esperado = f"{tipo}{' '+valor if valor else ''}".strip()
-            encontrado = f"{token['ID']} '{token['Lexema']}'"
-            self.error(f"Se esperaba {esperado} pero se encontró {encontrado}")
-            return
-        self.pos_actual += 1
-
-    def comprobar(self, tipo, valor=None):
-        if self.esta_al_final():
-            return False
-        token = self.token_actual()
-        return token['ID'] == tipo and (valor is None or token['Lexema'] == valor)
-
-    def token_actual(self):
-        return self.tokens[self.pos_actual] if self.pos_actual < len(self.tokens) else None
-
-    def esta_al_final(self):
-        return self.pos_actual >= len(self.tokens)
-
-    def avanzar(self):
-        self.pos_actual += 1
-
-    def error(self, mensaje):
-        token = self.token_actual() or (self.tokens[-1] if self.tokens else None)
-        linea = token['Línea'] if token else 1
-        columna = token['Columna'] if token else 1
-        msg = f"Error sintáctico en línea {linea}, columna {columna}: {mensaje}"
-        self.errores.append(msg)
-        raise ParseError()
\ No newline at end of file
+import arbol_sintactico as nodo
+from analizador import Token, codigo_tipo, como_token
+from arbol_sintactico import ArbolSintactico
+
+class ParseError(Exception):
+    pass
+
+class AnalisisCancelado(Exception):
+    """Se lanza cuando el callback `cancelar` pide detener el análisis."""
+    pass
+
+# Tokens consumidos que se conservan antes de descartarlos al leer de un flujo
+VENTANA_FLUJO = 4096
+
+# Cantidad de errores tras la cual se abandona el análisis
+MAX_ERRORES = 100
+
+# Marcos permitidos en la pila del análisis de expresiones
+MAX_PILA_EXPRESION = 10000
+
+# --- Clases de token ---
+# Cada token se clasifica una sola vez al entrar al analizador en un entero
+# (su "clase"); la gramática compara y despacha por esas clases en lugar de
+# comparar el ID y el lexema de cada token.
+OTRO = 0   # Token sin significado propio para la gramática
+FIN = -1   # No quedan tokens
+ID_CLASE = ['']            # clase -> ID del token (para los mensajes de error)
+DESCRIPCION_CLASE = ['']   # clase -> "ID lexema" (para los mensajes de error)
+_CLASES_LEXEMA = {}        # lexema -> (código de tipo, clase)
+_CLASES_TIPO = {}          # código de tipo -> clase
+
+
+def _clase(id_token, lexema=None):
+    """Registra (o devuelve, si ya existe) la clase de un ID o de un par (ID, lexema)."""
+    tipo = codigo_tipo(id_token)
+    if lexema is None:
+        if tipo in _CLASES_TIPO:
+            return _CLASES_TIPO[tipo]
+    elif lexema in _CLASES_LEXEMA:
+        return _CLASES_LEXEMA[lexema][1]
+    clase = len(ID_CLASE)
+    ID_CLASE.append(id_token)
+    DESCRIPCION_CLASE.append(f"{id_token} {lexema}" if lexema else id_token)
+    if lexema is None:
+        _CLASES_TIPO[tipo] = clase
+    else:
+        _CLASES_LEXEMA[lexema] = (tipo, clase)
+    return clase
+
+
+def clasificar(token):
+    """Devuelve la clase de un Token."""
+    por_lexema = _CLASES_LEXEMA.get(token.lexema)
+    if por_lexema is not None and por_lexema[0] == token.tipo:
+        return por_lexema[1]
+    return _CLASES_TIPO.get(token.tipo, OTRO)
+
+
+PARENTESIS_ABIERTO = _clase('separador', '(')
+PARENTESIS_CERRADO = _clase('separador', ')')
+CORCHETE_ABIERTO = _clase('separador', '[')
+CORCHETE_CERRADO = _clase('separador', ']')
+LLAVE_ABIERTA = _clase('separador', '{')
+LLAVE_CERRADA = _clase('separador', '}')
+PUNTO_COMA = _clase('separador', ';')
+COMA = _clase('separador', ',')
+PUNTO = _clase('separador', '.')
+PUBLIC = _clase('modificadorAcceso', 'public')
+CLASS = _clase('palabraReservada', 'class')
+EXTENDS = _clase('palabraReservada', 'extends')
+IMPLEMENTS = _clase('palabraReservada', 'implements')
+RETURN = _clase('palabraReservada', 'return')
+NEW = _clase('palabraReservada', 'new')
+THIS = _clase('palabraReservada', 'this')
+SUPER = _clase('palabraReservada', 'super')
+IF = _clase('controlFlujo', 'if')
+ELSE = _clase('controlFlujo', 'else')
+FOR = _clase('controlFlujo', 'for')
+WHILE = _clase('controlFlujo', 'while')
+VOID = _clase('tipoRetorno', 'void')
+MAIN = _clase('metodoEspecial', 'main')
+CONDICION_TERNARIA = _clase('operadorTernario', '?')
+RETORNO_TERNARIA = _clase('operadorTernario', ':')
+MODIFICADOR = _clase('modificadorAcceso')
+IDENTIFICADOR = _clase('identificador')
+PARAMETRO = _clase('parametro')
+TIPO_PRIMITIVO = _clase('tipoPrimitivo')
+TIPO_REFERENCIA = _clase('tipoReferencia')
+
+# Operadores binarios de Java por nivel de precedencia (mayor número, mayor precedencia)
+_BINARIOS = (
+    (1, True, 'operadorAsignacion', ('=', '+=', '-=', '*=', '/=', '%=')),
+    (1, True, 'operadorBit', ('&=', '|=', '^=', '<<=', '>>=', '>>>=')),
+    (3, False, 'operadorLogico', ('||',)),
+    (4, False, 'operadorLogico', ('&&',)),
+    (5, False, 'operadorBit', ('|',)),
+    (6, False, 'operadorBit', ('^',)),
+    (7, False, 'operadorBit', ('&',)),
+    (8, False, 'operadorRelacional', ('==', '!=')),
+    (9, False, 'operadorRelacional', ('<', '>', '<=', '>=')),
+    (9, False, 'operadorLogico', ('instanceof',)),
+    (10, False, 'operadorBit', ('<<', '>>', '>>>')),
+    (11, False, 'operadorAritmetico', ('+', '-')),
+    (12, False, 'operadorAritmetico', ('*', '/', '%')),
+)
+# clase -> (precedencia, asociativo por la derecha)
+OPERADORES_BINARIOS = {_clase(id_token, lexema): (precedencia, derecha)
+                       for precedencia, derecha, id_token, lexemas in _BINARIOS for lexema in lexemas}
+ASIGNACION = _clase('operadorAsignacion', '=')
+PRECEDENCIA_TERNARIO = 2
+PRECEDENCIA_PREFIJO = 13
+OPERADORES_PREFIJOS = frozenset((_clase('operadorAritmetico', '+'), _clase('operadorAritmetico', '-'),
+                                 _clase('operadorLogico', '!'), _clase('operadorBit', '~'),
+                                 _clase('operadorIncremento', '++'), _clase('operadorIncremento', '--')))
+OPERADORES_SUFIJOS = frozenset((_clase('operadorIncremento', '++'), _clase('operadorIncremento', '--')))
+
+# Tokens que pueden nombrar una variable, clase o miembro
+NOMBRES = frozenset((IDENTIFICADOR, PARAMETRO, TIPO_REFERENCIA, MAIN, _clase('clasePredefinida'),
+                     _clase('metodoFormato'), _clase('metodoEspecial')))
+LITERALES = frozenset(_clase(id_token) for id_token in (
+    'literal', 'cadenaLiteral', 'literal_caracter', 'literalEspecial', 'literalNull', 'numero_entero',
+    'numero_decimal', 'literalBooleano'))
+# Término primario de una expresión: clase -> tipo de nodo
+TERMINOS_PRIMARIOS = dict.fromkeys(NOMBRES | {TIPO_PRIMITIVO, THIS, SUPER}, nodo.NOMBRE)
+TERMINOS_PRIMARIOS.update(dict.fromkeys(LITERALES, nodo.LITERAL))
+TIPOS = frozenset((TIPO_PRIMITIVO, TIPO_REFERENCIA))
+TIPOS_RETORNO = TIPOS | {VOID}
+MODIFICADORES = frozenset((PUBLIC, MODIFICADOR))
+
+# Puntos de sincronización de la recuperación de errores
+INICIO_SENTENCIA = frozenset((IF, FOR, WHILE, RETURN, TIPO_PRIMITIVO, TIPO_REFERENCIA, LLAVE_ABIERTA))
+INICIO_MIEMBRO = MODIFICADORES
+INICIO_CLASE = frozenset((PUBLIC,))
+
+# Pasos de un marco en la pila de sentencias compuestas (ver declaracion)
+PASO_BLOQUE, PASO_CUERPO, PASO_IF, PASO_ELSE, PASO_CERRAR = range(5)
+
+# Clases de marco en la pila de expresiones
+BINARIO, PREFIJO, RAMA_FALSA, PARENTESIS, ARGUMENTOS, CONSTRUCTOR, INDICE, DIMENSION, TERNARIO = range(9)
+CIERRES = {PARENTESIS: PARENTESIS_CERRADO, ARGUMENTOS: PARENTESIS_CERRADO, CONSTRUCTOR: PARENTESIS_CERRADO,
+           INDICE: CORCHETE_CERRADO, DIMENSION: CORCHETE_CERRADO, TERNARIO: RETORNO_TERNARIA, None: None}
+
+class AnalizadorSintactico:
+    def __init__(self, tokens, cancelar=None, max_errores=MAX_ERRORES, construir_arbol=True):
+        """
+        Args:
+            tokens: Lista de tokens o cualquier iterable (p. ej. analizador.iter_tokens);
+                    en el segundo caso los tokens se leen a medida que se necesitan
+                    y los ya consumidos se descartan.
+            cancelar: Función opcional sin argumentos que se consulta en cada
+                      sentencia; si devuelve True se lanza AnalisisCancelado.
+            max_errores: Errores a reportar antes de detener el análisis. Tras cada
+                         error se descartan tokens hasta un punto seguro (';', '}' o
+                         el inicio de una sentencia o declaración) y se continúa;
+                         con 1 se detiene en el primer error.
+            construir_arbol: Si es False no se conserva el árbol: `nodos` solo guarda
+                             los de la sentencia o miembro en curso (las expresiones
+                             los necesitan para armarse) y la memoria no crece con
+                             el código, como al leer un flujo de tokens.
+        Tras analizar(), `arbol` devuelve el árbol sintáctico (ver arbol_sintactico).
+        """
+        self.cancelar = cancelar
+        self.construir_arbol = construir_arbol
+        self.max_errores = max(1, max_errores)
+        if isinstance(tokens, (list, tuple)):
+            if all(isinstance(token, Token) for token in tokens):
+                self.tokens = tokens
+            else:
+                self.tokens = [como_token(token) for token in tokens]
+            self._flujo = None
+        else:
+            self.tokens = []
+            self._flujo = map(como_token, tokens)
+        self.clases = list(map(clasificar, self.tokens))  # Clase de cada token de self.tokens
+        self._base = 0  # Posición absoluta de self.tokens[0]
+        self.pos_actual = 0
+        self.errores = []
+        # Los mismos errores con su ubicación: (línea, columna, largo, mensaje)
+        self.diagnosticos = []
+        self.ambito_actual = []  # Para manejar bloques anidados
+        # Nodos en postorden: (tipo, inicio, fin, tamano, valor, linea, columna)
+        self.nodos = []
+        self._arbol = None
+
+    @property
+    def arbol(self):
+        """
+        ArbolSintactico con los nodos generados por el último analizar(), o
+        None si se analizó con construir_arbol=False.
+        """
+        if self._arbol is None and self.construir_arbol:
+            self._arbol = ArbolSintactico.desde_nodos(self.nodos)
+        return self._arbol
+
+    def analizar(self):
+        abierto = self.abrir()
+        try:
+            self.programa()
+            if not self.esta_al_final():
+                token = self.token_actual()
+                self.error(f"Tokens inesperados al final: '{token.lexema}'")
+        except ParseError:
+            pass
+        self.cerrar(nodo.PROGRAMA, abierto)
+        if not self.construir_arbol:
+            self.nodos.clear()
+        self._arbol = None
+        return self.errores
+
+    def programa(self):
+        # Punto de entrada principal para analizar un programa Java
+        while not self.esta_al_final():
+            abierto = self.abrir()
+            try:
+                if self.comprobar(PUBLIC):
+                    self.declaracion_clase()
+                else:
+                    self.error("Se esperaba una clase pública")
+            except ParseError:
+                self.recuperar(abierto, 0, INICIO_CLASE)
+
+    def declaracion_clase(self):
+        abierto = self.abrir()
+        self.hoja(nodo.MODIFICADOR, PUBLIC)
+        self.consumir(CLASS)
+        nombre = self.consumir(IDENTIFICADOR).lexema  # Nombre de la clase
+
+        # Herencia e interfaces
+        if self.comprobar(EXTENDS):
+            self.consumir(EXTENDS)
+            self.hoja(nodo.EXTIENDE, IDENTIFICADOR)
+        if self.comprobar(IMPLEMENTS):
+            self.consumir(IMPLEMENTS)
+            self.lista_identificadores()
+
+        # Cuerpo de la clase
+        self.consumir(LLAVE_ABIERTA)
+        self.ambito_actual.append('clase')
+        profundidad = len(self.ambito_actual)
+        while not self.comprobar(LLAVE_CERRADA):
+            if not self.construir_arbol:
+                self.nodos.clear()
+            abierto_miembro = self.abrir()
+            try:
+                if self.clase_actual() in MODIFICADORES:
+                    self.declaracion_metodo()
+                else:
+                    self.error("Declaración inválida en ámbito de clase")
+            except ParseError:
+                self.recuperar(abierto_miembro, profundidad, INICIO_MIEMBRO)
+        self.consumir(LLAVE_CERRADA)
+        self.ambito_actual.pop()
+        self.cerrar(nodo.CLASE, abierto, nombre)
+
+    def declaracion_metodo(self):
+        abierto = self.abrir()
+        # Modificadores
+        while self.clase_actual() in MODIFICADORES:
+            self.hoja(nodo.MODIFICADOR)
+
+        # Tipo de retorno
+        if self.clase_actual() not in TIPOS_RETORNO:
+            self.error("Tipo de retorno inválido")
+        self.hoja(nodo.TIPO)
+
+        # Nombre del método
+        if self.comprobar(MAIN):
+            nombre = self.consumir(MAIN).lexema
+        else:
+            nombre = self.consumir(IDENTIFICADOR).lexema
+
+        # Parámetros
+        self.consumir(PARENTESIS_ABIERTO)
+        self.lista_parametros()
+        self.consumir(PARENTESIS_CERRADO)
+
+        # Cuerpo del método
+        self.parse_bloque()
+        self.cerrar(nodo.METODO, abierto, nombre)
+
+    def lista_parametros(self):
+        # Analiza parámetros separados por comas
+        if self.comprobar(PARENTESIS_CERRADO):
+            return  # Lista vacía de parámetros
+
+        while not self.comprobar(PARENTESIS_CERRADO):
+            abierto = self.abrir()
+            tipo = self.abrir()
+            tipo_parametro = self.token_actual()
+            self.consumir_tipo()
+            dimensiones = 0
+            while self.comprobar(CORCHETE_ABIERTO):
+                self.consumir(CORCHETE_ABIERTO)
+                self.consumir(CORCHETE_CERRADO)
+                dimensiones += 1
+            self.cerrar(nodo.TIPO, tipo, tipo_parametro.lexema + "[]" * dimensiones)
+            # Nombre del parámetro
+            clase = self.clase_actual()
+            if clase != IDENTIFICADOR and clase != PARAMETRO:
+                self.error("Se esperaba un identificador como nombre del parámetro")
+            nombre = self.token_actual().lexema
+            self.avanzar()
+            self.cerrar(nodo.PARAMETRO, abierto, nombre)
+            if self.comprobar(COMA):
+                self.consumir(COMA)
+            elif not self.comprobar(PARENTESIS_CERRADO):
+                self.error("Se esperaba ',' o ')' después del parámetro")
+
+    def lista_identificadores(self):
+        while True:
+            self.hoja(nodo.IMPLEMENTA, IDENTIFICADOR)
+            if not self.comprobar(COMA):
+                break
+            self.consumir(COMA)
+
+    def consumir_tipo(self):
+        if self.clase_actual() in TIPOS:
+            self.avanzar()
+        else:
+            self.error("Tipo inválido")
+
+    def comprobar_tipo(self, incluir_void=False):
+        return self.clase_actual() in (TIPOS_RETORNO if incluir_void else TIPOS)
+
+    # --- Manejo de declaraciones dentro de métodos ---
+    def declaracion(self, bloque=None):
+        """
+        Analiza una sentencia con todas las que tenga anidadas o, si se pasa
+        `bloque` (un marco de abrir_bloque), las sentencias de ese bloque hasta '}'.
+        No usa recursión: la cabecera de una sentencia compuesta (bloque, if,
+        for, while) deja un marco [paso, tipo de nodo, abrir() del nodo, abrir()
+        de la sentencia, ámbitos al empezarla] en una pila explícita y sus
+        sentencias hijas se analizan en el mismo bucle, así que el anidamiento
+        solo está limitado por la memoria.
+        Un error se recupera en la sentencia más interna que lo contiene: la
+        que se estaba empezando o, si falló el cierre de un marco, la de ese marco.
+        """
+        pila = [bloque] if bloque is not None else []
+        nueva = bloque is None  # Lo siguiente es el inicio de una sentencia
+        while True:
+            sentencia = None
+            try:
+                if nueva:
+                    if self.cancelar is not None and self.cancelar():
+                        raise AnalisisCancelado()
+                    if not self.construir_arbol:
+                        # Ningún nodo anterior se vuelve a leer: solo quedan marcas
+                        # de abrir() cuyos nodos ya no se guardan
+                        self.nodos.clear()
+                    sentencia = (self.abrir(), len(self.ambito_actual))
+                    marco = self.sentencia(sentencia)
+                    sentencia = None
+                    if marco is not None:
+                        pila.append(marco)
+                # Avanzar los marcos hasta que uno espere una sentencia hija
+                while pila:
+                    if self.continuar(pila[-1]):
+                        break
+                    pila.pop()
+                else:
+                    return
+                nueva = True
+            except ParseError:
+                if sentencia is None:
+                    _, _, _, abierto, profundidad = pila.pop()
+                    if abierto is None:
+                        raise  # Cuerpo de un método: lo recupera declaracion_clase
+                    sentencia = (abierto, profundidad)
+                self.recuperar(*sentencia, INICIO_SENTENCIA)
+                # La sentencia quedó como nodo "error": sigue su marco padre
+                nueva = False
+
+    def sentencia(self, sentencia):
+        """
+        Analiza una sentencia simple o la cabecera de una compuesta según la
+        clase de su primer token. Devuelve el marco de la compuesta, o None.
+        """
+        clase = self.clase_actual()
+        compuesta = self.COMPUESTAS.get(clase)
+        if compuesta is not None:
+            return compuesta(self, sentencia)
+        self.SENTENCIAS.get(clase, AnalizadorSintactico.sentencia_expresion)(self)
+
+    def continuar(self, marco):
+        """
+        Avanza el marco de una sentencia compuesta tras su cabecera o tras una
+        sentencia hija. Devuelve True si lo siguiente es otra sentencia hija y
+        False si la sentencia terminó (su nodo ya está creado).
+        """
+        paso = marco[0]
+        if paso == PASO_BLOQUE:
+            if not self.comprobar(LLAVE_CERRADA):
+                if not self.esta_al_final():
+                    return True
+                self.error("Bloque no cerrado correctamente, se esperaba '}'")
+            self.consumir(LLAVE_CERRADA)
+            self.ambito_actual.pop()
+        elif paso == PASO_CUERPO or paso == PASO_IF:
+            marco[0] = PASO_ELSE if paso == PASO_IF else PASO_CERRAR
+            return True
+        elif paso == PASO_ELSE and self.comprobar(ELSE):
+            self.consumir(ELSE)
+            marco[0] = PASO_CERRAR
+            return True
+        self.cerrar(marco[1], marco[2])
+        return False
+
+    def declaracion_variable(self):
+        abierto = self.abrir()
+        # Tipo de la variable
+        if self.clase_actual() not in TIPOS:
+            self.error("Tipo inválido")
+        self.hoja(nodo.TIPO)
+
+        while True:
+            # Nombre de la variable
+            declarador = self.abrir()
+            nombre = self.consumir(IDENTIFICADOR).lexema
+
+            # Inicialización opcional
+            if self.comprobar(ASIGNACION):
+                self.consumir(ASIGNACION)
+                self.expresion()
+            self.cerrar(nodo.DECLARADOR, declarador, nombre)
+
+            # Posibles declaraciones múltiples
+            if not self.comprobar(COMA):
+                break
+            self.consumir(COMA)
+
+        self.consumir(PUNTO_COMA)
+        self.cerrar(nodo.DECLARACION_VARIABLE, abierto)
+
+    def parse_bloque(self):
+        # Cuerpo de un método: sus errores se propagan a la declaración del miembro
+        self.declaracion(self.abrir_bloque())
+
+    def abrir_bloque(self, sentencia=(None, None)):
+        abierto = self.abrir()
+        self.consumir(LLAVE_ABIERTA)
+        self.ambito_actual.append('bloque')
+        return [PASO_BLOQUE, nodo.BLOQUE, abierto, *sentencia]
+
+    # Sentencias de control y expresiones: devuelven el marco con el que
+    # declaracion() analiza su cuerpo
+    def sentencia_if(self, sentencia):
+        abierto = self.abrir()
+        self.consumir(IF)
+        self.consumir(PARENTESIS_ABIERTO)
+        self.expresion()
+        self.consumir(PARENTESIS_CERRADO)
+        # Sigue el cuerpo del if y, si hay 'else', el de la rama else
+        return [PASO_IF, nodo.IF, abierto, *sentencia]
+
+    def sentencia_for(self, sentencia):
+        # Hijos: inicialización, condición, incremento y cuerpo (nodo "vacio" si falta alguno)
+        abierto = self.abrir()
+        self.consumir(FOR)
+        self.consumir(PARENTESIS_ABIERTO)
+
+        # Inicialización
+        if not self.comprobar(PUNTO_COMA):
+            if self.comprobar_tipo():
+                self.declaracion_variable()
+            else:
+                self.sentencia_expresion(inner=True)
+                self.consumir(PUNTO_COMA)
+        else:
+            self.cerrar(nodo.VACIO, self.abrir())
+            self.consumir(PUNTO_COMA)
+
+        # Condición
+        if not self.comprobar(PUNTO_COMA):
+            self.expresion()
+        else:
+            self.cerrar(nodo.VACIO, self.abrir())
+        self.consumir(PUNTO_COMA)
+
+        # Incremento
+        if not self.comprobar(PARENTESIS_CERRADO):
+            self.expresion()
+        else:
+            self.cerrar(nodo.VACIO, self.abrir())
+        self.consumir(PARENTESIS_CERRADO)
+        return [PASO_CUERPO, nodo.FOR, abierto, *sentencia]
+
+    def sentencia_while(self, sentencia):
+        abierto = self.abrir()
+        self.consumir(WHILE)
+        self.consumir(PARENTESIS_ABIERTO)
+        self.expresion()
+        self.consumir(PARENTESIS_CERRADO)
+        return [PASO_CUERPO, nodo.WHILE, abierto, *sentencia]
+
+    def sentencia_return(self):
+        abierto = self.abrir()
+        self.consumir(RETURN)
+        # expresión opcional
+        if not self.comprobar(PUNTO_COMA):
+            self.expresion()
+        self.consumir(PUNTO_COMA)
+        self.cerrar(nodo.RETURN, abierto)
+
+    def sentencia_expresion(self, inner=False):
+        # Ahora realmente evaluamos la expresión
+        abierto = self.abrir()
+        self.expresion()
+        if not inner:
+            self.consumir(PUNTO_COMA)
+        self.cerrar(nodo.SENTENCIA_EXPRESION, abierto)
+
+    # Sentencia según la clase de su primer token; el resto son sentencias de expresión
+    SENTENCIAS = {
+        RETURN: sentencia_return,
+        TIPO_PRIMITIVO: declaracion_variable,  # Declaración de variable
+        TIPO_REFERENCIA: declaracion_variable,
+    }
+    # Sentencias compuestas: analizan la cabecera y devuelven el marco del cuerpo
+    COMPUESTAS = {
+        IF: sentencia_if,
+        FOR: sentencia_for,
+        WHILE: sentencia_while,
+        LLAVE_ABIERTA: abrir_bloque,  # Bloque de código
+    }
+
+    def expresion(self):
+        """
+        Analiza una expresión completa por precedencia de operadores (Pratt).
+        No usa recursión: los operadores pendientes y las agrupaciones abiertas
+        ('(', '[', argumentos de llamadas, '?') se guardan en una pila explícita,
+        de modo que el anidamiento solo está limitado por MAX_PILA_EXPRESION.
+        La precedencia y asociatividad son las de Java (ver OPERADORES_BINARIOS).
+        Devuelve el índice del nodo raíz de la expresión.
+        """
+        # Marcos (precedencia, clase, posición, dato); las agrupaciones tienen precedencia 0
+        pila = []
+        operandos = []  # Nodos raíz de los operandos ya analizados
+        esperando_operando = True
+        while True:
+            if len(pila) > MAX_PILA_EXPRESION:
+                self.error("Expresión anidada demasiado profunda")
+            clase = self.clase_actual()
+
+            if esperando_operando:
+                # Término primario, operadores prefijos y agrupaciones
+                tipo_nodo = TERMINOS_PRIMARIOS.get(clase)
+                if tipo_nodo is not None:
+                    operandos.append(self.hoja(tipo_nodo))
+                    esperando_operando = False
+                elif clase in OPERADORES_PREFIJOS:
+                    pila.append((PRECEDENCIA_PREFIJO, PREFIJO, self.pos_actual, self.token_actual()))
+                    self.pos_actual += 1
+                elif clase == PARENTESIS_ABIERTO:
+                    pila.append((0, PARENTESIS, self.pos_actual, None))
+                    self.pos_actual += 1
+                elif clase == NEW:
+                    esperando_operando = self.instanciacion(pila, operandos)
+                else:
+                    self.error("Expresión inválida")
+                continue
+
+            # Operadores binarios, sufijos y cierre de agrupaciones
+            operador = OPERADORES_BINARIOS.get(clase)
+            if operador is not None:
+                precedencia, derecha = operador
+                self.reducir(pila, operandos, precedencia + 1 if derecha else precedencia)
+                pila.append((precedencia, BINARIO, self.pos_actual, self.token_actual()))
+                self.pos_actual += 1
+                esperando_operando = True
+            elif clase == PUNTO:
+                # Acceso a miembro o llamada a método: .sqrt(64)
+                self.pos_actual += 1
+                if self.clase_actual() not in NOMBRES:
+                    self.error("Se esperaba un identificador después de '.'")
+                nombre = self.token_actual().lexema
+                self.pos_actual += 1
+                operandos[-1] = self.envolver(nodo.ACCESO, operandos[-1], self.pos_actual, nombre)
+            elif clase == PARENTESIS_ABIERTO:
+                # Llamada a método
+                self.pos_actual += 1
+                if self.comprobar(PARENTESIS_CERRADO):
+                    self.pos_actual += 1  # Sin argumentos
+                    operandos[-1] = self.envolver(nodo.LLAMADA, operandos[-1], self.pos_actual)
+                else:
+                    pila.append((0, ARGUMENTOS, self.pos_actual, len(operandos)))
+                    esperando_operando = True
+            elif clase == CORCHETE_ABIERTO:
+                # Acceso a array
+                self.pos_actual += 1
+                pila.append((0, INDICE, self.pos_actual, len(operandos)))
+                esperando_operando = True
+            elif clase == PARENTESIS_CERRADO or clase == CORCHETE_CERRADO or clase == COMA:
+                self.reducir(pila, operandos, 1)
+                grupo = pila[-1][1] if pila else None
+                if clase == COMA:
+                    if grupo != ARGUMENTOS and grupo != CONSTRUCTOR:
+                        break
+                    esperando_operando = True
+                elif CIERRES[grupo] != clase:
+                    break
+                else:
+                    marco = pila.pop()
+                    self.cerrar_grupo(marco, operandos)
+                self.pos_actual += 1
+                if grupo == DIMENSION:
+                    esperando_operando = self.dimensiones(pila, operandos, marco[3])
+            elif clase in OPERADORES_SUFIJOS:
+                operandos[-1] = self.envolver(nodo.SUFIJA, operandos[-1], self.pos_actual + 1,
+                                              self.token_actual().lexema)
+                self.pos_actual += 1
+            elif clase == CONDICION_TERNARIA:
+                self.reducir(pila, operandos, PRECEDENCIA_TERNARIO + 1)
+                pila.append((0, TERNARIO, self.pos_actual, None))
+                self.pos_actual += 1
+                esperando_operando = True
+            elif clase == RETORNO_TERNARIA:
+                self.reducir(pila, operandos, 1)
+                if not pila or pila[-1][1] != TERNARIO:
+                    break
+                # La rama falsa se comporta como operador asociativo por la derecha
+                pila[-1] = (PRECEDENCIA_TERNARIO, RAMA_FALSA, self.pos_actual, None)
+                self.pos_actual += 1
+                esperando_operando = True
+            else:
+                break
+
+        # Fin de la expresión: no debe quedar ninguna agrupación abierta
+        self.reducir(pila, operandos, 1)
+        if pila:
+            self.consumir(CIERRES[pila[-1][1]])
+        return operandos[-1]
+
+    def instanciacion(self, pila, operandos):
+        """
+        Analiza `new Tipo(args)` o `new Tipo[n][m]...` a partir de 'new'.
+        Devuelve True si se abrió una agrupación y lo siguiente es un operando.
+        """
+        abierto = self.abrir()
+        self.avanzar()  # new
+        clase = self.clase_actual()
+        if clase in TIPOS or clase in NOMBRES:
+            tipo = self.token_actual().lexema
+            self.avanzar()
+        else:
+            self.error("Tipo inválido")
+        # Las dimensiones o argumentos se acumulan en `operandos` desde `base`
+        dato = (abierto, tipo, len(operandos))
+        if self.comprobar(CORCHETE_ABIERTO):
+            self.avanzar()
+            pila.append((0, DIMENSION, self.pos_actual, dato))
+            return True
+        # Constructor
+        self.consumir(PARENTESIS_ABIERTO)
+        if self.comprobar(PARENTESIS_CERRADO):
+            self.avanzar()
+            operandos.append(self.cerrar(nodo.NUEVO, abierto, tipo))
+            return False
+        pila.append((0, CONSTRUCTOR, self.pos_actual, dato))
+        return True
+
+    def dimensiones(self, pila, operandos, dato):
+        # Dimensiones adicionales de `new Tipo[n]`; las vacías ('[]') no llevan expresión
+        while self.comprobar(CORCHETE_ABIERTO):
+            self.avanzar()
+            if not self.comprobar(CORCHETE_CERRADO):
+                pila.append((0, DIMENSION, self.pos_actual, dato))
+                return True
+            self.avanzar()
+        abierto, tipo, base = dato
+        del operandos[base:]
+        operandos.append(self.cerrar(nodo.NUEVO, abierto, tipo))
+        return False
+
+    def cerrar_grupo(self, marco, operandos):
+        # Crea el nodo de una agrupación que se cierra; los paréntesis no generan
+        # nodo y el de `new Tipo[n]` lo crea dimensiones()
+        grupo, dato = marco[1], marco[3]
+        if grupo == ARGUMENTOS:
+            del operandos[dato:]
+            operandos[-1] = self.envolver(nodo.LLAMADA, operandos[-1], self.pos_actual + 1)
+        elif grupo == INDICE:
+            del operandos[dato:]
+            operandos[-1] = self.envolver(nodo.INDICE, operandos[-1], self.pos_actual + 1)
+        elif grupo == CONSTRUCTOR:
+            abierto, tipo, base = dato
+            del operandos[base:]
+            operandos.append(self.cerrar(nodo.NUEVO, abierto, tipo, self.pos_actual + 1))
+
+    def reducir(self, pila, operandos, precedencia):
+        # Aplica los operadores pendientes de precedencia >= `precedencia` creando
+        # sus nodos; las agrupaciones (precedencia 0) detienen la reducción
+        nodos = self.nodos
+        while pila and pila[-1][0] >= precedencia:
+            _, marco, posicion, token = pila.pop()
+            if marco == BINARIO:
+                derecho = operandos.pop()
+                operandos[-1] = self.envolver(nodo.BINARIA, operandos[-1], nodos[derecho][2], token.lexema)
+            elif marco == PREFIJO:
+                operando = operandos[-1]
+                nodos.append((nodo.UNARIA, posicion, nodos[operando][2], nodos[operando][3] + 1,
+                              token.lexema, token.linea, token.columna))
+                operandos[-1] = len(nodos) - 1
+            else:  # RAMA_FALSA
+                falso = operandos.pop()
+                operandos.pop()  # Rama verdadera
+                operandos[-1] = self.envolver(nodo.TERNARIA, operandos[-1], nodos[falso][2])
+
+    # --- Construcción del árbol ---
+    def abrir(self):
+        """Marca el inicio de un nodo: (cantidad de nodos, posición, línea, columna)."""
+        if self.clase_actual() == FIN:
+            return len(self.nodos), self.pos_actual, 0, 0
+        token = self.tokens[self.pos_actual - self._base]
+        return len(self.nodos), self.pos_actual, token.linea, token.columna
+
+    def cerrar(self, tipo, abierto, valor=None, fin=None):
+        """
+        Agrega un nodo cuyos hijos son los nodos creados desde abrir() y que
+        cubre los tokens desde ese punto hasta la posición actual (o `fin`).
+        """
+        marca, inicio, linea, columna = abierto
+        self.nodos.append((tipo, inicio, self.pos_actual if fin is None else fin,
+                           len(self.nodos) - marca + 1, valor, linea, columna))
+        return len(self.nodos) - 1
+
+    def envolver(self, tipo, primero, fin, valor=None):
+        """
+        Agrega un nodo de expresión que empieza en el subárbol `primero` (su
+        primer hijo) y abarca todos los nodos creados después de él.
+        """
+        nodos = self.nodos
+        _, inicio, _, tamano, _, linea, columna = nodos[primero]
+        nodos.append((tipo, inicio, fin, len(nodos) - (primero - tamano + 1) + 1, valor, linea, columna))
+        return len(nodos) - 1
+
+    def hoja(self, tipo, clase=None):
+        """
+        Agrega un nodo sin hijos para el token actual y lo consume. Sin `clase`
+        el llamador ya comprobó que hay un token válido en la posición actual.
+        """
+        if clase is None:
+            token = self.tokens[self.pos_actual - self._base]
+            self.pos_actual += 1
+        else:
+            token = self.consumir(clase)
+        self.nodos.append((tipo, self.pos_actual - 1, self.pos_actual, 1, token.lexema, token.linea, token.columna))
+        return len(self.nodos) - 1
+
+    # --- Recuperación de errores (modo pánico) ---
+    def recuperar(self, abierto, profundidad, inicios):
+        """
+        Descarta tokens tras un error para continuar el análisis.
+        Args:
+            abierto (tuple): abrir() de la construcción que falló; sus nodos
+                             parciales se reemplazan por un nodo "error".
+            profundidad (int): Ámbitos abiertos al empezar esa construcción.
+            inicios (frozenset): Clases de token que inician una nueva construcción
+                                 del mismo nivel (sentencia, miembro o clase).
+        Se detiene después de un ';', antes de un '}' que cierra el ámbito actual
+        o antes de un token de `inicios`. Si se alcanzó el límite de errores o el
+        final del código, el ParseError se propaga.
+        """
+        if len(self.errores) >= self.max_errores or self.esta_al_final():
+            raise ParseError()
+        del self.ambito_actual[profundidad:]
+        del self.nodos[abierto[0]:]
+        inicio = abierto[1]
+        llaves = 0  # '{' abiertas dentro de los tokens descartados
+        while True:
+            clase = self.clase_actual()
+            if clase == FIN:
+                break
+            if llaves == 0 and self.pos_actual > inicio and clase in inicios:
+                break
+            if clase == PUNTO_COMA and llaves == 0:
+                self.avanzar()
+                break
+            if clase == LLAVE_ABIERTA:
+                llaves += 1
+            elif clase == LLAVE_CERRADA:
+                if llaves == 0:
+                    break
+                llaves -= 1
+                if llaves == 0:
+                    # Se descartó un bloque completo (p. ej. el cuerpo de un método)
+                    self.avanzar()
+                    break
+            self.avanzar()
+        if self.pos_actual == inicio:
+            # Garantizar avance: el token que provocó el error se descarta
+            self.avanzar()
+        self.cerrar(nodo.ERROR, abierto)
+
+    # --- Métodos auxiliares ---
+    def consumir(self, clase):
+        """Consume un token de la clase indicada y lo devuelve."""
+        actual = self.clase_actual()
+        if actual == clase:
+            self.pos_actual += 1
+            return self.tokens[self.pos_actual - 1 - self._base]
+        if actual == FIN:
+            self.error(f"Se esperaba {ID_CLASE[clase]} pero se terminó el código")
+            return
+        token = self.token_actual()
+        encontrado = f"{token.id} '{token.lexema}'"
+        self.error(f"Se esperaba {DESCRIPCION_CLASE[clase]} pero se encontró {encontrado}")
+
+    def comprobar(self, clase):
+        return self.clase_actual() == clase
+
+    def clase_actual(self):
+        indice = self.pos_actual - self._base
+        if indice < len(self.clases):
+            return self.clases[indice]
+        if self._flujo is not None:
+            self._leer_flujo()
+            indice = self.pos_actual - self._base
+            if indice < len(self.clases):
+                return self.clases[indice]
+        return FIN
+
+    def token_actual(self):
+        indice = self.pos_actual - self._base
+        if indice >= len(self.tokens) and self._flujo is not None:
+            self._leer_flujo()
+            indice = self.pos_actual - self._base
+        return self.tokens[indice] if indice < len(self.tokens) else None
+
+    def _leer_flujo(self):
+        # Descartar los tokens ya consumidos (se conserva el último para los errores)
+        consumidos = min(self.pos_actual - self._base, len(self.tokens) - 1)
+        if consumidos >= VENTANA_FLUJO:
+            del self.tokens[:consumidos]
+            del self.clases[:consumidos]
+            self._base += consumidos
+        for token in self._flujo:
+            self.tokens.append(token)
+            self.clases.append(clasificar(token))
+            if self.pos_actual - self._base < len(self.tokens):
+                return
+        self._flujo = None
+
+    def esta_al_final(self):
+        return self.clase_actual() == FIN
+
+    def avanzar(self):
+        self.pos_actual += 1
+
+    def error(self, mensaje):
+        token = self.token_actual() or (self.tokens[-1] if self.tokens else None)
+        linea = token.linea if token else 1
+        columna = token.columna if token else 1
+        msg = f"Error sintáctico en línea {linea}, columna {columna}: {mensaje}"
+        self.errores.append(msg)
+        self.diagnosticos.append((linea, columna, len(token.lexema) if token else 1, msg))
+        raise ParseError()
@@ -0,0 +1,122 @@
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from analizador import TOKENS_IGNORADOS, obtener_lexer
+from cache_resultados import huella_texto
+from sintactico import AnalisisCancelado, AnalizadorSintactico
+
+# Cada cuántos tokens se revisa la cancelación y se informa el progreso
+INTERVALO_PROGRESO = 2048
+
+
+class SenalesAnalisis(QObject):
+    # Las señales viven en un QObject aparte porque QRunnable no es un QObject
+    progreso = Signal(int, int)        # id_tarea, porcentaje
+    terminado = Signal(int, object)    # id_tarea, resultado
+    cancelado = Signal(int)            # id_tarea
+    fallo = Signal(int, str)           # id_tarea, mensaje
+
+
+class TareaAnalisis(QRunnable):
+    """
+    Ejecuta el análisis léxico (y opcionalmente el sintáctico) fuera del hilo
+    de la interfaz. El resultado llega por la señal `terminado` como un dict
+    {"codigo", "tokens", "errores", "diagnosticos"}; "errores" y "diagnosticos"
+    (ver AnalizadorSintactico.diagnosticos) son None si no se pidió el
+    análisis sintáctico.
+    Si se pasa `previo` = (codigo_anterior, tokens_anteriores, (posicion, eliminados,
+    agregados)), los tokens se obtienen con el relexado incremental.
+    Con `cache` (una CacheMemoria) no se repite el análisis de un texto que ya
+    se analizó, y el resultado queda guardado en ella. El dict del resultado
+    incluye "desde_cache": "completo", "parcial" (se reutilizaron los tokens)
+    o None.
+    """
+
+    def __init__(self, id_tarea, codigo, sintactico=False, previo=None, cache=None):
+        super().__init__()
+        self.id_tarea = id_tarea
+        self.codigo = codigo
+        self.previo = previo
+        self.sintactico = sintactico
+        self.cache = cache
+        self.en_vivo = False  # Lo usa la interfaz para no registrar cada ejecución
+        self.al_terminar = None  # Lo usa la interfaz: acción pendiente del resultado (p. ej. exportar)
+        self.senales = SenalesAnalisis()
+        self._cancelada = threading.Event()
+
+    def cancelar(self):
+        self._cancelada.set()
+
+    def cancelada(self):
+        return self._cancelada.is_set()
+
+    def run(self):
+        try:
+            resultado = self._analizar()
+        except AnalisisCancelado:
+            self.senales.cancelado.emit(self.id_tarea)
+        except Exception as e:
+            self.senales.fallo.emit(self.id_tarea, str(e))
+        else:
+            self.senales.terminado.emit(self.id_tarea, resultado)
+
+    def _analizar(self):
+        # El léxico ocupa la primera mitad de la barra si también hay sintáctico
+        escala = 50 if self.sintactico else 100
+        largo = len(self.codigo) or 1
+        huella = guardado = None
+        if self.cache is not None:
+            huella = huella_texto(self.codigo)
+            guardado = self.cache.obtener(huella, self.sintactico)
+        if guardado is not None and (not self.sintactico or guardado["errores"] is not None):
+            self.senales.progreso.emit(self.id_tarea, 100)
+            return {"codigo": self.codigo, "tokens": guardado["tokens"],
+                    "errores": guardado["errores"] if self.sintactico else None,
+                    "diagnosticos": guardado["diagnosticos"] if self.sintactico else None,
+                    "desde_cache": "completo"}
+
+        if guardado is not None:
+            tokens = guardado["tokens"]
+        elif self.previo is not None:
+            # Los tokens anteriores pueden estar a la vista: no modificarlos
+            codigo_anterior, tokens_anteriores, edicion = self.previo
+            tokens = obtener_lexer().relexar(tokens_anteriores, codigo_anterior, self.codigo, *edicion,
+                                             en_el_lugar=False)
+        else:
+            tokens = []
+            for i, token in enumerate(obtener_lexer().iter_tokens(self.codigo)):
+                tokens.append(token)
+                if i % INTERVALO_PROGRESO == 0:
+                    if self.cancelada():
+                        raise AnalisisCancelado()
+                    self.senales.progreso.emit(self.id_tarea, token.inicio * escala // largo)
+        if self.cache is not None and guardado is None:
+            self.cache.guardar(huella, tokens)
+
+        errores = diagnosticos = None
+        if self.sintactico:
+            # Filtrar tokens irrelevantes
+            tokens_filtrados = [t for t in tokens if t.id not in TOKENS_IGNORADOS]
+            total = len(tokens_filtrados) or 1
+            analizador = None
+            llamadas = 0
+
+            def cancelar():
+                nonlocal llamadas
+                llamadas += 1
+                if llamadas % 256 == 0:
+                    self.senales.progreso.emit(self.id_tarea, 50 + analizador.pos_actual * 50 // total)
+                return self.cancelada()
+
+            # La interfaz no muestra el árbol: solo hacen falta errores y diagnósticos
+            analizador = AnalizadorSintactico(tokens_filtrados, cancelar=cancelar, construir_arbol=False)
+            errores = analizador.analizar()
+            diagnosticos = analizador.diagnosticos
+            tokens = tokens_filtrados
+            if self.cache is not None:
+                self.cache.guardar(huella, tokens, errores, diagnosticos)
+
+        self.senales.progreso.emit(self.id_tarea, 100)
+        return {"codigo": self.codigo, "tokens": tokens, "errores": errores, "diagnosticos": diagnosticos,
+                "desde_cache": "parcial" if guardado is not None else None}